@@ -5,6 +5,52 @@ from typing import *
 import xxhash
 
 
+class AttributeAccumulator(ABC):
+    """
+    Calculates the value of an attribute from the instructions and the CFG of a single function, which are fed to it by
+    Utility.FeatureWalker. All the accumulators of a function are fed by a single pass over the function, instead of
+    each attribute traversing the function by itself.
+    """
+
+    # Accumulators must set these to True in order for visit_instruction, or visit_basic_block and visit_edge, to be
+    # called.
+    visits_instructions: bool = False
+    visits_edges: bool = False
+
+    def visit_instruction(self, tokens: List, address: int):
+        """
+        Called once for every instruction of the function, with its instruction text tokens.
+        """
+        pass
+
+    def visit_basic_block(self, basic_block, outgoing_edges: List):
+        """
+        Called once for every basic block of the function, before visit_edge is called for its outgoing edges.
+        """
+        pass
+
+    def visit_edge(self, edge):
+        """
+        Called once for every outgoing edge of every basic block of the function.
+        """
+        pass
+
+    def get_features(self):
+        """
+        Accumulators of offloadable attributes return the features gathered during the traversal, in the form returned
+        by Attribute.gather_features.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def finish(self) -> Optional[Dict]:
+        """
+        Called after the function was traversed. The values of the attribute dependencies are available at this point.
+        :return: The attribute value.
+        """
+        pass
+
+
 class Attribute(ABC):
     """
     Base class for Attributes.
@@ -34,7 +80,23 @@ class Attribute(ABC):
         # dependencies is a list of strings, each string is a dependency attribute name.
         self.dependencies = dependencies
 
+    # The version of the attribute value calculation. Must be bumped whenever the calculation changes, as it invalidates
+    # the values cached by previous versions (see DataManagement.AttributeCache).
+    version: int = 1
 
+    # Attributes whose value is calculated by pure python code from features gathered through the disassembler API
+    # should set this to True and implement gather_features and compute_value, which allows the calculation to be
+    # offloaded to a process pool during extraction.
+    offloadable: bool = False
+
+    def create_accumulator(self, base_object: BDObject) -> Optional[AttributeAccumulator]:
+        """
+        Attributes calculated from the instructions or the CFG of a function should return an AttributeAccumulator, so
+        their value can be calculated together with other attributes in a single pass over the function.
+        :return: An accumulator calculating the attribute value of base_object, or None if the attribute doesn't
+                 support it.
+        """
+        return None
 
     @abstractmethod
     def extract_attribute(self, base_object: BDObject):
@@ -44,3 +106,28 @@ class Attribute(ABC):
         :return: dict of {value_name: value}
         """
         pass
+
+    def gather_features(self, base_object: BDObject):
+        """
+        Gather the (picklable) features needed to calculate the attribute value from the base object.
+        Only used when offloadable is True.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def compute_value(features) -> Dict:
+        """
+        Calculate the attribute value from the features returned by gather_features.
+        Must be pure python code that does not access the disassembler, as it may run in another process.
+        Only used when offloadable is True.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def batch_compute_values(cls, features_batch: List) -> List[Dict]:
+        """
+        Calculate the attribute values of a batch of objects at once, from the features returned by gather_features.
+        Attributes whose calculation can be vectorised over many objects should override this.
+        Only used when offloadable is True.
+        """
+        return [cls.compute_value(features) for features in features_batch]
@@ -1,5 +1,6 @@
 from abc import *
-from typing import List, Dict
+from array import array
+from typing import List, Dict, Iterable, Optional, Tuple
 from ..Enums import bd_enums
 import xxhash
 
@@ -8,44 +9,122 @@ class BDObject(ABC):
     """
     Base class for all operands (file, function, basic block, instruction etc)
     BD = Binary Diff
+
+    BDObjects are kept in memory for the whole diff, so they are kept compact - they only hold the uuid, the uuids of
+    their neighbours and the extracted attribute values. The underlying disassembler object is resolved lazily (see
+    resolve_underlying_obj), and may be released once the attributes were extracted. The neighbours are only resolved
+    when first needed, as resolving them requires generating the uuid of each of them.
     """
 
+    __slots__ = ('uuid', '_parents', '_children', 'extracted_attributes', '_underlying_obj', '__weakref__')
+
     bd_obj_type: bd_enums.TargetType
     bd_obj_IR: bd_enums.IRType
 
-    def __init__(self):
-        self.registered_attributes = List[str]  # attributes to extract from this object
-        self.underlying_obj: object             # The actual object represented by this BDObject
-                                                # (i.e BinaryView, BasicBlock etc)
+    def __init__(self, underlying_obj: object = None):
+        """
+        :param underlying_obj: The actual object represented by this BDObject (i.e BinaryView, BasicBlock etc)
+        """
+        self._underlying_obj: object = underlying_obj
         self.uuid: int = 0                      # The uuid of the object, this can mean different things for different
                                                 # objects.
                                                 # Obtained by the self.generate_uuid() static method.
                                                 # (i.e index of a bb, address of an instruction etc)
-        self.parents: List[str] = self.get_parents()
-        self.children: List[str] = self.get_children()
-        self.extracted_attributes: Dict[str, dict] = dict()
+        # The uuids of the parent \ child BDObjects, calculated on first access (see parents and children) or set in
+        # bulk by set_adjacency.
+        self._parents: Optional[array] = None
+        self._children: Optional[array] = None
+        # Created on the first extracted attribute.
+        self.extracted_attributes: Optional[Dict[str, dict]] = None
+
+    @property
+    def parents(self) -> array:
+        """
+        The uuids of the parent BDObjects, uuids are 64 bit hashes masked to a Java long, so they are stored as
+        signed long longs.
+        """
+        if self._parents is None:
+            self._parents = array('q', self.get_parents() or ())
+        return self._parents
+
+    @property
+    def children(self) -> array:
+        """
+        The uuids of the child BDObjects, uuids are 64 bit hashes masked to a Java long, so they are stored as
+        signed long longs.
+        """
+        if self._children is None:
+            self._children = array('q', self.get_children() or ())
+        return self._children
+
+    def set_adjacency(self, parents: Iterable[int], children: Iterable[int]):
+        """
+        Set the parent and child uuids, when they were calculated in bulk for many BDObjects at once (so get_parents and
+        get_children are never called).
+        """
+        self._parents = array('q', parents)
+        self._children = array('q', children)
+
+    @property
+    def underlying_obj(self):
+        """
+        The actual object represented by this BDObject, resolved on first access after it was released.
+        """
+        if self._underlying_obj is None:
+            self._underlying_obj = self.resolve_underlying_obj()
+        return self._underlying_obj
+
+    @underlying_obj.setter
+    def underlying_obj(self, underlying_obj: object):
+        self._underlying_obj = underlying_obj
+
+    def resolve_underlying_obj(self) -> object:
+        """
+        :return: The underlying object, looked up again through the disassembler.
+        """
+        raise ValueError(f'{type(self).__name__} {self} can not resolve its underlying object')
+
+    def get_cache_address(self) -> Tuple[int, int]:
+        """
+        :return: (start address of the function containing the object, start address of the object), which identify the
+                 object within its binary without depending on the path of the binary or on the underlying object.
+                 Used as the key of the object in the attribute cache.
+        """
+        raise ValueError(f'{type(self).__name__} {self} has no cache address')
+
+    def release_underlying_obj(self):
+        """
+        Drop the reference to the underlying object, so the disassembler can free it. It is resolved again if needed.
+        """
+        self._underlying_obj = None
 
     @abstractmethod
-    def get_parents(self) -> List[str]:
+    def get_parents(self) -> List[int]:
         """
         :return: list containing uuid of each parent BDObject
         """
         pass
 
     @abstractmethod
-    def get_children(self) -> List[str]:
+    def get_children(self) -> List[int]:
         """
         :return: list containing uuid of each child BDObject
         """
         pass
 
     def add_attribute_value(self, attr_name: str, attr_results: dict):
+        if self.extracted_attributes is None:
+            self.extracted_attributes = dict()
         self.extracted_attributes.update({attr_name: attr_results})
 
     def get_attribute_value(self, attr_name: str):
+        if self.extracted_attributes is None:
+            return None
         return self.extracted_attributes.get(attr_name)
 
-    def get_all_attribute_values(self):
+    def get_all_attribute_values(self) -> Dict[str, dict]:
+        if self.extracted_attributes is None:
+            return dict()
         return self.extracted_attributes
 
     @abstractmethod
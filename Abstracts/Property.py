@@ -30,11 +30,11 @@ class Property(abc.ABC):
         A Selector init should not contain anything related to external arguments.
         """
 
-        # loaded_attributes contains the modules for all attribute plugins loaded from disk.
-        # In order to use the module we need to instantiate the class itself.
-        for attr_name, attr_module in globally_loaded_attributes.items():
+        # loaded_attributes contains an instance of every attribute plugin loaded from disk (see
+        # PluginManager.import_attributes), which is shared by all the properties and selectors.
+        for attr_name, attr_instance in globally_loaded_attributes.items():
             if not self.loaded_attributes.get(attr_name):
-                self.add_attribute(attr_name, attr_module())
+                self.add_attribute(attr_name, attr_instance)
 
     @abc.abstractmethod
     def exec_comparison_heuristic(self, source_set: BDSet, dest_set: BDSet) -> List[Tuple[BDSet, BDSet]]:
@@ -1,5 +1,5 @@
 import abc
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Hashable, Tuple
 from ..Enums import bd_enums
 from ..Abstracts.Attribute import Attribute
 from ..Abstracts.BDObject import BDObject
@@ -22,17 +22,25 @@ class Selector(abc.ABC):
     target_bd_IR: bd_enums.IRType
     loaded_attributes: Dict[str, Attribute] = dict()
     selector_comparison_result_type: bd_enums.SelectorComparisonResultType
+    # Boolean selectors that only compare a single value for equality should set this to True and implement
+    # get_comparison_key, which allows the FlowManager to match entire sets by hashing instead of comparing every
+    # source object against every target object.
+    selector_has_comparison_key: bool = False
+    # IntDistance selectors whose distance is the euclidean distance between two numeric feature vectors should set
+    # this to True and implement get_feature_vector, which allows the FlowManager to find the closest target of each
+    # source object through a nearest neighbour index instead of scanning the whole target set.
+    selector_has_feature_vector: bool = False
 
     def __init__(self, globally_loaded_attributes: Dict[str, Attribute]):
         """
         A Selector init should not contain anything related to external arguments.
         """
 
-        # loaded_attributes contains the modules for all attribute plugins loaded from disk.
-        # In order to use the module we need to instantiate the class itself.
-        for attr_name, attr_module in globally_loaded_attributes.items():
+        # loaded_attributes contains an instance of every attribute plugin loaded from disk (see
+        # PluginManager.import_attributes), which is shared by all the properties and selectors.
+        for attr_name, attr_instance in globally_loaded_attributes.items():
             if not self.loaded_attributes.get(attr_name):
-                self.add_attribute(attr_name, attr_module())
+                self.add_attribute(attr_name, attr_instance)
 
     @abc.abstractmethod
     def exec_comparison_heuristic(self, source_object: BDObject,
@@ -43,6 +51,24 @@ class Selector(abc.ABC):
         """
         pass
 
+    def get_comparison_key(self, bd_object: BDObject) -> Optional[Hashable]:
+        """
+        Return the hashable value this selector compares for equality.
+        Two objects are matched by the selector if and only if their comparison keys are equal. An object which has no
+        value to compare returns None and is never matched by the selector.
+        Only used when selector_has_comparison_key is True.
+        """
+        raise NotImplementedError
+
+    def get_feature_vector(self, bd_object: BDObject) -> Optional[Tuple[float, ...]]:
+        """
+        Return the numeric feature vector this selector measures the distance between.
+        exec_comparison_heuristic must return the euclidean distance between the feature vectors of the two objects.
+        An object which has no value to compare returns None and is never matched by the selector.
+        Only used when selector_has_feature_vector is True.
+        """
+        raise NotImplementedError
+
     def add_attribute(self, attr_name: str, attr_class_obj: Attribute):
         self.loaded_attributes.update({attr_name: attr_class_obj})
 
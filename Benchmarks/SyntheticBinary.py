@@ -0,0 +1,435 @@
+"""
+
+   Synthetic binaries, used to benchmark the diffing flow without analysing real binaries.
+
+   A SyntheticBinary is a generated call graph of functions, each with a CFG of basic blocks, the mnemonics of the
+   instructions in each basic block, its call sites and the strings it references. mutate creates the next version of
+   a binary, in which functions are renamed, small callees are inlined into their callers and basic blocks are
+   reordered at the given rates, while recording the source function (and basic block) every function (and basic
+   block) originated from - the ground truth the matches are scored against.
+
+   build_function_set creates BDFunction \ BDBasicBlock stand-ins for the functions of a binary, with the values of
+   all the attributes used by the Properties and Selectors already populated (extract_attribute returns an existing
+   value without touching the underlying object), so the diffing flow runs on them exactly as it does on the objects
+   created from a BinaryView.
+
+"""
+
+import random
+from collections import Counter
+from typing import *
+
+import xxhash
+
+from .. import Configuration
+from ..Abstracts.BDObject import BDObject
+from ..Operands.Assembly.BDBasicBlock import BDBasicBlock
+from ..Operands.Assembly.BDFunction import BDFunction, BDFunctionSet
+from ..Operation.Attributes.Assembly.FunctionMDIndex import FunctionMDIndex
+from ..Operation.Attributes.Assembly.FunctionTopologicalSort import FunctionTopologicalSort
+
+# Generator parameters
+BASE_ADDRESS: int = 0x401000
+INSTRUCTION_SIZE: int = 4
+MEAN_BASIC_BLOCK_COUNT: int = 6
+MAX_BASIC_BLOCK_COUNT: int = 256
+MEAN_INSTRUCTION_COUNT: int = 5
+# Mnemonics are ids in range(MNEMONIC_COUNT), drawn from a long tailed distribution (like mov \ push \ call are far
+# more common than the rest). CALL_MNEMONIC is the mnemonic of the instruction of every call site.
+MNEMONIC_COUNT: int = 64
+CALL_MNEMONIC: int = 0
+# Probability of a basic block to end in a conditional branch, and of the branch to jump backwards (a loop).
+BRANCH_PROBABILITY: float = 0.4
+LOOP_PROBABILITY: float = 0.2
+# Probability of a basic block to contain a call, and of the call to be a recursive call.
+CALL_PROBABILITY: float = 0.3
+RECURSION_PROBABILITY: float = 0.02
+# Callees are drawn with a bias towards the first functions (raised to this power), so some functions are called from
+# many places (like library functions) and most functions are called from a few.
+CALLEE_BIAS: int = 3
+STRING_REFERENCE_PROBABILITY: float = 0.3
+# Probability of a function to have a symbol, the rest are named sub_<address> (which Properties ignore).
+NAMED_FUNCTION_PROBABILITY: float = 0.5
+# Only callees with at most this many basic blocks are inlined.
+INLINE_MAX_BASIC_BLOCK_COUNT: int = 4
+
+
+class FunctionModel:
+    """
+    A generated function. The model is also the underlying object of its stand-in BDFunction, so attributes that look
+    at the underlying function name (e.g FunctionNameHash of a sub_ function) behave as they do for a real function.
+    """
+
+    __slots__ = ('origin', 'name', 'start', 'blocks', 'successors', 'block_calls', 'block_origins', 'strings')
+
+    def __init__(self, origin: int, name: str, blocks: List[bytes], successors: List[Tuple[int, ...]],
+                 block_calls: List[Tuple[int, ...]], block_origins: List[Optional[int]], strings: Tuple[str, ...]):
+        # origin: The index of the function this function originated from in the source binary.
+        self.origin: int = origin
+        self.name: str = name
+        self.start: int = 0
+        # blocks[i] is the mnemonics of the instructions of basic block i, in the order of the basic blocks in memory.
+        self.blocks: List[bytes] = blocks
+        # successors[i] \ block_calls[i] are the indexes of the child basic blocks \ the called functions of block i.
+        self.successors: List[Tuple[int, ...]] = successors
+        self.block_calls: List[Tuple[int, ...]] = block_calls
+        # block_origins[i] is the index of basic block i in the source function, None for inlined basic blocks.
+        self.block_origins: List[Optional[int]] = block_origins
+        self.strings: Tuple[str, ...] = strings
+
+    def copy(self) -> 'FunctionModel':
+        return FunctionModel(self.origin, self.name, list(self.blocks), list(self.successors), list(self.block_calls),
+                             list(self.block_origins), self.strings)
+
+    def instruction_count(self) -> int:
+        return sum(len(block) for block in self.blocks)
+
+
+class SyntheticBinary:
+
+    def __init__(self, name: str, functions: List[FunctionModel]):
+        self.name: str = name
+        self.functions: List[FunctionModel] = functions
+        self.layout()
+        # function_attributes[i] is {attribute name: value} of function i, see compute_function_attributes.
+        self.function_attributes: List[Dict[str, dict]] = compute_function_attributes(self)
+
+    def layout(self):
+        """
+        Place the functions one after the other, and name the functions without a symbol after their address.
+        """
+        address = BASE_ADDRESS
+        for function in self.functions:
+            function.start = address
+            if function.name.startswith('sub_'):
+                function.name = f'sub_{address:x}'
+            address += (function.instruction_count() * INSTRUCTION_SIZE + 15) & ~15
+
+    def basic_block_count(self) -> int:
+        return sum(len(function.blocks) for function in self.functions)
+
+
+def scatter_uuid(index: int, salt: int) -> int:
+    """
+    A 32 bit uuid for the index - multiplying by an odd number is a bijection modulo 2^32, so unlike a hash the uuids of
+    different indexes never collide.
+    """
+    return (index * 0x9E3779B1 + salt) & 0xFFFFFFFF
+
+
+def block_hash(block: bytes) -> int:
+    return xxhash.xxh32(block).intdigest()
+
+
+def generate_mnemonic(rng: random.Random) -> int:
+    return min(int(rng.paretovariate(1.2)), MNEMONIC_COUNT - 1)
+
+
+def generate_function(rng: random.Random, index: int, function_count: int) -> FunctionModel:
+    block_count = min(1 + int(rng.expovariate(1 / (MEAN_BASIC_BLOCK_COUNT - 1))), MAX_BASIC_BLOCK_COUNT)
+
+    blocks: List[bytes] = list()
+    successors: List[Tuple[int, ...]] = list()
+    block_calls: List[Tuple[int, ...]] = list()
+    for block_index in range(block_count):
+        mnemonics = [generate_mnemonic(rng) for _ in range(1 + int(rng.expovariate(1 / MEAN_INSTRUCTION_COUNT)))]
+
+        calls: Tuple[int, ...] = ()
+        if rng.random() < CALL_PROBABILITY:
+            if rng.random() < RECURSION_PROBABILITY:
+                calls = (index,)
+            else:
+                calls = (int(function_count * rng.random() ** CALLEE_BIAS),)
+            mnemonics.append(CALL_MNEMONIC)
+        blocks.append(bytes(mnemonics))
+        block_calls.append(calls)
+
+        # The last basic block returns, every other basic block falls through to the next one and may branch.
+        block_successors: List[int] = list()
+        if block_index < block_count - 1:
+            block_successors.append(block_index + 1)
+            if rng.random() < BRANCH_PROBABILITY:
+                if rng.random() < LOOP_PROBABILITY:
+                    branch_target = rng.randint(0, block_index)
+                else:
+                    branch_target = rng.randint(block_index + 1, block_count - 1)
+                if branch_target not in block_successors:
+                    block_successors.append(branch_target)
+        successors.append(tuple(block_successors))
+
+    strings: Tuple[str, ...] = ()
+    if rng.random() < STRING_REFERENCE_PROBABILITY:
+        strings = tuple(f'string_{rng.getrandbits(48):012x}' for _ in range(rng.randint(1, 3)))
+
+    name = f'function_{rng.getrandbits(32):08x}' if rng.random() < NAMED_FUNCTION_PROBABILITY else 'sub_'
+    return FunctionModel(index, name, blocks, successors, block_calls, list(range(block_count)), strings)
+
+
+def generate_binary(name: str, function_count: int, seed: int = 0) -> SyntheticBinary:
+    rng = random.Random(seed)
+    return SyntheticBinary(name, [generate_function(rng, index, function_count) for index in range(function_count)])
+
+
+def inline_call(function: FunctionModel, block_index: int, callee_index: int, callee: FunctionModel):
+    """
+    Replace the call to the callee in the basic block with a copy of the CFG of the callee - the basic block branches
+    to the callee entry, and the callee exits branch to the former successors of the basic block.
+    """
+    base_index = len(function.blocks)
+    exit_successors = function.successors[block_index]
+    for callee_block_index, callee_block in enumerate(callee.blocks):
+        function.blocks.append(callee_block)
+        callee_successors = callee.successors[callee_block_index]
+        if callee_successors:
+            function.successors.append(tuple(base_index + successor for successor in callee_successors))
+        else:
+            function.successors.append(exit_successors)
+        function.block_calls.append(callee.block_calls[callee_block_index])
+        function.block_origins.append(None)
+
+    calls = list(function.block_calls[block_index])
+    calls.remove(callee_index)
+    function.block_calls[block_index] = tuple(calls)
+    mnemonics = bytearray(function.blocks[block_index])
+    mnemonics.remove(CALL_MNEMONIC)
+    function.blocks[block_index] = bytes(mnemonics)
+    function.successors[block_index] = (base_index,)
+
+
+def reorder_blocks(rng: random.Random, function: FunctionModel):
+    """
+    Shuffle the order of the basic blocks in memory, the entry basic block stays first.
+    """
+    order = list(range(1, len(function.blocks)))
+    rng.shuffle(order)
+    order.insert(0, 0)
+    # new_indexes[old index] = new index
+    new_indexes = [0] * len(order)
+    for new_index, old_index in enumerate(order):
+        new_indexes[old_index] = new_index
+
+    function.blocks = [function.blocks[old_index] for old_index in order]
+    function.successors = [tuple(new_indexes[successor] for successor in function.successors[old_index])
+                           for old_index in order]
+    function.block_calls = [function.block_calls[old_index] for old_index in order]
+    function.block_origins = [function.block_origins[old_index] for old_index in order]
+
+
+def mutate(source: SyntheticBinary, name: str, rename_rate: float = 0.1, inline_rate: float = 0.1,
+           reorder_rate: float = 0.1, seed: int = 1) -> SyntheticBinary:
+    """
+    Create the next version of the source binary.
+    :param rename_rate: The probability of a function with a symbol to be renamed.
+    :param inline_rate: The probability of each call to a small function to be inlined.
+    :param reorder_rate: The probability of a function to have its basic blocks reordered.
+    """
+    rng = random.Random(seed)
+    functions = [function.copy() for function in source.functions]
+
+    for function_index, function in enumerate(functions):
+        # Only the calls of the source function are inlined (and not the calls of the inlined basic blocks).
+        for block_index in range(len(source.functions[function_index].blocks)):
+            for callee_index in function.block_calls[block_index]:
+                callee = source.functions[callee_index]
+                if callee_index != function_index and len(callee.blocks) <= INLINE_MAX_BASIC_BLOCK_COUNT \
+                        and rng.random() < inline_rate:
+                    inline_call(function, block_index, callee_index, callee)
+
+        if len(function.blocks) > 2 and rng.random() < reorder_rate:
+            reorder_blocks(rng, function)
+
+        if not function.name.startswith('sub_') and rng.random() < rename_rate:
+            function.name = f'function_{rng.getrandbits(32):08x}'
+
+    return SyntheticBinary(name, functions)
+
+
+def prime_table(count: int) -> List[int]:
+    primes: List[int] = list()
+    candidate = 2
+    while len(primes) < count:
+        if all(candidate % prime for prime in primes if prime * prime <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+
+MNEMONIC_PRIMES: List[int] = prime_table(MNEMONIC_COUNT)
+
+
+def compute_function_attributes(binary: SyntheticBinary) -> List[Dict[str, dict]]:
+    """
+    Calculate the values of the function attributes the way the attributes calculate them from a real function.
+    The topological sort and the MD-Index are calculated by the attributes themselves.
+    """
+    function_callees: List[Set[int]] = [{callee for calls in function.block_calls for callee in calls}
+                                        for function in binary.functions]
+    function_callers: List[Set[int]] = [set() for _ in binary.functions]
+    for function_index, callees in enumerate(function_callees):
+        for callee in callees:
+            function_callers[callee].add(function_index)
+
+    function_attributes: List[Dict[str, dict]] = list()
+    md_index_features: List[List[Tuple[int, int, int, int, int]]] = list()
+    for function_index, function in enumerate(binary.functions):
+        function_hash = xxhash.xxh32()
+        mnemonic_counts: Counter = Counter()
+        for block in function.blocks:
+            function_hash.update(block)
+            mnemonic_counts.update(block)
+        function_spp = 1
+        for mnemonic, count in mnemonic_counts.items():
+            function_spp = (function_spp * pow(MNEMONIC_PRIMES[mnemonic], count, Configuration.MAX_INT)) \
+                % Configuration.MAX_INT
+
+        strings_hash = xxhash.xxh32()
+        for string in function.strings:
+            strings_hash.update(string.encode('utf8'))
+
+        attributes = {
+            'FunctionDegree': {'in_degree': len(function_callers[function_index]),
+                               'out_degree': len(function_callees[function_index])},
+            'FunctionRecursion': {'recursive': function_index in function_callees[function_index]},
+            'FunctionHash': {'hash': function_hash.intdigest()},
+            'FunctionSPP': {'function_spp': function_spp},
+            'FunctionStringReferences': {'strings_hash': strings_hash.intdigest()},
+            'FunctionBasicBlockCount': {'bb_count': len(function.blocks)},
+            'FunctionEdgeCount': {'edge_count': sum(len(successors) for successors in function.successors)},
+            'FunctionCallsiteCount': {'callsite_count': sum(len(calls) for calls in function.block_calls)},
+            'FunctionTopologicalSort': FunctionTopologicalSort.compute_value(function.successors)
+        }
+        # Functions without a symbol have no FunctionNameHash value.
+        if not function.name.startswith('sub_'):
+            attributes['FunctionNameHash'] = {'name_hash': xxhash.xxh32(function.name).hexdigest()}
+        function_attributes.append(attributes)
+
+        topological_sort = attributes['FunctionTopologicalSort']['topological_sort']
+        in_degrees = [0] * len(function.blocks)
+        for successors in function.successors:
+            for successor in successors:
+                in_degrees[successor] += 1
+        md_index_features.append([(topological_sort[block_index], in_degrees[block_index], len(successors),
+                                   in_degrees[successor], len(function.successors[successor]))
+                                  for block_index, successors in enumerate(function.successors)
+                                  for successor in successors])
+
+    for attributes, md_index in zip(function_attributes, FunctionMDIndex.batch_compute_values(md_index_features)):
+        attributes['FunctionMDIndex'] = md_index
+
+    return function_attributes
+
+
+def compute_basic_block_attributes(binary: SyntheticBinary, function_index: int) -> List[Dict[str, dict]]:
+    function = binary.functions[function_index]
+    in_degrees = [0] * len(function.blocks)
+    for successors in function.successors:
+        for successor in successors:
+            in_degrees[successor] += 1
+
+    basic_block_attributes: List[Dict[str, dict]] = list()
+    for block_index, block in enumerate(function.blocks):
+        callee_names_hash = xxhash.xxh32()
+        for callee in function.block_calls[block_index]:
+            callee_name = binary.functions[callee].name
+            if not callee_name.startswith('sub_'):
+                callee_names_hash.update(callee_name)
+
+        basic_block_attributes.append({
+            'BasicBlockDegree': {'in_degree': in_degrees[block_index],
+                                 'out_degree': len(function.successors[block_index])},
+            'BasicBlockInstructionCount': {'bb_instr_count': len(block)},
+            'BasicBlockCallees': {'callee_names_hash': callee_names_hash.intdigest()},
+            'BasicBlockHash': {'hash': block_hash(block)}
+        })
+
+    return basic_block_attributes
+
+
+class SyntheticBasicBlock(BDBasicBlock):
+    """
+    A BDBasicBlock stand-in for a basic block of a FunctionModel.
+    """
+
+    __slots__ = ('origin',)
+
+    def __init__(self, parent_bd_function: 'SyntheticFunction', index: int, start: int, uuid: int,
+                 attributes: Dict[str, dict]):
+        self.parent_bd_function = parent_bd_function
+        self.start: int = start
+        self.index: int = index
+        BDObject.__init__(self)
+        self.uuid = uuid
+        self.extracted_attributes = attributes
+        # origin: The index of the basic block this basic block originated from in the source function.
+        self.origin: Optional[int] = parent_bd_function.resolve_underlying_obj().block_origins[index]
+
+
+class SyntheticFunction(BDFunction):
+    """
+    A BDFunction stand-in for a function of a SyntheticBinary.
+    """
+
+    __slots__ = ('binary', 'index', 'origin')
+
+    def __init__(self, binary: SyntheticBinary, index: int, uuid: int):
+        function = binary.functions[index]
+        self.view = None
+        self.start: int = function.start
+        self.name: str = function.name
+        BDObject.__init__(self, function)
+        self.uuid = uuid
+        self.bd_basic_blocks: Dict[int, BDBasicBlock] = dict()
+        self.basic_block_call_sites = None
+        self.binary: SyntheticBinary = binary
+        self.index: int = index
+        # origin: The index of the function this function originated from in the source binary.
+        self.origin: int = function.origin
+        self.extracted_attributes = dict(binary.function_attributes[index])
+
+    def resolve_underlying_obj(self) -> FunctionModel:
+        return self.binary.functions[self.index]
+
+    def populate_basic_blocks(self):
+        if self.bd_basic_blocks:
+            return
+
+        function = self.resolve_underlying_obj()
+        salt = xxhash.xxh32(f'{self.binary.name}:{self.index}').intdigest()
+        uuids = [scatter_uuid(block_index, salt) for block_index in range(len(function.blocks))]
+        parents: List[List[int]] = [list() for _ in function.blocks]
+        for block_index, successors in enumerate(function.successors):
+            for successor in successors:
+                parents[successor].append(uuids[block_index])
+
+        address = function.start
+        for block_index, attributes in enumerate(compute_basic_block_attributes(self.binary, self.index)):
+            bd_basic_block = SyntheticBasicBlock(self, block_index, address, uuids[block_index], attributes)
+            bd_basic_block.set_adjacency(parents[block_index],
+                                         [uuids[successor] for successor in function.successors[block_index]])
+            self.bd_basic_blocks[bd_basic_block.uuid] = bd_basic_block
+            address += len(function.blocks[block_index]) * INSTRUCTION_SIZE
+
+
+def build_function_set(binary: SyntheticBinary) -> BDFunctionSet:
+    """
+    Create a stand-in BDFunction for every function in the binary, with the call graph adjacency set in bulk (as
+    BDFunctionSet.from_binary_view does). The stand-ins are consumed by the diffing flow, so a new set is built for
+    every diff.
+    """
+    salt = xxhash.xxh32(binary.name).intdigest()
+    uuids = [scatter_uuid(index, salt) for index in range(len(binary.functions))]
+
+    callees: List[List[int]] = [sorted({callee for calls in function.block_calls for callee in calls})
+                                for function in binary.functions]
+    callers: List[List[int]] = [list() for _ in binary.functions]
+    for index, function_callees in enumerate(callees):
+        for callee in function_callees:
+            callers[callee].append(uuids[index])
+
+    function_set = BDFunctionSet()
+    for index in range(len(binary.functions)):
+        bd_func = SyntheticFunction(binary, index, uuids[index])
+        bd_func.set_adjacency(callers[index], [uuids[callee] for callee in callees[index]])
+        function_set.add(bd_func)
+
+    return function_set
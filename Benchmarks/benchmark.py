@@ -0,0 +1,418 @@
+"""
+
+   Benchmark suite - diff synthetic binaries (see Benchmarks.SyntheticBinary) and measure the diffing flow.
+
+   usage: python -m NinjDiff.Benchmarks.benchmark [-h] [-n FUNCTIONS [FUNCTIONS ...]] [--rename-rate RATE]
+                                                  [--inline-rate RATE] [--reorder-rate RATE] [--seed SEED]
+                                                  [--repeat N] [--basic-block-sample N] [--no-memory]
+                                                  [--no-heuristics] [--results-dir DIR] [--baseline JSON]
+                                                  [--tolerance FRACTION]
+
+   For every function count, a source binary and a mutated target binary are generated and diffed:
+     - By the whole flow (AssemblyFunctionDiffManager) - reporting the throughput (functions \ basic blocks per second),
+       the peak memory (traced by tracemalloc, in a separate run) and the match quality (precision and recall against
+       the ground truth) of the function matching and the basic block matching.
+     - By every Property on its own (with all the Selectors) and every Selector on its own (with all the Properties) -
+       reporting the throughput and match quality of every heuristic. Basic block heuristics run on the basic blocks of
+       a sample of the truly matching function pairs.
+   The results are written to <results dir>/<timestamp>_<commit>.json, and compared with the latest earlier results
+   with the same parameters (or with --baseline). Throughput, peak memory or quality that got worse by more than the
+   tolerance is reported as a regression, and the exit code is 1.
+
+   The binaries are never analysed, but the binaryninja module still has to be importable, as the plugins import it.
+
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import *
+
+from .. import Configuration
+from ..Enums import bd_enums
+from ..FlowManagement.DiffManager import AssemblyFunctionDiffManager
+from ..FlowManagement.FlowManager import FlowManager
+from ..FlowManagement.FlowResults import FlowResults
+from ..Operands.Assembly.BDBasicBlock import BDBasicBlockSet
+from ..Operands.Assembly.BDFunction import BDFunctionSet
+from . import SyntheticBinary
+from .SyntheticBinary import SyntheticFunction
+
+PACKAGE_PATH: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Fixture(NamedTuple):
+    source: SyntheticBinary.SyntheticBinary
+    target: SyntheticBinary.SyntheticBinary
+
+
+def configure_plugin_paths():
+    """
+    Load the plugins from the Operation folder of this package, when the configured plugin folders don't exist (e.g
+    when the benchmark runs outside the Binary Ninja plugins folder).
+    """
+    operation_path = os.path.join(PACKAGE_PATH, 'Operation')
+    for path_name, plugin_folder in (('default_attributes_path', 'Attributes'), ('default_property_path', 'Properties'),
+                                     ('default_selector_path', 'Selectors')):
+        if not any(os.path.isdir(path) for path in getattr(Configuration, path_name)):
+            setattr(Configuration, path_name, [os.path.join(operation_path, plugin_folder, target_ir.value)
+                                               for target_ir in bd_enums.IRType])
+
+
+def get_commit() -> Tuple[Optional[str], bool]:
+    """
+    :return: The commit the package is checked out at, and whether the working tree has uncommitted changes.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PACKAGE_PATH, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=PACKAGE_PATH,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit, bool(status.strip())
+
+
+def create_fixture(function_count: int, rename_rate: float, inline_rate: float, reorder_rate: float,
+                   seed: int) -> Fixture:
+    source = SyntheticBinary.generate_binary('source', function_count, seed)
+    target = SyntheticBinary.mutate(source, 'target', rename_rate, inline_rate, reorder_rate, seed + 1)
+    return Fixture(source, target)
+
+
+def create_flow_manager(flow_result: FlowResults, property_name: Optional[str] = None,
+                        selector_name: Optional[str] = None) -> FlowManager:
+    """
+    :return: A FlowManager running only the given Property \ Selector (or all of them, if not given).
+    """
+    flow_manager = FlowManager(flow_result)
+    if property_name is not None:
+        flow_manager.properties = [current_property for current_property in flow_manager.properties
+                                   if current_property.property_name == property_name]
+    if selector_name is not None:
+        flow_manager.selectors = [current_selector for current_selector in flow_manager.selectors
+                                  if current_selector.selector_name == selector_name]
+    return flow_manager
+
+
+def get_heuristic_names(bd_set_type: Type) -> Tuple[List[str], List[str]]:
+    """
+    :return: The names of the Properties and Selectors the flow runs on sets of the given type.
+    """
+    flow_manager = FlowManager(FlowResults(bd_set_type(), bd_set_type()))
+    return ([current_property.property_name for current_property in flow_manager.properties],
+            [current_selector.selector_name for current_selector in flow_manager.selectors])
+
+
+def score(matched_bd_objects: List[List], possible_count: int) -> Dict:
+    """
+    Score matches of stand-in objects against the ground truth - a match is correct if both objects originated from
+    the same source object.
+    """
+    correct_count = sum(1 for match in matched_bd_objects
+                        if match[1].origin is not None and match[1].origin == match[2].origin)
+    return {
+        'matches': len(matched_bd_objects),
+        'correct_matches': correct_count,
+        'precision': correct_count / len(matched_bd_objects) if matched_bd_objects else 0.0,
+        'recall': correct_count / possible_count if possible_count else 0.0
+    }
+
+
+def matchable_basic_block_count(source_function: SyntheticFunction, target_function: SyntheticFunction) -> int:
+    """
+    :return: The amount of basic blocks of the source function that still exist in the target function.
+    """
+    target_origins = set(target_function.resolve_underlying_obj().block_origins)
+    return sum(1 for origin in source_function.resolve_underlying_obj().block_origins if origin in target_origins)
+
+
+def diff_basic_blocks(function_pairs: List[Tuple[SyntheticFunction, SyntheticFunction]],
+                      property_name: Optional[str] = None, selector_name: Optional[str] = None) -> Dict:
+    """
+    Match the basic blocks of every function pair, each pair by its own flow (as AssemblyFunctionDiffManager does).
+    """
+    matched_bd_objects: List[List] = list()
+    possible_count = 0
+    seconds = 0.0
+    for source_function, target_function in function_pairs:
+        source_function.populate_basic_blocks()
+        target_function.populate_basic_blocks()
+        source_bb_set = BDBasicBlockSet()
+        for bd_basic_block in source_function.bd_basic_blocks.values():
+            source_bb_set.add(bd_basic_block)
+        target_bb_set = BDBasicBlockSet()
+        for bd_basic_block in target_function.bd_basic_blocks.values():
+            target_bb_set.add(bd_basic_block)
+        possible_count += matchable_basic_block_count(source_function, target_function)
+
+        start_time = time.perf_counter()
+        flow_result = create_flow_manager(FlowResults(source_bb_set, target_bb_set), property_name,
+                                          selector_name).run_diff_flow()
+        seconds += time.perf_counter() - start_time
+        matched_bd_objects.extend(flow_result.matched_bd_objects)
+
+    basic_block_count = sum(len(source_function.bd_basic_blocks) for source_function, _ in function_pairs)
+    results = score(matched_bd_objects, possible_count)
+    results.update({'seconds': seconds, 'basic_blocks_per_second': basic_block_count / seconds if seconds else 0.0})
+    return results
+
+
+def diff_functions(fixture: Fixture, property_name: Optional[str] = None, selector_name: Optional[str] = None) -> Dict:
+    source_set = SyntheticBinary.build_function_set(fixture.source)
+    target_set = SyntheticBinary.build_function_set(fixture.target)
+
+    start_time = time.perf_counter()
+    flow_result = create_flow_manager(FlowResults(source_set, target_set), property_name,
+                                      selector_name).run_diff_flow()
+    seconds = time.perf_counter() - start_time
+
+    function_count = len(fixture.source.functions)
+    results = score(flow_result.matched_bd_objects, function_count)
+    results.update({'seconds': seconds, 'functions_per_second': function_count / seconds if seconds else 0.0})
+    return results
+
+
+def benchmark_flow(fixture: Fixture, repeat: int, measure_memory: bool) -> Dict:
+    """
+    Diff the fixture with the whole flow. The fastest of the repeated runs is reported.
+    """
+    results: Dict = dict()
+    for _ in range(max(repeat, 1)):
+        diff_manager = AssemblyFunctionDiffManager(SyntheticBinary.build_function_set(fixture.source),
+                                                   SyntheticBinary.build_function_set(fixture.target))
+        diff_manager.diff_functions()
+        function_seconds = diff_manager.phase_timings['function_matching']
+        if results and results['function_matching']['seconds'] <= function_seconds:
+            continue
+
+        function_matches = diff_manager.flow_result.matched_bd_objects
+        function_count = len(fixture.source.functions)
+        function_results = score(function_matches, function_count)
+        function_results.update({'seconds': function_seconds,
+                                 'functions_per_second': function_count / function_seconds
+                                 if function_seconds else 0.0})
+
+        # The basic blocks of the matched functions are matched, so the basic block recall is only counted over them.
+        basic_block_matches: List[List] = list()
+        possible_count = 0
+        basic_block_count = 0
+        for match in function_matches:
+            if len(match) > 3:
+                basic_block_matches.extend(match[3].matched_bd_objects)
+            basic_block_count += len(match[1].bd_basic_blocks)
+            if match[1].origin == match[2].origin:
+                possible_count += matchable_basic_block_count(match[1], match[2])
+        basic_block_seconds = diff_manager.phase_timings['basic_block_matching']
+        basic_block_results = score(basic_block_matches, possible_count)
+        basic_block_results.update({'seconds': basic_block_seconds,
+                                    'basic_blocks_per_second': basic_block_count / basic_block_seconds
+                                    if basic_block_seconds else 0.0})
+
+        results = {'function_matching': function_results, 'basic_block_matching': basic_block_results,
+                   'propagation_rounds': diff_manager.flow_result.propagation_rounds}
+
+    if measure_memory:
+        source_set = SyntheticBinary.build_function_set(fixture.source)
+        target_set = SyntheticBinary.build_function_set(fixture.target)
+        tracemalloc.start()
+        try:
+            AssemblyFunctionDiffManager(source_set, target_set).diff_functions()
+            results['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return results
+
+
+def benchmark_heuristics(fixture: Fixture, basic_block_sample: int, seed: int) -> Dict:
+    """
+    Diff the fixture with every Property and every Selector on its own.
+    """
+    function_properties, function_selectors = get_heuristic_names(BDFunctionSet)
+    results: Dict = {'function_properties': {name: diff_functions(fixture, property_name=name)
+                                             for name in function_properties},
+                     'function_selectors': {name: diff_functions(fixture, selector_name=name)
+                                            for name in function_selectors}}
+
+    source_set = SyntheticBinary.build_function_set(fixture.source)
+    target_functions = {bd_func.index: bd_func for bd_func in SyntheticBinary.build_function_set(fixture.target)}
+    function_pairs = [(bd_func, target_functions[bd_func.index]) for bd_func in source_set]
+    function_pairs.sort(key=lambda function_pair: function_pair[0].index)
+    if len(function_pairs) > basic_block_sample:
+        function_pairs = random.Random(seed).sample(function_pairs, basic_block_sample)
+
+    basic_block_properties, basic_block_selectors = get_heuristic_names(BDBasicBlockSet)
+    results.update({'basic_block_properties': {name: diff_basic_blocks(function_pairs, property_name=name)
+                                               for name in basic_block_properties},
+                    'basic_block_selectors': {name: diff_basic_blocks(function_pairs, selector_name=name)
+                                              for name in basic_block_selectors}})
+    return results
+
+
+def collect_metrics(run: Dict) -> Dict[str, Tuple[float, bool]]:
+    """
+    :return: {metric name: (value, True if higher values are better)} of a single function count run.
+    """
+    metrics: Dict[str, Tuple[float, bool]] = dict()
+    heuristic_groups = [(phase, {'flow': run['flow'][phase]})
+                        for phase in ('function_matching', 'basic_block_matching')]
+    heuristic_groups.extend(run.get('heuristics', dict()).items())
+    for group_name, group in heuristic_groups:
+        for heuristic_name, heuristic_results in group.items():
+            for metric_name in ('functions_per_second', 'basic_blocks_per_second', 'precision', 'recall'):
+                if metric_name in heuristic_results:
+                    metrics[f'{group_name}.{heuristic_name}.{metric_name}'] = (heuristic_results[metric_name], True)
+    if 'peak_memory' in run['flow']:
+        metrics['flow.peak_memory'] = (run['flow']['peak_memory'], False)
+    return metrics
+
+
+def compare_results(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    :return: A description of every metric that got worse by more than the tolerance (relative to the baseline).
+    """
+    regressions: List[str] = list()
+    baseline_runs = {run['function_count']: run for run in baseline['runs']}
+    for run in results['runs']:
+        baseline_run = baseline_runs.get(run['function_count'])
+        if baseline_run is None:
+            continue
+        baseline_metrics = collect_metrics(baseline_run)
+        for metric_name, (value, higher_is_better) in collect_metrics(run).items():
+            if metric_name not in baseline_metrics:
+                continue
+            baseline_value = baseline_metrics[metric_name][0]
+            change = (value - baseline_value) / baseline_value if baseline_value else 0.0
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f'{run["function_count"]} functions {metric_name}: {baseline_value:.4g} -> '
+                                   f'{value:.4g} ({change:+.1%})')
+    return regressions
+
+
+def find_baseline(results_dir: str, parameters: Dict, exclude_path: str) -> Optional[str]:
+    """
+    :return: The path of the latest results file in the directory with the same parameters.
+    """
+    if not os.path.isdir(results_dir):
+        return None
+    # Results files are named by their timestamp, so they sort by time.
+    for file_name in sorted(os.listdir(results_dir), reverse=True):
+        path = os.path.join(results_dir, file_name)
+        if not file_name.endswith('.json') or path == exclude_path:
+            continue
+        try:
+            with open(path) as results_file:
+                if json.load(results_file).get('parameters') == parameters:
+                    return path
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+def run_benchmarks(function_counts: List[int], rename_rate: float = 0.1, inline_rate: float = 0.1,
+                   reorder_rate: float = 0.1, seed: int = 0, repeat: int = 1, basic_block_sample: int = 1000,
+                   measure_memory: bool = True, run_heuristics: bool = True) -> Dict:
+    parameters = {'function_counts': function_counts, 'rename_rate': rename_rate, 'inline_rate': inline_rate,
+                  'reorder_rate': reorder_rate, 'seed': seed, 'basic_block_sample': basic_block_sample,
+                  'heuristics': run_heuristics}
+    commit, dirty = get_commit()
+    results: Dict = {'commit': commit, 'dirty': dirty, 'timestamp': datetime.datetime.now().isoformat(),
+                     'python': platform.python_version(), 'platform': platform.platform(), 'parameters': parameters,
+                     'runs': list()}
+
+    for function_count in function_counts:
+        start_time = time.perf_counter()
+        fixture = create_fixture(function_count, rename_rate, inline_rate, reorder_rate, seed)
+        run: Dict = {'function_count': function_count,
+                     'basic_block_count': fixture.source.basic_block_count(),
+                     'fixture_seconds': time.perf_counter() - start_time,
+                     'flow': benchmark_flow(fixture, repeat, measure_memory)}
+        if run_heuristics:
+            run['heuristics'] = benchmark_heuristics(fixture, basic_block_sample, seed)
+        results['runs'].append(run)
+
+    return results
+
+
+def print_results(results: Dict):
+    for run in results['runs']:
+        print(f'{run["function_count"]} functions, {run["basic_block_count"]} basic blocks '
+              f'(generated in {run["fixture_seconds"]:.2f} seconds)')
+        flow = run['flow']
+        if 'peak_memory' in flow:
+            print(f'  peak memory: {flow["peak_memory"] / (1024 * 1024):.1f} MiB')
+        rows = [('flow', 'function_matching', flow['function_matching']),
+                ('flow', 'basic_block_matching', flow['basic_block_matching'])]
+        for group_name, group in run.get('heuristics', dict()).items():
+            rows.extend((group_name, heuristic_name, heuristic_results)
+                        for heuristic_name, heuristic_results in group.items())
+        for group_name, heuristic_name, heuristic_results in rows:
+            throughput = heuristic_results.get('functions_per_second', heuristic_results.get('basic_blocks_per_second'))
+            print(f'  {group_name + "." + heuristic_name:<60} {throughput:>12.1f}/s '
+                  f'{heuristic_results["matches"]:>8} matches  precision {heuristic_results["precision"]:.3f}  '
+                  f'recall {heuristic_results["recall"]:.3f}')
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='NinjDiff benchmark', description='Benchmark the diffing flow on synthetic '
+                                                                            'binaries.')
+    parser.add_argument('-n', '--functions', type=int, nargs='+', default=[1000, 10000],
+                        help='Amount of functions in the generated binaries, a benchmark runs for every amount')
+    parser.add_argument('--rename-rate', type=float, default=0.1, help='Probability of a function to be renamed')
+    parser.add_argument('--inline-rate', type=float, default=0.1,
+                        help='Probability of each call to a small function to be inlined')
+    parser.add_argument('--reorder-rate', type=float, default=0.1,
+                        help='Probability of a function to have its basic blocks reordered')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the generated binaries')
+    parser.add_argument('--repeat', type=int, default=1, help='Amount of times the whole flow is timed')
+    parser.add_argument('--basic-block-sample', type=int, default=1000,
+                        help='Amount of function pairs the basic block heuristics are benchmarked on')
+    parser.add_argument('--no-memory', action='store_true', help='Don\'t measure the peak memory')
+    parser.add_argument('--no-heuristics', action='store_true', help='Don\'t benchmark every heuristic on its own')
+    parser.add_argument('--results-dir', default='benchmark_results', help='Directory the results are written to')
+    parser.add_argument('--baseline', help='Results file to compare with, instead of the latest one with the same '
+                                           'parameters')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Relative change of a metric for the worse that is reported as a regression')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arguments = parse_arguments(argv)
+    configure_plugin_paths()
+
+    results = run_benchmarks(arguments.functions, arguments.rename_rate, arguments.inline_rate,
+                             arguments.reorder_rate, arguments.seed, arguments.repeat, arguments.basic_block_sample,
+                             not arguments.no_memory, not arguments.no_heuristics)
+    print_results(results)
+
+    os.makedirs(arguments.results_dir, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    results_path = os.path.join(arguments.results_dir, f'{timestamp}_{(results["commit"] or "unknown")[:12]}.json')
+    with open(results_path, 'w') as results_file:
+        json.dump(results, results_file, indent=4)
+    print(f'Results written to {results_path}')
+
+    baseline_path = arguments.baseline or find_baseline(arguments.results_dir, results['parameters'], results_path)
+    if baseline_path is None:
+        print('No earlier results with the same parameters to compare with.')
+        return 0
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare_results(results, baseline, arguments.tolerance)
+    print(f'Compared with {baseline_path} (commit {baseline.get("commit")}): {len(regressions)} regressions.')
+    for regression in regressions:
+        print(f'  {regression}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,5 @@
+import os
+
 from .Enums import bd_enums
 
 user1 = 'user'
@@ -7,6 +9,20 @@ current_user = user2
 # Application paths
 operation_folder_path = f'C:\\Users\\{current_user}\\AppData\\Roaming\\Binary Ninja\\plugins\\NinjDiff\\Operation\\'
 debug_file_path = f'C:\\Users\\{current_user}\\AppData\\Roaming\\Binary Ninja\\plugins\\NinjDiff\\debug_log.log'
+# Directory of the plugin (the directory of this file), wherever Binary Ninja loaded it from.
+plugin_folder_path = os.path.dirname(os.path.abspath(__file__))
+# Per-user data directory - %APPDATA% on Windows, $XDG_DATA_HOME (or ~/.local/share) elsewhere.
+user_data_folder_path = os.path.join(os.environ.get('APPDATA') or os.environ.get('XDG_DATA_HOME') or
+                                     os.path.join(os.path.expanduser('~'), '.local', 'share'), 'NinjDiff')
+# The mnemonic prime tables are shared by all binaries (see Utility.PrimeTable), so they are kept in the user data
+# directory rather than in the (possibly read-only) plugin directory.
+prime_table_path = os.path.join(user_data_folder_path, 'PrimeTables')
+# Per-user cache directory - %LOCALAPPDATA% on Windows, $XDG_CACHE_HOME (or ~/.cache) elsewhere.
+user_cache_folder_path = os.path.join(os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or
+                                      os.path.join(os.path.expanduser('~'), '.cache'), 'NinjDiff')
+# The attribute cache is shared by all binaries (see DataManagement.AttributeCache), so it is kept in the user cache
+# directory. Can be overridden by the cli and batch drivers (--attribute-cache).
+attribute_cache_path = os.path.join(user_cache_folder_path, 'attribute_cache.sqlite')
 
 default_selector_path = [(operation_folder_path + 'Selectors\\' + target_ir.name) for target_ir in bd_enums.IRType]
 default_property_path = [(operation_folder_path + 'Properties\\' + target_ir.name) for target_ir in bd_enums.IRType]
@@ -18,11 +34,55 @@ current_neo4j_db = Neo4j_db_path + f'database-c0f63cf2-4cb9-4d7d-af51-a35c6f5542
 neo4j_uri = "bolt://localhost:7687"
 neo4j_username = "neo4j"
 neo4j_password = "user"
+# Amount of rows (nodes and attribute links) written to the DB in a single batch transaction
+NEO4J_BATCH_SIZE: int = 5000
 
 # Minimum amount of assembly instructions in order to be considered for matching
 MIN_FUNCTION_INSTRUCTION_LENGTH: int = 4
 MIN_BASIC_BLOCK_INSTRUCTION_LENGTH: int = 2
 
+# Attribute extraction concurrency
+# Amount of threads extracting function attributes in parallel (Binary Ninja API calls mostly release the GIL).
+EXTRACTION_THREAD_COUNT: int = 8
+# Amount of processes used to calculate the values of offloadable attributes (e.g MD-Index) from the features gathered
+# by the extraction threads. 0 disables the process pool, and the values are calculated on the extraction threads.
+EXTRACTION_PROCESS_COUNT: int = 0
+# Amount of functions whose offloadable attribute values are calculated together, in a single vectorised batch.
+EXTRACTION_BATCH_SIZE: int = 256
+
+# File hashing
+# Amount of bytes hashed at a time when calculating the hash (uuid) of a binary.
+FILE_HASH_CHUNK_SIZE: int = 16 * 1024 * 1024
+# Hash the file on disk (using mmap) instead of the contents of the binary view, when the binary view was opened from
+# a raw file (and not a .bndb). The two hashes differ, so this should not be changed for an existing DB or cache.
+FILE_HASH_FROM_DISK: bool = False
+
+# Attribute cache
+# Cache extracted attribute values on disk (see DataManagement.AttributeCache), so binaries that were already
+# extracted are not extracted again.
+ATTRIBUTE_CACHE_ENABLED: bool = True
+# Maximum size (in bytes) of the cached values, the least recently used binaries are evicted above it.
+ATTRIBUTE_CACHE_MAX_SIZE: int = 1024 * 1024 * 1024
+
+# Logging (see Utility.Log)
+# Messages below this level are discarded before they are formatted (0 - debug, 1 - info, 2 - warning, 3 - error).
+LOG_LEVEL: int = 1
+# Messages logged per object (e.g per match) on hot paths are only logged once every LOG_SAMPLE_RATE messages.
+LOG_SAMPLE_RATE: int = 100
+
+# Instrumentation
+# Record the time spent in every Property, Selector, attribute extraction and propagation round, as well as candidate
+# set sizes and match counts (see Utility.Instrumentation).
+INSTRUMENTATION_ENABLED: bool = False
+
+# Batch diffing (see batch.py)
+# Amount of worker processes diffing binary pairs in parallel.
+BATCH_PROCESS_COUNT: int = 4
+# Amount of diffs a worker process runs before it is replaced by a new one, releasing the memory of its BinaryViews.
+BATCH_DIFFS_PER_PROCESS: int = 4
+# Maximum address space (in bytes) of each worker process, 0 for no limit. Only enforced on POSIX systems.
+BATCH_MAX_PROCESS_MEMORY: int = 16 * 1024 * 1024 * 1024
+
 # Thresholds
 
 # Neo4j supports JAVA long values, don't use any integers over this value
@@ -0,0 +1,190 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import *
+
+from binaryninja import *
+
+from .. import Configuration
+from ..Abstracts.BDObject import BDObject
+from ..Utility import Log
+
+
+class AttributeCache:
+    """
+    Local content-addressed cache of extracted attribute values, stored in an SQLite file.
+
+    Attribute values are stored per binary (under the hash of the file contents, see DBManager.calc_bv_uuid), per
+    BDObject and per attribute, together with the version of the attribute that extracted them. A cached value is only
+    loaded if its version matches the version of the loaded attribute, so bumping Attribute.version invalidates it.
+
+    The hash of the binary already pins its contents, so within a binary BDObjects are keyed on their IR, type and
+    address (see BDObject.get_cache_address), which are known without going through Binary Ninja - and not on their
+    uuid, which depends on the path of the binary, so a binary that was moved or copied still hits the cache.
+    The values of a binary are dropped when it is used with a different Binary Ninja version than the one that
+    extracted them. The key doesn't cover all of the analysis state an attribute may depend on: e.g renaming a function,
+    or changing the types or string analysis of the binary, doesn't change the key of the objects affected by it. Their
+    cached values are stale until the binary is evicted, or the version of the affected attributes is bumped.
+
+    The cache is shared by all binaries. Once it grows over its maximum size, the values of the least recently used
+    binaries are evicted.
+    """
+
+    # Bumped whenever the layout of the tables or of the keys changes, caches of other versions are dropped.
+    schema_version: int = 3
+
+    def __init__(self, path: Optional[str] = None, max_size: int = Configuration.ATTRIBUTE_CACHE_MAX_SIZE):
+        """
+        :param path: Path of the SQLite cache file, it is created if it doesn't exist.
+                     Configuration.attribute_cache_path if None.
+        :param max_size: Maximum total size (in bytes) of the cached values.
+        """
+        path = path or Configuration.attribute_cache_path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.max_size: int = max_size
+        # The cache is used by the extraction threads, all access to the connection is serialized by the lock.
+        self.lock: threading.Lock = threading.Lock()
+        # The cache file may be shared by several processes (e.g batch workers), which wait for each other's writes.
+        self.connection: sqlite3.Connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != self.schema_version:
+            self.connection.executescript('DROP TABLE IF EXISTS attributes;'
+                                          'DROP TABLE IF EXISTS binaries;'
+                                          f'PRAGMA user_version = {self.schema_version};')
+        self.connection.executescript(
+            'CREATE TABLE IF NOT EXISTS binaries ('
+            '   file_hash INTEGER PRIMARY KEY,'
+            '   analysis_version TEXT NOT NULL,'
+            '   last_used REAL NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS attributes ('
+            '   file_hash INTEGER NOT NULL,'
+            '   ir_type TEXT NOT NULL,'
+            '   object_type TEXT NOT NULL,'
+            '   function_address INTEGER NOT NULL,'
+            '   object_address INTEGER NOT NULL,'
+            '   attr_name TEXT NOT NULL,'
+            '   attr_version INTEGER NOT NULL,'
+            '   attr_value TEXT NOT NULL,'
+            '   PRIMARY KEY (file_hash, ir_type, object_type, function_address, object_address, attr_name));'
+        )
+        self.connection.commit()
+
+        self.analysis_version: str = core_version()
+
+    def touch(self, file_hash: int):
+        """
+        Mark the binary as the most recently used one, and drop its values if they were extracted by a different Binary
+        Ninja version.
+        """
+        with self.lock:
+            row = self.connection.execute('SELECT analysis_version FROM binaries WHERE file_hash = ?',
+                                          (file_hash,)).fetchone()
+            if row and row[0] != self.analysis_version:
+                self.connection.execute('DELETE FROM attributes WHERE file_hash = ?', (file_hash,))
+            self.connection.execute('INSERT OR REPLACE INTO binaries (file_hash, analysis_version, last_used) '
+                                    'VALUES (?, ?, ?)', (file_hash, self.analysis_version, time.time()))
+            # Don't hold the write lock of the file until the next flush.
+            self.connection.commit()
+
+    @staticmethod
+    def get_object_key(file_hash: int, bd_object: BDObject) -> Tuple[int, str, str, int, int]:
+        """
+        :return: The cache key of the BDObject - (file hash, IR, type, function address, object address).
+        """
+        return (file_hash, bd_object.bd_obj_IR.name, bd_object.bd_obj_type.name, *bd_object.get_cache_address())
+
+    def load(self, file_hash: int, bd_object: BDObject, attribute_versions: Dict[str, int]) -> List[str]:
+        """
+        Load the cached attribute values of the BDObject into it.
+        :param attribute_versions: The current version of each attribute, {attribute name: version}.
+        :return: The names of the loaded attributes.
+        """
+        object_key = self.get_object_key(file_hash, bd_object)
+        with self.lock:
+            rows = self.connection.execute('SELECT attr_name, attr_version, attr_value FROM attributes '
+                                           'WHERE file_hash = ? AND ir_type = ? AND object_type = ? AND '
+                                           'function_address = ? AND object_address = ?', object_key).fetchall()
+
+        loaded_attributes: List[str] = list()
+        for attr_name, attr_version, attr_value in rows:
+            if attribute_versions.get(attr_name) == attr_version and not bd_object.get_attribute_value(attr_name):
+                bd_object.add_attribute_value(attr_name, json.loads(attr_value))
+                loaded_attributes.append(attr_name)
+
+        return loaded_attributes
+
+    def store(self, file_hash: int, bd_object: BDObject, attribute_versions: Dict[str, int],
+              exclude: Iterable[str] = (), include: Optional[Iterable[str]] = None):
+        """
+        Store the attribute values of the BDObject, replacing any previously cached values.
+        :param exclude: Names of attributes not to store (e.g attributes whose values were loaded from the cache).
+        :param include: Names of the attributes to store, all attributes are stored if None.
+        """
+        exclude = set(exclude)
+        include = set(include) if include is not None else None
+        object_key = self.get_object_key(file_hash, bd_object)
+        rows = [(*object_key, attr_name, attribute_versions[attr_name], json.dumps(attr_value))
+                for attr_name, attr_value in bd_object.get_all_attribute_values().items()
+                if attr_name in attribute_versions and attr_name not in exclude and
+                (include is None or attr_name in include)]
+        if not rows:
+            return
+
+        with self.lock:
+            self.connection.executemany('INSERT OR REPLACE INTO attributes (file_hash, ir_type, object_type, '
+                                        'function_address, object_address, attr_name, attr_version, attr_value) '
+                                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def flush(self):
+        """
+        Commit the stored values, and evict the least recently used binaries if the cache is over its maximum size.
+        """
+        with self.lock:
+            binary_sizes: List[Tuple[int, int]] = self.connection.execute(
+                'SELECT binaries.file_hash, COALESCE(SUM(LENGTH(attributes.attr_value)), 0) FROM binaries '
+                'LEFT JOIN attributes ON attributes.file_hash = binaries.file_hash '
+                'GROUP BY binaries.file_hash ORDER BY binaries.last_used ASC').fetchall()
+
+            cache_size = sum(binary_size for _, binary_size in binary_sizes)
+            # Never evict the most recently used binary
+            for file_hash, binary_size in binary_sizes[:-1]:
+                if cache_size <= self.max_size:
+                    break
+                self.connection.execute('DELETE FROM attributes WHERE file_hash = ?', (file_hash,))
+                self.connection.execute('DELETE FROM binaries WHERE file_hash = ?', (file_hash,))
+                cache_size -= binary_size
+                Log.log_info('AttributeCache: Evicted the attributes of binary %d (%d bytes).', file_hash, binary_size)
+
+            self.connection.commit()
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+
+class BinaryAttributeCache:
+    """
+    The attribute cache of a single binary, for flows that load the cached values of their BDObjects before using them,
+    and store all the values extracted while using them afterwards (see AssemblyFunctionDiffManager).
+    """
+
+    def __init__(self, attribute_cache: AttributeCache, file_hash: int, attribute_versions: Dict[str, int]):
+        """
+        :param file_hash: The hash of the binary (see Utility.BinaryHash).
+        :param attribute_versions: The current version of each attribute, {attribute name: version}.
+        """
+        self.attribute_cache: AttributeCache = attribute_cache
+        self.file_hash: int = file_hash
+        self.attribute_versions: Dict[str, int] = attribute_versions
+        # {(object type, BDObject uuid): names of the attributes loaded from the cache}, which need not be stored again.
+        self.loaded_attributes: Dict[Tuple[str, int], List[str]] = dict()
+        self.attribute_cache.touch(file_hash)
+
+    def load(self, bd_object: BDObject):
+        self.loaded_attributes[(bd_object.bd_obj_type.name, bd_object.uuid)] = \
+            self.attribute_cache.load(self.file_hash, bd_object, self.attribute_versions)
+
+    def store(self, bd_object: BDObject):
+        self.attribute_cache.store(self.file_hash, bd_object, self.attribute_versions,
+                                   exclude=self.loaded_attributes.get((bd_object.bd_obj_type.name, bd_object.uuid), ()))
@@ -0,0 +1,147 @@
+import time
+from typing import *
+
+from binaryninja import *
+from neo4j import Driver, Transaction
+
+from ... import Configuration
+from ...Operands.Assembly.BDBasicBlock import BDBasicBlock
+from ...Operands.Assembly.BDFunction import BDFunction
+from ...Utility import Log
+
+
+class Neo4jBatchWriter:
+    """
+    Bulk ingestion path for BDFunctions and their BDBasicBlocks.
+    Nodes and attribute rows are accumulated in memory, and written with parameterised UNWIND statements once
+    Configuration.NEO4J_BATCH_SIZE rows are pending - one transaction per batch, instead of several sessions and round
+    trips per node.
+    The graph created is identical to the one created by DBManager.insert_func_into_db.
+    """
+
+    # Labels can not be parameterised, so each node label gets its own statements.
+    # Nodes are merged rather than created, so a uuid that is already in the DB (a uuid collision, or a node written by
+    # a concurrent run) doesn't violate the uuid uniqueness constraint and abort the whole batch.
+    create_nodes_statements: Dict[str, str] = {
+        label: f'UNWIND $rows AS row '
+               f'MERGE (:{label} {{uuid: row.uuid}})'
+        for label in ('Function', 'BasicBlock')
+    }
+    link_attributes_statements: Dict[str, str] = {
+        label: f'UNWIND $rows AS row '
+               f'MATCH (origin:{label} {{uuid: row.origin_uuid}}) '
+               f'CALL apoc.merge.node([row.attr_name], row.ident_features, row.attr_features) YIELD node '
+               f'CREATE (origin)-[:Attribute]->(node)'
+        for label in ('Function', 'BasicBlock')
+    }
+
+    def __init__(self, driver: Driver, batch_size: int = Configuration.NEO4J_BATCH_SIZE):
+        self.driver: Driver = driver
+        self.batch_size: int = batch_size
+
+        # Rows waiting to be written, per node label.
+        self.node_rows: Dict[str, List[Dict]] = {label: list() for label in self.create_nodes_statements}
+        self.attribute_rows: Dict[str, List[Dict]] = {label: list() for label in self.link_attributes_statements}
+        self.pending_row_count: int = 0
+
+        # Statistics
+        self.nodes_written: int = 0
+        self.attribute_links_written: int = 0
+        self.batch_latencies: List[float] = list()
+
+    def add_function(self, bd_func: BDFunction, existing_bb_uuids: Collection[int] = ()):
+        """
+        Queue a BDFunction, including all its BDBasicBlock objects and associated attributes, for insertion.
+        A batch is written once enough rows are pending.
+        :param existing_bb_uuids: uuids of basic blocks that are already stored in the DB, and are not inserted again.
+        """
+        self._add_node('Function', bd_func.uuid, bd_func.get_all_attribute_values())
+        for bb_uuid, bd_basic_block in bd_func.bd_basic_blocks.items():
+            bd_basic_block: BDBasicBlock
+            if bb_uuid in existing_bb_uuids:
+                continue
+            self._add_node('BasicBlock', bd_basic_block.uuid, bd_basic_block.get_all_attribute_values())
+
+        if self.pending_row_count >= self.batch_size:
+            self.flush()
+
+    def _add_node(self, label: str, uuid: int, attributes: Dict):
+        self.node_rows[label].append({'uuid': uuid})
+        for attr_name, attr_features in attributes.items():
+            self.attribute_rows[label].append(self.create_attribute_row(uuid, attr_name, attr_features))
+        self.pending_row_count += 1 + len(attributes)
+
+    @staticmethod
+    def create_attribute_row(origin_uuid: int, attr_name: str, attr_features: Dict) -> Dict:
+        """
+        Create the parameters used to merge the attribute node and link it to its origin node - The attribute node is
+        identified by the attribute uuid if it has one, or by all of its features otherwise (see
+        DBManager.link_attribute).
+        """
+        attr_features = dict(attr_features)
+        attribute_uuid = attr_features.pop('uuid', None)
+
+        if attribute_uuid:
+            ident_features = {'uuid': attribute_uuid}
+        else:
+            ident_features = attr_features
+
+        return {'origin_uuid': origin_uuid,
+                'attr_name': attr_name,
+                'ident_features': ident_features,
+                'attr_features': attr_features}
+
+    def flush(self):
+        """
+        Write all pending rows in a single transaction.
+        """
+        if not self.pending_row_count:
+            return
+
+        node_count = sum(len(rows) for rows in self.node_rows.values())
+        attribute_count = sum(len(rows) for rows in self.attribute_rows.values())
+
+        start_time = time.perf_counter()
+        with self.driver.session() as session:
+            session.write_transaction(self._write_batch, self.node_rows, self.attribute_rows)
+        batch_latency = time.perf_counter() - start_time
+
+        self.batch_latencies.append(batch_latency)
+        self.nodes_written += node_count
+        self.attribute_links_written += attribute_count
+        Log.log_info('Neo4jBatchWriter: Wrote %d nodes and %d attribute links in %.3f seconds (%.1f nodes/sec).',
+                     node_count, attribute_count, batch_latency, node_count / batch_latency)
+
+        for rows in self.node_rows.values():
+            rows.clear()
+        for rows in self.attribute_rows.values():
+            rows.clear()
+        self.pending_row_count = 0
+
+    def _write_batch(self, tx: Transaction, node_rows: Dict[str, List[Dict]], attribute_rows: Dict[str, List[Dict]]):
+        # Nodes must be created before the attributes are linked to them.
+        for label, rows in node_rows.items():
+            if rows:
+                tx.run(self.create_nodes_statements[label], rows=rows)
+        for label, rows in attribute_rows.items():
+            if rows:
+                tx.run(self.link_attributes_statements[label], rows=rows)
+
+    def get_statistics(self) -> Dict:
+        total_write_time = sum(self.batch_latencies)
+        return {
+            'batches': len(self.batch_latencies),
+            'nodes_written': self.nodes_written,
+            'attribute_links_written': self.attribute_links_written,
+            'total_write_time': total_write_time,
+            'nodes_per_second': self.nodes_written / total_write_time if total_write_time else 0,
+            'max_batch_latency': max(self.batch_latencies, default=0),
+            'average_batch_latency': total_write_time / len(self.batch_latencies) if self.batch_latencies else 0,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.flush()
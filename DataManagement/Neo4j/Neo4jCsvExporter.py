@@ -0,0 +1,147 @@
+import csv
+import os
+from typing import *
+
+from ...Abstracts.Attribute import Attribute
+from ...Operands.Assembly.BDBasicBlock import BDBasicBlock
+from ...Operands.Assembly.BDFunction import BDFunction
+
+
+class Neo4jCsvExporter:
+    """
+    Offline bulk-import path - streams FunctionCollection, Function, BasicBlock and attribute nodes, and the Attribute
+    relationships, to CSV files in the layout expected by `neo4j-admin import`, without talking to the DB.
+
+    The graph described by the files is identical to the one created by DBManager.insert_func_into_db:
+        * Every node label gets its own ID space, and the node uuid is stored as a long property.
+        * Function and BasicBlock nodes are de-duplicated by their uuid (the DB path merges them the same way), as
+          `neo4j-admin import` fails on duplicate IDs. The attributes of every duplicate are still linked to the node.
+        * Attribute nodes are de-duplicated by their attribute uuid, or by all of their features if they have no uuid
+          (the same identity apoc.merge.node uses in DBManager.link_attribute).
+        * Attribute nodes of the same attribute may have different properties (e.g FunctionCallSiteTargets), so each
+          distinct set of properties is written to its own file with its own header.
+
+    Use import_arguments() to get the matching `neo4j-admin import` command line arguments.
+    Strings may contain new lines, so the import should run with --multiline-fields=true.
+    """
+
+    array_delimiter: str = ';'
+
+    # The neo4j-admin import type of each python type, bool must come before int as it is a subclass of it.
+    csv_types: List[Tuple[type, str]] = [(bool, 'boolean'), (int, 'long'), (float, 'double'), (str, 'string')]
+
+    def __init__(self, output_dir: str):
+        self.output_dir: str = output_dir
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # {file name: (file object, csv writer)}
+        self.node_files: Dict[str, Tuple[IO, Any]] = dict()
+        self.relationship_files: Dict[str, Tuple[IO, Any]] = dict()
+        # Attribute node files, {(attribute name, header): file name}
+        self.attribute_file_names: Dict[Tuple[str, Tuple[str, ...]], str] = dict()
+        # IDs of all the attribute nodes written so far, used to de-duplicate them.
+        self.exported_attribute_ids: Set[str] = set()
+        # uuids of all the Function and BasicBlock nodes written so far, per label, used to de-duplicate them.
+        self.exported_node_uuids: Dict[str, Set[int]] = dict()
+
+    def add_function_collection(self, uuid: int, filename: str, arch: str):
+        self._get_writer(self.node_files, 'FunctionCollection.csv',
+                         [':ID(FunctionCollection)', 'uuid:long', 'filename', 'arch', ':LABEL']) \
+            .writerow([uuid, uuid, filename, arch, 'FunctionCollection'])
+
+    def add_function(self, bd_func: BDFunction):
+        """
+        Export a BDFunction, including all its BDBasicBlock objects and associated attributes.
+        """
+        self._add_node('Function', bd_func.uuid, bd_func.get_all_attribute_values())
+        for bd_basic_block in bd_func.bd_basic_blocks.values():
+            bd_basic_block: BDBasicBlock
+            self._add_node('BasicBlock', bd_basic_block.uuid, bd_basic_block.get_all_attribute_values())
+
+    def _add_node(self, label: str, uuid: int, attributes: Dict):
+        exported_node_uuids = self.exported_node_uuids.setdefault(label, set())
+        if uuid not in exported_node_uuids:
+            exported_node_uuids.add(uuid)
+            self._get_writer(self.node_files, f'{label}.csv', [f':ID({label})', 'uuid:long', ':LABEL']) \
+                .writerow([uuid, uuid, label])
+
+        relationship_writer = self._get_writer(self.relationship_files, f'{label}_Attribute.csv',
+                                               [f':START_ID({label})', ':END_ID(Attribute)', ':TYPE'])
+        for attr_name, attr_features in attributes.items():
+            attribute_id = self._add_attribute_node(attr_name, attr_features)
+            relationship_writer.writerow([uuid, attribute_id, 'Attribute'])
+
+    def _add_attribute_node(self, attr_name: str, attr_features: Dict) -> str:
+        """
+        Export an attribute node, unless an identical attribute node was already exported.
+        :return: The ID of the attribute node.
+        """
+        attribute_uuid = attr_features.get('uuid')
+        if not attribute_uuid:
+            attribute_uuid = Attribute.create_attribute_uuid(attr_features)
+        # Attribute uuids are only unique per attribute, so the ID is qualified by the attribute name.
+        attribute_id = f'{attr_name}:{attribute_uuid}'
+
+        if attribute_id not in self.exported_attribute_ids:
+            self.exported_attribute_ids.add(attribute_id)
+
+            property_names = sorted(attr_features)
+            header = tuple(f'{name}:{self.get_csv_type(attr_features[name])}' for name in property_names)
+            file_name = self.attribute_file_names.get((attr_name, header))
+            if not file_name:
+                file_name = f'{attr_name}_{len(self.attribute_file_names)}.csv'
+                self.attribute_file_names[(attr_name, header)] = file_name
+
+            self._get_writer(self.node_files, file_name, [':ID(Attribute)', *header, ':LABEL']) \
+                .writerow([attribute_id, *[self.format_value(attr_features[name]) for name in property_names],
+                           attr_name])
+
+        return attribute_id
+
+    @classmethod
+    def get_csv_type(cls, value) -> str:
+        if isinstance(value, (list, tuple)):
+            return (cls.get_csv_type(value[0]) if value else 'string') + '[]'
+        for python_type, csv_type in cls.csv_types:
+            if isinstance(value, python_type):
+                return csv_type
+        return 'string'
+
+    @classmethod
+    def format_value(cls, value) -> str:
+        if isinstance(value, (list, tuple)):
+            return cls.array_delimiter.join(cls.format_value(item) for item in value)
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        return str(value)
+
+    def _get_writer(self, files: Dict[str, Tuple[IO, Any]], file_name: str, header: List[str]):
+        """
+        Get the csv writer of the given file, creating the file and writing its header on first use.
+        """
+        if file_name not in files:
+            csv_file = open(os.path.join(self.output_dir, file_name), 'w', newline='', encoding='utf8')
+            writer = csv.writer(csv_file)
+            writer.writerow(header)
+            files[file_name] = (csv_file, writer)
+        return files[file_name][1]
+
+    def import_arguments(self) -> List[str]:
+        """
+        :return: The `neo4j-admin import` arguments that import all the exported files.
+        """
+        arguments = [f'--nodes={os.path.join(self.output_dir, file_name)}' for file_name in self.node_files]
+        arguments += [f'--relationships={os.path.join(self.output_dir, file_name)}'
+                      for file_name in self.relationship_files]
+        arguments += [f'--array-delimiter={self.array_delimiter}', '--multiline-fields=true']
+        return arguments
+
+    def close(self):
+        for csv_file, _ in list(self.node_files.values()) + list(self.relationship_files.values()):
+            csv_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,246 @@
+import threading
+from concurrent.futures import Executor, Future
+from typing import *
+
+from binaryninja import *
+
+from ..Abstracts.Attribute import Attribute, AttributeAccumulator
+from ..Abstracts.BDObject import BDObject
+from ..Enums import bd_enums
+from ..Utility import FeatureWalker
+from ..Utility.Instrumentation import get_instrumentation
+from ..Utility import Log
+
+# An extraction plan is built for every (TargetType, IRType) pair
+PlanKey = Tuple[bd_enums.TargetType, bd_enums.IRType]
+
+
+class DeferredAttributes:
+    """
+    Collects the features of offloadable attributes whose calculation was deferred by AttributeScheduler.run_plan, and
+    calculates their values in batches of many BDObjects at once (see Attribute.batch_compute_values), optionally on a
+    process pool. Features may be added concurrently by several extraction threads.
+    """
+
+    def __init__(self, batch_size: int, executor: Optional[Executor] = None):
+        """
+        :param batch_size: Amount of BDObjects whose values are calculated together.
+        :param executor: Executor (e.g a process pool) to calculate the batches on. The batches are calculated by the
+                         thread that fills them if None.
+        """
+        self.batch_size: int = max(batch_size, 1)
+        self.executor: Optional[Executor] = executor
+        self.lock: threading.Lock = threading.Lock()
+        # The batch being filled for each attribute, {attribute name: (attribute, [BDObject], [features])}
+        self.pending: Dict[str, Tuple[Attribute, List[BDObject], List]] = dict()
+        # Batches whose calculation was started, [(attribute, [BDObject], values or future values)]
+        self.dispatched: List[Tuple[Attribute, List[BDObject], Union[List[Dict], Future]]] = list()
+
+    def add(self, attribute: Attribute, bd_object: BDObject, features):
+        with self.lock:
+            attribute_batch = self.pending.setdefault(attribute.name, (attribute, list(), list()))
+            attribute_batch[1].append(bd_object)
+            attribute_batch[2].append(features)
+            if len(attribute_batch[1]) < self.batch_size:
+                return
+            del self.pending[attribute.name]
+        self.dispatch(*attribute_batch)
+
+    def dispatch(self, attribute: Attribute, bd_objects: List[BDObject], features_batch: List):
+        if self.executor:
+            values = self.executor.submit(attribute.batch_compute_values, features_batch)
+        else:
+            values = attribute.batch_compute_values(features_batch)
+        with self.lock:
+            self.dispatched.append((attribute, bd_objects, values))
+
+    def compute(self) -> Dict[int, Tuple[BDObject, List[str]]]:
+        """
+        Calculate the remaining batches, and store all the calculated values in their BDObjects.
+        :return: The BDObjects whose values were stored, and the names of the stored attributes, in the form of
+                 {id(BDObject): (BDObject, [attribute name])}.
+        """
+        with self.lock:
+            pending_batches = list(self.pending.values())
+            self.pending.clear()
+        for attribute_batch in pending_batches:
+            self.dispatch(*attribute_batch)
+
+        with self.lock:
+            dispatched_batches = self.dispatched
+            self.dispatched = list()
+
+        computed_attributes: Dict[int, Tuple[BDObject, List[str]]] = dict()
+        for attribute, bd_objects, values in dispatched_batches:
+            if isinstance(values, Future):
+                values = values.result()
+            for bd_object, attribute_value in zip(bd_objects, values):
+                if attribute_value:
+                    bd_object.add_attribute_value(attribute.name, attribute_value)
+                    computed_attributes.setdefault(id(bd_object), (bd_object, list()))[1].append(attribute.name)
+                else:
+                    Log.log_info('Failed to extract attribute %s from %s', attribute.name, bd_object)
+
+        return computed_attributes
+
+
+class AttributeScheduler:
+    """
+    Builds the attribute extraction plans once, and runs them on BDObjects.
+    An extraction plan is the list of attributes to extract from a BDObject of a given TargetType and IR, topologically
+    sorted so that every attribute comes after all the attributes it depends on (including nested dependencies).
+    Dependencies are extracted from the same BDObject as the attribute that depends on them.
+    """
+
+    def __init__(self, loaded_attributes: Dict[str, Attribute], needed_attributes: Optional[Iterable[str]] = None):
+        """
+        :param loaded_attributes: All the loaded attribute plugins, in the form of {attribute module name: attribute}.
+        :param needed_attributes: Names of the attributes to extract (their dependencies are extracted as well).
+                                  All loaded attributes are extracted if None.
+        """
+        self.loaded_attributes: Dict[str, Attribute] = loaded_attributes
+        self.needed_attributes: Optional[Set[str]] = None
+        if needed_attributes is not None:
+            self.needed_attributes = set(needed_attributes)
+            for attribute_name in self.needed_attributes - self.loaded_attributes.keys():
+                Log.log_info('AttributeScheduler: Needed attribute %s is not loaded, skipping it.', attribute_name)
+
+        # The names of all loaded attributes, topologically sorted by their dependencies
+        self.extraction_order: List[str] = self.sort_attributes(self.loaded_attributes)
+        self.plans: Dict[PlanKey, List[Attribute]] = self.build_plans()
+
+    @staticmethod
+    def sort_attributes(attributes: Dict[str, Attribute]) -> List[str]:
+        """
+        Topologically sort the attributes by their dependencies.
+        Raises ValueError if an attribute depends on an attribute that isn't loaded, or if the dependencies contain a
+        cycle.
+        """
+        sorted_attributes: List[str] = list()
+        # Attributes whose dependencies are currently being sorted, in the order they were visited
+        visiting: List[str] = list()
+        visited: Set[str] = set()
+
+        def visit(attribute_name: str):
+            if attribute_name in visited:
+                return
+            if attribute_name in visiting:
+                cycle = visiting[visiting.index(attribute_name):] + [attribute_name]
+                raise ValueError(f'AttributeScheduler: Attribute dependency cycle: {" -> ".join(cycle)}')
+
+            visiting.append(attribute_name)
+            for dependency_name in attributes[attribute_name].dependencies or []:
+                if dependency_name not in attributes:
+                    raise ValueError(f'AttributeScheduler: Attribute {attribute_name} depends on {dependency_name}, '
+                                     f'which is not loaded')
+                visit(dependency_name)
+            visiting.pop()
+
+            visited.add(attribute_name)
+            sorted_attributes.append(attribute_name)
+
+        for name in attributes:
+            visit(name)
+
+        return sorted_attributes
+
+    def build_plans(self) -> Dict[PlanKey, List[Attribute]]:
+        # Find the attributes each plan must extract - the needed attributes of the plan target, and all their
+        # dependencies.
+        plan_attribute_names: Dict[PlanKey, Set[str]] = dict()
+        for attribute_name, attribute in self.loaded_attributes.items():
+            if self.needed_attributes is not None and attribute_name not in self.needed_attributes:
+                continue
+
+            attribute_names = plan_attribute_names.setdefault((attribute.attribute_target, attribute.IR), set())
+            pending_names: List[str] = [attribute_name]
+            while pending_names:
+                current_name = pending_names.pop()
+                if current_name not in attribute_names:
+                    attribute_names.add(current_name)
+                    pending_names.extend(self.loaded_attributes[current_name].dependencies or [])
+
+        plans: Dict[PlanKey, List[Attribute]] = dict()
+        for plan_key, attribute_names in plan_attribute_names.items():
+            plans[plan_key] = [self.loaded_attributes[attribute_name] for attribute_name in self.extraction_order
+                               if attribute_name in attribute_names]
+            if Log.is_enabled(Log.DEBUG):
+                Log.log_debug('AttributeScheduler: Extraction plan for %s (%s): %s', plan_key[0].name,
+                              plan_key[1].value, [attribute.name for attribute in plans[plan_key]])
+
+        return plans
+
+    def get_plan(self, target_type: bd_enums.TargetType, ir_type: bd_enums.IRType) -> List[Attribute]:
+        return self.plans.get((target_type, ir_type), [])
+
+    def run_plan(self, bd_object: BDObject,
+                 extract_attribute: Callable[[Attribute, BDObject], Optional[Dict]] = None,
+                 deferred: Optional[DeferredAttributes] = None) -> List[str]:
+        """
+        Extract all the attributes in the plan of the given BDObject, in order.
+        The attributes that provide an accumulator are calculated together, in a single pass over the BDObject (see
+        Utility.FeatureWalker), and the rest are extracted one by one.
+        :param extract_attribute: Used to extract a single attribute from the BDObject, defaults to
+                                  Attribute.extract_attribute.
+        :param deferred: If given, only the features of offloadable attributes that no other attribute in the plan
+                         depends on are gathered, and their values are calculated later, in batches, by deferred.
+        :return: The names of the attributes that failed to extract (deferred attributes are not included).
+        """
+        plan = self.get_plan(bd_object.bd_obj_type, bd_object.bd_obj_IR)
+
+        deferred_attributes: Set[str] = set()
+        if deferred:
+            plan_dependencies: Set[str] = set()
+            for attribute in plan:
+                plan_dependencies.update(attribute.dependencies or [])
+            deferred_attributes = {attribute.name for attribute in plan
+                                   if attribute.offloadable and attribute.name not in plan_dependencies}
+
+        accumulators: Dict[str, AttributeAccumulator] = dict()
+        for attribute in plan:
+            if bd_object.get_attribute_value(attribute.name):
+                continue
+            accumulator = attribute.create_accumulator(bd_object)
+            if accumulator:
+                accumulators[attribute.name] = accumulator
+        instrumentation = get_instrumentation()
+        if accumulators:
+            with instrumentation.span('attribute', 'FeatureWalker'):
+                FeatureWalker.walk_function(bd_object, accumulators.values())
+
+        failed_attributes: List[str] = list()
+        for attribute in plan:
+            accumulator = accumulators.get(attribute.name)
+            with instrumentation.span('attribute', attribute.name):
+                if attribute.name in deferred_attributes:
+                    if not bd_object.get_attribute_value(attribute.name):
+                        # Features are gathered in plan order as well, after the values of their dependencies were
+                        # stored.
+                        deferred.add(attribute, bd_object, accumulator.get_features() if accumulator
+                                     else attribute.gather_features(bd_object))
+                    continue
+                elif accumulator:
+                    # Accumulators are finished in plan order, after the values of their dependencies were stored.
+                    attribute_value = accumulator.finish()
+                    if attribute_value:
+                        bd_object.add_attribute_value(attribute.name, attribute_value)
+                elif extract_attribute:
+                    attribute_value = extract_attribute(attribute, bd_object)
+                else:
+                    attribute_value = attribute.extract_attribute(bd_object)
+
+            if not attribute_value:
+                failed_attributes.append(attribute.name)
+
+        return failed_attributes
+
+    @staticmethod
+    def collect_needed_attributes(plugins: Iterable[Any]) -> Set[str]:
+        """
+        :param plugins: Property or Selector plugins (classes or instances).
+        :return: The names of all the attributes needed by the given plugins.
+        """
+        needed_attributes: Set[str] = set()
+        for plugin in plugins:
+            needed_attributes.update(getattr(plugin, 'needed_attributes', []))
+        return needed_attributes
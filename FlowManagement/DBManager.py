@@ -1,15 +1,22 @@
 from typing import *
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
 
-import xxhash
 from binaryninja import *
-from neo4j import GraphDatabase, StatementResult, Session, Transaction
+from neo4j import GraphDatabase, Driver, StatementResult, Session, Transaction
 
 from . import PluginManager
+from .AttributeScheduler import AttributeScheduler, DeferredAttributes
 from .. import Configuration
 from ..Abstracts.Attribute import Attribute
+from ..Abstracts.BDObject import BDObject
+from ..DataManagement.AttributeCache import AttributeCache
+from ..DataManagement.Neo4j.Neo4jBatchWriter import Neo4jBatchWriter
+from ..DataManagement.Neo4j.Neo4jCsvExporter import Neo4jCsvExporter
 from ..Enums import bd_enums
 from ..Operands.Assembly.BDBasicBlock import BDBasicBlock
 from ..Operands.Assembly.BDFunction import BDFunction
+from ..Utility.Instrumentation import get_instrumentation
+from ..Utility import BinaryHash, Log, PrimeTable, ViewCache
 
 """
                     IMPORTANT INFORMATION - RULES FOR CREATING ATTRIBUTES
@@ -30,21 +37,75 @@ class DBManager:
     """
     loaded_attributes: Dict[str, Attribute] = dict()
 
-    def __init__(self, bv: BinaryView):
+    # Node labels whose uuid is unique in the DB. A uniqueness constraint (which is backed by an index) is created
+    # for each one of them.
+    unique_uuid_labels: List[str] = ['FunctionCollection', 'Function', 'BasicBlock']
+
+    def __init__(self, bv: BinaryView, connect: bool = True, only_needed_attributes: bool = False,
+                 use_attribute_cache: Optional[bool] = None, attribute_cache_path: Optional[str] = None):
+        """
+        :param connect: Connect to the Neo4j DB. A DBManager which is not connected can only export the functions to
+                        CSV files (see export_assembly_function_collection).
+        :param only_needed_attributes: Only extract the attributes needed by the loaded Assembly properties and
+                                       selectors (and their dependencies), instead of all loaded attributes.
+        :param use_attribute_cache: Load attribute values extracted by previous runs from the local attribute cache,
+                                    and store the values extracted by this run in it.
+                                    Configuration.ATTRIBUTE_CACHE_ENABLED if None.
+        :param attribute_cache_path: Path of the attribute cache file, Configuration.attribute_cache_path if None.
+        """
         self.bv: BinaryView = bv
-        self.driver = GraphDatabase.driver(Configuration.neo4j_uri, auth=(Configuration.neo4j_username,
-                                                                          Configuration.neo4j_password))
+        self.driver: Optional[Driver] = None
+        if connect:
+            self.driver = GraphDatabase.driver(Configuration.neo4j_uri, auth=(Configuration.neo4j_username,
+                                                                              Configuration.neo4j_password))
         self.function_collection_uuid: int = self.calc_bv_uuid()
+        # {function uuid: uuids of its basic blocks that are already stored in the DB}, filled during extraction.
+        self.existing_bb_uuids: Dict[int, Set[int]] = dict()
 
         # Load up all attribute plugins for all plugins
         for ir in bd_enums.IRType:
             self.loaded_attributes.update(PluginManager.import_attributes(ir))
 
+        needed_attributes: Optional[Set[str]] = None
+        if only_needed_attributes:
+            needed_attributes = AttributeScheduler.collect_needed_attributes(
+                list(PluginManager.import_properties(bd_enums.IRType.Assembly).values()) +
+                list(PluginManager.import_selectors(bd_enums.IRType.Assembly).values()))
+        # The extraction plans are built once, and raise a ValueError on attribute dependency cycles.
+        self.attribute_scheduler: AttributeScheduler = AttributeScheduler(self.loaded_attributes, needed_attributes)
+
+        self.attribute_cache: Optional[AttributeCache] = None
+        if use_attribute_cache is None:
+            use_attribute_cache = Configuration.ATTRIBUTE_CACHE_ENABLED
+        if use_attribute_cache:
+            self.attribute_cache = AttributeCache(attribute_cache_path)
+            self.attribute_cache.touch(self.function_collection_uuid)
+        # {attribute name: attribute version}, cached values of other versions are ignored.
+        self.attribute_versions: Dict[str, int] = {attribute.name: attribute.version
+                                                   for attribute in self.loaded_attributes.values()}
+
+        if self.driver:
+            self.create_constraints()
+
+    def create_constraints(self):
+        """
+        Create the uuid uniqueness constraints for the BDObject nodes, and a uuid index for every attribute node label
+        (attribute nodes are merged by their uuid).
+        Both statements are no-ops if the constraint or index already exists.
+        The constrained nodes are written with MERGE, so a uuid collision merges the colliding nodes instead of failing
+        the write (the Function and BasicBlock uuids are 64 bit wide to keep collisions unlikely).
+        """
+        with self.driver.session() as session:
+            for node_label in self.unique_uuid_labels:
+                session.run(f'CREATE CONSTRAINT ON (n:{node_label}) ASSERT n.uuid IS UNIQUE')
+            for attribute_name in self.loaded_attributes:
+                session.run(f'CREATE INDEX ON :{attribute_name}(uuid)')
+
     def calc_bv_uuid(self) -> int:
-        # BV UUID is the hash of all the bytes in the file.
-        file_hash = xxhash.xxh32()
-        file_hash.update(self.bv.read(0, self.bv.end))
-        return file_hash.intdigest()
+        """
+        BV UUID is the hash of all the bytes in the file (see Utility.BinaryHash).
+        """
+        return BinaryHash.calc_bv_hash(self.bv)
 
     @staticmethod
     def exists_in_db(uuid: int, node_label: str, session: Session) -> bool:
@@ -52,67 +113,140 @@ class DBManager:
         Check if node with the given uuid exists in the DB, return True or False accordingly.
         """
 
-        cypher_str = f'MATCH (n:{node_label} {{uuid: {uuid}}}) ' \
-                     'RETURN n.uuid as uuid'
-        result: StatementResult = session.run(cypher_str)
+        cypher_str = f'MATCH (n:{node_label} {{uuid: $uuid}}) ' \
+                     'RETURN n.uuid as uuid LIMIT 1'
+        result: StatementResult = session.run(cypher_str, uuid=uuid)
         if result.single():
             return True
         else:
             return False
 
+    @staticmethod
+    def existing_uuids(uuids: Iterable[int], node_label: str, session: Session) -> Set[int]:
+        """
+        Check which of the given uuids already exist in the DB as nodes with the given label, using a single query.
+        :return: The set of uuids that exist in the DB.
+        """
+
+        cypher_str = f'UNWIND $uuids AS uuid ' \
+                     f'MATCH (n:{node_label} {{uuid: uuid}}) ' \
+                     'RETURN n.uuid as uuid'
+        result: StatementResult = session.run(cypher_str, uuids=list(uuids))
+        return {record['uuid'] for record in result}
+
     def populate_assembly_function_collection(self):
         # Start by creating a function collection, representing the file\binary view that contains all the functions
         with self.driver.session() as session:
             if not self.exists_in_db(self.function_collection_uuid, 'FunctionCollection', session):
                 # The function collection doesn't yet exist in the DB, continue with population
-                session.run(f'CREATE (:FunctionCollection {{'
-                            f'uuid: {self.function_collection_uuid}, '
-                            f'filename: "{self.bv.file.filename.split("/")[-1]}",'
-                            f'arch: "{str(self.bv.arch.name)}" '
-                            f'}})')
+                session.run('CREATE (:FunctionCollection {uuid: $uuid, filename: $filename, arch: $arch})',
+                            uuid=self.function_collection_uuid,
+                            filename=self.bv.file.filename.split("/")[-1],
+                            arch=str(self.bv.arch.name))
+
+            function_uuids: Dict[int, Function] = {BDFunction.generate_uuid(func): func for func in self.bv.functions}
+            existing_function_uuids = self.existing_uuids(function_uuids.keys(), 'Function', session)
+
+        functions_to_populate: List[Function] = [func for func_uuid, func in function_uuids.items()
+                                                 if func_uuid not in existing_function_uuids]
+        Log.log_info('populate_assembly_function_collection: %d functions already exist in the DB, populating %d '
+                     'functions.', len(existing_function_uuids), len(functions_to_populate))
+
+        with Neo4jBatchWriter(self.driver) as batch_writer:
+            for func, bd_func in zip(functions_to_populate, self.extract_functions(functions_to_populate)):
+                if bd_func:
+                    batch_writer.add_function(bd_func, self.existing_bb_uuids.pop(bd_func.uuid, set()))
+                else:
+                    Log.log_info('populate_x86_assembly: Failed to populate function %s.', func.name)
 
-            for func in self.bv.functions:
-                func: Function
-                log.log_info(f'populate_assembly_function_collection: Function uuid {BDFunction.generate_uuid(func)}')
-                if not self.exists_in_db(BDFunction.generate_uuid(func), 'Function', session):
-                    bd_func: BDFunction = self.populate_assembly_function(func)
+        Log.log_info('populate_assembly_function_collection: Ingestion statistics: %s', batch_writer.get_statistics())
 
-                    if bd_func and self.insert_func_into_db(bd_func):
-                        log.log_info(f'populate_x86_assembly: Successfully inserted function {bd_func.uuid} into DB.')
-                    else:
-                        log.log_info(f'populate_x86_assembly: Failed to insert function {func.name}.')
+    def export_assembly_function_collection(self, output_dir: str) -> List[str]:
+        """
+        Export mode - extract all the functions in the binary view and write them to CSV files in output_dir, in the
+        layout expected by `neo4j-admin import`, without talking to the DB.
+        :return: The `neo4j-admin import` arguments for importing the exported files.
+        """
+        with Neo4jCsvExporter(output_dir) as exporter:
+            exporter.add_function_collection(self.function_collection_uuid,
+                                             self.bv.file.filename.split("/")[-1],
+                                             str(self.bv.arch.name))
+
+            functions: List[Function] = list(self.bv.functions)
+            for func, bd_func in zip(functions, self.extract_functions(functions)):
+                if bd_func:
+                    exporter.add_function(bd_func)
+                else:
+                    Log.log_info('export_assembly_function_collection: Failed to populate function %s.', func.name)
+
+        import_arguments = exporter.import_arguments()
+        Log.log_info('export_assembly_function_collection: Exported to %s, import with: neo4j-admin import %s',
+                     output_dir, ' '.join(import_arguments))
+        return import_arguments
+
+    def extract_functions(self, functions: List[Function]) -> List[Optional[BDFunction]]:
+        """
+        Extraction stage - create and populate a BDFunction for each of the given functions.
+        The functions are fanned out to a pool of Configuration.EXTRACTION_THREAD_COUNT threads. The values of
+        offloadable attributes are calculated afterwards, in batches of Configuration.EXTRACTION_BATCH_SIZE functions,
+        by a pool of Configuration.EXTRACTION_PROCESS_COUNT processes (if any).
+        :return: The populated BDFunction objects (None for functions that failed to populate), in the order of the
+                 given functions.
+        """
+        # The whole-binary indexes memoised by previous extractions are stale if the analysis was updated since.
+        ViewCache.clear_view_values(self.bv)
+
+        process_pool: Optional[Executor] = None
+        if Configuration.EXTRACTION_PROCESS_COUNT > 0:
+            process_pool = ProcessPoolExecutor(max_workers=Configuration.EXTRACTION_PROCESS_COUNT)
+        try:
+            deferred = DeferredAttributes(Configuration.EXTRACTION_BATCH_SIZE, process_pool)
+            with get_instrumentation().span('extraction', 'extract functions', {'functions': len(functions)}):
+                with ThreadPoolExecutor(max_workers=max(Configuration.EXTRACTION_THREAD_COUNT, 1)) as thread_pool:
+                    bd_funcs = list(thread_pool.map(lambda func: self.populate_assembly_function(func, deferred),
+                                                    functions))
 
-    def populate_assembly_function(self, func: Function) -> Optional[BDFunction]:
+            with get_instrumentation().span('extraction', 'deferred attributes'):
+                for bd_object, attribute_names in deferred.compute().values():
+                    self.store_cached_attributes(bd_object, [], attribute_names)
+            return bd_funcs
+        finally:
+            if process_pool:
+                process_pool.shutdown()
+            if self.attribute_cache:
+                self.attribute_cache.flush()
+            PrimeTable.save_prime_tables()
+
+    def populate_assembly_function(self, func: Function, deferred: Optional[DeferredAttributes] = None) \
+            -> Optional[BDFunction]:
         """
         Create a BDFunction object and populate it with all available attributes.
+        :param deferred: If given, the calculation of offloadable attributes is deferred to it, and their values are
+                         only available once it is computed.
         """
         bd_func = BDFunction(func)
-        for attribute_name, attribute in self.loaded_attributes.items():
-            attribute: Attribute
-            attribute_name: str
-            if attribute.dependencies:
-                # Make sure to load the dependencies before the attribute itself.
-                for depend_attr_name in attribute.dependencies:
-                    # TODO: Handle a case where a dependency has a dependency of its own
-                    depend_attr: Attribute = self.loaded_attributes[depend_attr_name]
-                    if depend_attr.extract_attribute(bd_func):
-                        pass
-                    else:
-                        log.log_info(f'Failed to extract dependant attribute {depend_attr_name} from function '
-                                     f'{bd_func}')
-            if attribute.attribute_target == bd_func.bd_obj_type and attribute.IR == bd_func.bd_obj_IR:
-                # Populate the attribute values. extract_attribute takes care of storing the attribute value
-                # inside the bd_func object.
-                if attribute.extract_attribute(bd_func):
-                    pass
-                else:
-                    log.log_info(f'Failed to extract attribute {attribute.name} from function {bd_func}')
-        if self.populate_assembly_basic_block(bd_func):
+        cached_attributes = self.load_cached_attributes(bd_func)
+        # Populate the attribute values, dependencies first. Attributes that support it are calculated in a single pass
+        # over the function, the rest are extracted one by one, which takes care of storing the attribute value inside
+        # the bd_func object.
+        failed_attributes = self.attribute_scheduler.run_plan(bd_func, deferred=deferred)
+        for attribute_name in failed_attributes:
+            Log.log_info('Failed to extract attribute %s from function %s', attribute_name, bd_func)
+        self.store_cached_attributes(bd_func, cached_attributes)
+        populated = self.populate_assembly_basic_block(bd_func)
+
+        # All the attributes were extracted (or their features were gathered), so the Binary Ninja objects are no longer
+        # needed. They are resolved again if anything accesses them later.
+        for bd_basic_block in bd_func.bd_basic_blocks.values():
+            bd_basic_block.release_underlying_obj()
+        bd_func.release_underlying_obj()
+
+        if populated:
             # If populate_assembly_basic_block is successfull, then all basic blocks and instructions were
             # added to the bd_func object and their attribute values were added to the respective objects.
             return bd_func
         else:
-            log.log_info(f'Failed to populate basic block attributes for function {bd_func}')
+            Log.log_info('Failed to populate basic block attributes for function %s', bd_func)
             return None
 
     def populate_assembly_basic_block(self, bd_func: BDFunction) -> bool:
@@ -122,24 +256,48 @@ class DBManager:
         # Create all BDBasicBlock objects for the given function.
         bd_func.populate_basic_blocks()
 
-        with self.driver.session() as session:
-            for bb_uuid, bd_basic_block in bd_func.bd_basic_blocks.items():
-                bd_basic_block: BDBasicBlock
-                log.log_info(f'Checking bb uuid {bb_uuid}')
-                if not self.exists_in_db(bb_uuid, 'BasicBlock', session):
-                    for attribute_name, attribute in self.loaded_attributes.items():
-                        attribute: Attribute
-                        if attribute.attribute_target == bd_basic_block.bd_obj_type \
-                                and attribute.IR == bd_basic_block.bd_obj_IR:
-                            # Populate the attribute values
-                            if attribute.extract_attribute(bd_basic_block):
-                                pass
-                            else:
-                                log.log_info(f'Failed to extracts attribute {attribute.name} from '
-                                             f'basic block {bd_basic_block}')
-                                return False
+        existing_bb_uuids: Set[int] = set()
+        if self.driver:
+            with self.driver.session() as session:
+                existing_bb_uuids = self.existing_uuids(bd_func.bd_basic_blocks.keys(), 'BasicBlock', session)
+            # Basic blocks that are already stored in the DB are neither extracted nor inserted again. bd_func keeps all
+            # of its basic blocks, the insertion skips the existing ones.
+            self.existing_bb_uuids[bd_func.uuid] = existing_bb_uuids
+
+        for bb_uuid, bd_basic_block in bd_func.bd_basic_blocks.items():
+            bd_basic_block: BDBasicBlock
+            if bb_uuid in existing_bb_uuids:
+                continue
+            # Populate the attribute values
+            cached_attributes = self.load_cached_attributes(bd_basic_block)
+            failed_attributes = self.attribute_scheduler.run_plan(bd_basic_block)
+            if failed_attributes:
+                Log.log_info('Failed to extract attributes %s from basic block %s', failed_attributes, bd_basic_block)
+                return False
+            self.store_cached_attributes(bd_basic_block, cached_attributes)
         return True
 
+    def load_cached_attributes(self, bd_object: BDObject) -> List[str]:
+        """
+        Load the attribute values of the BDObject from the attribute cache (if enabled).
+        Attributes whose values were loaded are not extracted again.
+        :return: The names of the loaded attributes.
+        """
+        if self.attribute_cache:
+            return self.attribute_cache.load(self.function_collection_uuid, bd_object, self.attribute_versions)
+        return []
+
+    def store_cached_attributes(self, bd_object: BDObject, cached_attributes: List[str],
+                                attribute_names: Optional[List[str]] = None):
+        """
+        Store the attribute values extracted from the BDObject in the attribute cache (if enabled).
+        :param cached_attributes: The names of the attributes that were loaded from the cache, and need not be stored.
+        :param attribute_names: The names of the attributes to store, all extracted attributes are stored if None.
+        """
+        if self.attribute_cache:
+            self.attribute_cache.store(self.function_collection_uuid, bd_object, self.attribute_versions,
+                                       exclude=cached_attributes, include=attribute_names)
+
     def insert_func_into_db(self, bd_func: BDFunction) -> bool:
         """
         Insert a BDFunction into the DB, including all its BDBasicBlock object and associated attributes.
@@ -148,27 +306,28 @@ class DBManager:
         # Create the attribute dictionary to insert into the DB
         func_attributes = bd_func.get_all_attribute_values()
 
-        log.log_info(f'Inserting Function uuid {bd_func.uuid} into DB...')
+        Log.log_sampled(Log.INFO, 'insert_func_into_db', Configuration.LOG_SAMPLE_RATE,
+                        'Inserting Function uuid %d into DB...', bd_func.uuid)
         with self.driver.session() as session:
             # Create the function node
-            result = session.run('CALL apoc.create.nodes(["Function"], [{uuid: {uuid}}]) yield node '
+            result = session.run('CALL apoc.merge.node(["Function"], {uuid: {uuid}}) yield node '
                                  'RETURN node',
                                  uuid=bd_func.uuid)
             if result.single()['node']:
                 if session.write_transaction(self.link_attribute, bd_func.uuid, func_attributes):
-                    log.log_debug(f'Successfully linked all attribute for Function with uuid: {bd_func.uuid}')
+                    Log.log_debug('Successfully linked all attribute for Function with uuid: %d', bd_func.uuid)
                     for bb_uuid, bd_bb_obj in bd_func.bd_basic_blocks.items():
                         if self.insert_bb_into_db(bd_bb_obj):
                             continue
                         else:
-                            log_debug(f'Failed to insert bb with uuid {bb_uuid} into the DB.')
-                    log.log_debug(f'Successfully linked all attributes for all basic blocks inside function with'
-                                  f'uuid {bd_func.uuid}')
+                            Log.log_debug('Failed to insert bb with uuid %d into the DB.', bb_uuid)
+                    Log.log_debug('Successfully linked all attributes for all basic blocks inside function with '
+                                  'uuid %d', bd_func.uuid)
                     return True
                 else:
-                    log.log_debug(f'Failed to link all attributes for function with uuid: {bd_func.uuid}')
+                    Log.log_debug('Failed to link all attributes for function with uuid: %d', bd_func.uuid)
             else:
-                log.log_debug(f'Unable to create a Function node for uuid: {str(bd_func.uuid)}')
+                Log.log_debug('Unable to create a Function node for uuid: %d', bd_func.uuid)
         return False
 
     def insert_bb_into_db(self, bd_basic_block: BDBasicBlock) -> bool:
@@ -178,22 +337,24 @@ class DBManager:
         # Create the attribute dictionary to insert into the DB
         bb_attributes = bd_basic_block.get_all_attribute_values()
 
-        log.log_info(f'Inserting Basic Block uuid {bd_basic_block.uuid} into DB...')
+        Log.log_sampled(Log.INFO, 'insert_bb_into_db', Configuration.LOG_SAMPLE_RATE,
+                        'Inserting Basic Block uuid %d into DB...', bd_basic_block.uuid)
         with self.driver.session() as session:
             # Create the basic block node
-            result = session.run('CALL apoc.create.nodes(["BasicBlock"], [{uuid: {uuid}}]) yield node '
+            result = session.run('CALL apoc.merge.node(["BasicBlock"], {uuid: {uuid}}) yield node '
                                  'RETURN node',
                                  uuid=bd_basic_block.uuid)
             if result.single()['node']:
                 if session.write_transaction(self.link_attribute, bd_basic_block.uuid, bb_attributes):
-                    log.log_debug(f'Successfully linked all attribute for Basic block with uuid: {bd_basic_block.uuid}')
+                    Log.log_debug('Successfully linked all attribute for Basic block with uuid: %d',
+                                  bd_basic_block.uuid)
 
                     # TODO: add insertion of BDInstruction here
                     return True
                 else:
-                    log.log_debug(f'Failed to link all attributes for basic block with uuid: {bd_basic_block.uuid}')
+                    Log.log_debug('Failed to link all attributes for basic block with uuid: %d', bd_basic_block.uuid)
             else:
-                log.log_debug(f'Unable to create a BasicBlock node for uuid: {str(bd_basic_block.uuid)}')
+                Log.log_debug('Unable to create a BasicBlock node for uuid: %d', bd_basic_block.uuid)
         return False
 
     @staticmethod
@@ -237,8 +398,8 @@ class DBManager:
             if r:
                 continue
             else:
-                log.log_debug(f'Failed to link attribute {attr_name} to node with uuid {origin_uuid}')
+                Log.log_debug('Failed to link attribute %s to node with uuid %d', attr_name, origin_uuid)
                 return False
 
-        log.log_debug(f'successfully linked all attributes to node with uuid {origin_uuid}')
+        Log.log_debug('successfully linked all attributes to node with uuid %d', origin_uuid)
         return True
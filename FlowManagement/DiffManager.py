@@ -6,12 +6,15 @@ from ..Abstracts.Property import Property
 from ..Abstracts.Selector import Selector
 from ..Abstracts.Attribute import Attribute
 from ..Abstracts.BDSet import BDSet
+from ..DataManagement.AttributeCache import BinaryAttributeCache
 from ..FlowManagement.FlowManager import FlowManager
 from ..FlowManagement.FlowResults import FlowResults
 from binaryninja import *
 from ..Enums import bd_enums
 from .. import Configuration
+import time
 import xxhash
+from ..Utility import Log
 from .FlowResults import FlowResults
 
 
@@ -23,29 +26,88 @@ class AssemblyFunctionDiffManager:
     be DiffManagers with other scopes).
     """
 
-    def __init__(self, source: BDSet, target: BDSet):
+    def __init__(self, source: BDSet, target: BDSet, source_cache: Optional[BinaryAttributeCache] = None,
+                 target_cache: Optional[BinaryAttributeCache] = None):
+        """
+        :param source_cache: The attribute cache of the source binary. If given, the cached attribute values of the
+                             source functions and basic blocks are loaded before they are diffed (so they are not
+                             extracted again), and the extracted values are stored once the diff is done.
+        :param target_cache: The attribute cache of the target binary.
+        """
+        # phase_timings: {phase name: wall clock seconds} of every diffing phase that ran.
+        self.phase_timings: Dict[str, float] = dict()
+
+        # The functions of each binary with an attribute cache, kept as the flow consumes the sets.
+        self.cached_functions: List[Tuple[BinaryAttributeCache, BDFunction]] = list()
+        # {id(BDFunction): the attribute cache of its binary}, used to load the values of its basic blocks.
+        self.function_caches: Dict[int, BinaryAttributeCache] = dict()
+        phase_start = time.perf_counter()
+        for bd_set, attribute_cache in ((source, source_cache), (target, target_cache)):
+            if attribute_cache:
+                for bd_func in bd_set:
+                    attribute_cache.load(bd_func)
+                    self.cached_functions.append((attribute_cache, bd_func))
+                    self.function_caches[id(bd_func)] = attribute_cache
+        if self.cached_functions:
+            self.phase_timings['load_cached_attributes'] = time.perf_counter() - phase_start
+
         self.flow_result = FlowResults(source, target)
 
     def diff_functions(self):
 
+        phase_start = time.perf_counter()
         func_flow_manager: FlowManager = FlowManager(self.flow_result)
         func_similarity_result: FlowResults = func_flow_manager.run_diff_flow()
+        self.phase_timings['function_matching'] = time.perf_counter() - phase_start
 
-        log.log_info(f'Function similarity results: \n {func_similarity_result}')
+        Log.log_info('Function similarity results: \n %s', func_similarity_result)
 
         # After Function properties and selectors have reasonably matched functions, a drill down is made into the
         # basic block and instruction level in order to further increase confidence in the match.
+        phase_start = time.perf_counter()
         self.diff_basic_blocks(func_similarity_result)
+        self.phase_timings['basic_block_matching'] = time.perf_counter() - phase_start
 
         # self.diff_basic_block_edges(func_similarity_result)
-        log.log_info(f'Function similarity results: \n {func_similarity_result}')
+        Log.log_info('Function similarity results: \n %s', func_similarity_result)
+
+        if self.cached_functions:
+            phase_start = time.perf_counter()
+            self.store_cached_attributes()
+            self.phase_timings['store_cached_attributes'] = time.perf_counter() - phase_start
 
         # TODO implement instruction level diffing
 
         # self.calculate_function_similarity_score()
 
+    def get_results(self) -> Dict:
+        """
+        :return: The diff results as a JSON serializable dict - the matched functions (with the amount of basic blocks
+                 matched in each of them), the unmatched functions and the phase timings.
+        """
+        matched_functions: List[Dict] = list()
+        for match in self.flow_result.matched_bd_objects:
+            match_result = {
+                'source': str(match[1]),
+                'source_address': match[1].start,
+                'target': str(match[2]),
+                'target_address': match[2].start,
+                'confidence': match[0]
+            }
+            if len(match) > 3:
+                match_result['matched_basic_blocks'] = match[3].get_matched_obj_count()
+            matched_functions.append(match_result)
+
+        unmatched_sets = self.flow_result.unmatched_sets
+        return {
+            'matched_functions': matched_functions,
+            'unmatched_source_functions': sorted(str(bd_func) for bd_func in unmatched_sets['SourceSet']),
+            'unmatched_target_functions': sorted(str(bd_func) for bd_func in unmatched_sets['TargetSet']),
+            'phase_timings': self.phase_timings
+        }
+
     def diff_basic_blocks(self, func_similarity_result):
-        log.log_debug(f'diff_basic_blocks: Started Processing.')
+        Log.log_debug('diff_basic_blocks: Started Processing.')
         for match in func_similarity_result.matched_bd_objects:
 
             confidence = match[0]
@@ -53,6 +115,11 @@ class AssemblyFunctionDiffManager:
             target_match_func = match[2]
             source_match_func.populate_basic_blocks()
             target_match_func.populate_basic_blocks()
+            for match_func in (source_match_func, target_match_func):
+                attribute_cache = self.function_caches.get(id(match_func))
+                if attribute_cache:
+                    for bb in match_func.bd_basic_blocks.values():
+                        attribute_cache.load(bb)
 
             source_bb_set: BDBasicBlockSet = BDBasicBlockSet()
             target_bb_set: BDBasicBlockSet = BDBasicBlockSet()
@@ -62,8 +129,8 @@ class AssemblyFunctionDiffManager:
             for bb in target_match_func.bd_basic_blocks.values():
                 target_bb_set.add(bb)
 
-            log.log_info('source_bb_set: ' + str(source_bb_set))
-            log.log_info('target_bb_set: ' + str(target_bb_set))
+            Log.log_info('source_bb_set: %s', source_bb_set)
+            Log.log_info('target_bb_set: %s', target_bb_set)
 
             # Create a FlowManager to handle the matching flow for basic blocks.
             if source_bb_set and target_bb_set:
@@ -74,10 +141,20 @@ class AssemblyFunctionDiffManager:
                 # Add the FlowResult object for the basic blocks comprising the BDFunctions matched.
                 match.append(bb_flow_result)
 
-                log.log_info(f'BasicBlock similarity results: \n {bb_flow_result.matched_bd_objects} \n')
+                Log.log_info('BasicBlock similarity results: \n %s \n', bb_flow_result.matched_bd_objects)
+
+    def store_cached_attributes(self):
+        """
+        Store the attribute values extracted during the diff, of all the functions and their basic blocks, in the
+        attribute cache of their binary.
+        """
+        for attribute_cache, bd_func in self.cached_functions:
+            attribute_cache.store(bd_func)
+            for bb in bd_func.bd_basic_blocks.values():
+                attribute_cache.store(bb)
 
     def diff_basic_block_edges(self, func_similarity_result):
-        log.log_debug(f'diff_basic_block_edges: Started Processing.')
+        Log.log_debug('diff_basic_block_edges: Started Processing.')
         for function_match in func_similarity_result.matched_bd_objects:
             confidence = function_match[0]
             source_match_func: BDFunction = function_match[1]
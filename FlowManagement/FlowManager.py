@@ -1,4 +1,4 @@
-from typing import Set, Tuple, Dict, List, NamedTuple, Optional, AnyStr, SupportsInt
+from typing import Set, Tuple, Dict, List, NamedTuple, Optional, AnyStr, SupportsInt, Hashable
 
 from ..Operands.Assembly.BDBasicBlock import BDBasicBlockSet
 from ..Abstracts.BDObject import BDObject
@@ -10,8 +10,11 @@ from ..FlowManagement import PluginManager
 from binaryninja import *
 from ..Enums import bd_enums
 from .. import Configuration
-import xxhash
 from .FlowResults import FlowResults
+from ..Utility import NearestNeighbours
+from ..Utility.Instrumentation import get_instrumentation
+from ..Utility import Log
+import math
 
 
 class FlowManager:
@@ -34,14 +37,27 @@ class FlowManager:
     def __init__(self, flow_result):
 
         self.flow_result = flow_result
-        for item in self.flow_result.unmatched_sets['SourceSet']:
-            self.target_bd_obj = item.bd_obj_type
-            self.target_bd_IR = item.bd_obj_IR
+        self.instrumentation = get_instrumentation()
+        self.target_bd_obj = self.flow_result.unmatched_sets['SourceSet'].base_object_type
+        self.target_bd_IR = self.flow_result.unmatched_sets['SourceSet'].base_object_IR
 
         self.verify_sets()
 
         self.load_plugins()
 
+        # Instantiate the plugins relevant for the object and IR this flow takes care of once, they are re-used for
+        # every set the flow matches (the initial sets and every propagated neighbourhood).
+        self.properties: List[Property] = [
+            property_module(self.loaded_attributes) for property_module in self.loaded_properties.values()
+            if property_module.target_bd_IR == self.target_bd_IR
+            and property_module.target_bd_object == self.target_bd_obj
+        ]
+        self.selectors: List[Selector] = [
+            selector_module(self.loaded_attributes) for selector_module in self.loaded_selectors.values()
+            if selector_module.target_bd_IR == self.target_bd_IR
+            and selector_module.target_bd_object == self.target_bd_obj
+        ]
+
     def load_plugins(self):
         # For each new Flow Manager that uses a new type of IR (e.g Assembly, MLIL etc) update the loaded plugins with
         # the new IR matching plugins.
@@ -51,10 +67,9 @@ class FlowManager:
             self.loaded_selectors.update(PluginManager.import_selectors(self.target_bd_IR))
             self.plugins_loaded_for_IR.append(self.target_bd_IR)
 
-        log.log_debug(f'load_plugins: Loaded the following plugins for IR {self.target_bd_IR}: \n'
-                      f'Properties: {self.loaded_properties} \n '
-                      f'Selectors: {self.loaded_selectors} \n'
-                      f'Attributes: {self.loaded_attributes} \n')
+        Log.log_debug('load_plugins: Loaded the following plugins for IR %s: \nProperties: %s \n Selectors: %s \n'
+                      'Attributes: %s \n', self.target_bd_IR, self.loaded_properties, self.loaded_selectors,
+                      self.loaded_attributes)
 
     def verify_sets(self):
         """
@@ -67,129 +82,128 @@ class FlowManager:
                 self.flow_result.unmatched_sets['TargetSet'].base_object_type:
             return True
         else:
-            log.log_debug(f'FlowManager: Set types do not match. '
-                          f'IR: {self.flow_result.unmatched_sets["SourceSet"].base_object_IR} != '
-                          f'{self.flow_result.unmatched_sets["TargetSet"].base_object_IR}'
-                          f'Object Type: {self.flow_result.unmatched_sets["SourceSet"].base_object_type} != '
-                          f'{self.flow_result.unmatched_sets["TargetSet"].base_object_type}')
+            Log.log_debug('FlowManager: Set types do not match. IR: %s != %s Object Type: %s != %s',
+                          self.flow_result.unmatched_sets["SourceSet"].base_object_IR,
+                          self.flow_result.unmatched_sets["TargetSet"].base_object_IR,
+                          self.flow_result.unmatched_sets["SourceSet"].base_object_type,
+                          self.flow_result.unmatched_sets["TargetSet"].base_object_type)
             return False
 
     def run_diff_flow(self) -> FlowResults:
         """
         This is the main algorithm for finding matched BDObjects.
-        The algorithm also invokes a diffing flow between basic blocks if matching functions, or a diffing flow
-        between instructions if matching basic blocks - This is done in order to further refine the matching.
+        The unmatched sets are first matched as a whole, after which the matches are propagated along the call graph
+        (or CFG) - see propagate_matches.
         """
 
-        log.log_debug(f'run_diff_flow(): Started Processing.'
-                      f'Object type: {self.target_bd_obj.name}, IR type: {self.target_bd_IR.name}')
-
-        # This boolean indicates if a match was found, and is used as a stopping condition for the algorithm in case
-        # no more matches can be iteratively found.
-        found_match: bool = False
-
-        for property_module in self.loaded_properties.values():
-            current_property: Property = property_module(self.loaded_attributes)
-
-            log.log_debug(f'Current Property is: {current_property.property_name}')
-            # Only run plugins relevant for the object and IR this flow takes care of.
-            log.log_debug(f'Property IR: {property_module.target_bd_IR}, Flow IR: {self.target_bd_IR} \n'
-                          f'Property obj: {property_module.target_bd_object}, Flow obj: {self.target_bd_obj} \n')
-            if property_module.target_bd_IR == self.target_bd_IR \
-                    and property_module.target_bd_object == self.target_bd_obj:
-                # Create the initial mapping according to the currently loaded property.
-                # This will update the following class attributes:
-                #   1. potential_matched_sets
-                #   2. unmatched_sets
-
-                log.log_debug(f'Creating initial mapping for property: {current_property.property_name}')
-                self.create_initial_mapping(current_property)
-
-                # Use Selectors to refine the search as much as possible.
-                # Each selector will attempt to uniquely match objects in the
-                for selector_module in self.loaded_selectors.values():
-                    # Only run plugins relevant for the object and IR this flow takes care of.
-                    if selector_module.target_bd_IR == self.target_bd_IR \
-                            and selector_module.target_bd_object == self.target_bd_obj:
-                        log.log_debug(f'Processing Selector {selector_module.selector_name}...')
-                        current_selector: Selector = selector_module(self.loaded_attributes)
-
-                        if current_selector.selector_comparison_result_type == \
-                                bd_enums.SelectorComparisonResultType.Boolean:
-                            self.match_by_boolean_selector(current_selector)
-                        elif current_selector.selector_comparison_result_type == \
-                                bd_enums.SelectorComparisonResultType.IntDistance:
-                            self.match_by_distance_selector(current_selector)
-
-                # After all property matches were "deep dive" matched by Selectors, remove the matched objects from the
-                # potential and unmatched sets so that further properties will not run on them.
-                log.log_debug(f'Finished processing Property {property_module}, running cleanup_match_sets().')
-                self.cleanup_match_sets()
-                log.log_debug(f'Finished cleanup.')
-
-            if found_match:
-                # All properties and selectors were ran, matches were found.
-                # Run the algorithm again, this time using the matched objects' parents as the base matching sets.
-                found_match = False
-
-                source_set: BDSet = BDSet()
-                source_set.base_object_type = self.target_bd_obj
-                source_set.base_object_IR = self.target_bd_IR
-                target_set: BDSet = BDSet()
-                target_set.base_object_type = self.target_bd_obj
-                target_set.base_object_IR = self.target_bd_IR
-
-                # Run the diffing flow on the parents of matched functions
-                for match_pair in self.flow_result.potentially_matched_bd_objects:
-                    for parent_uuid in match_pair[2].get_parents():
-                        for bd_object in self.flow_result.unmatched_sets['SourceSet']:
-                            if bd_object.uuid == parent_uuid:
-                                source_set.add(bd_object)
-                                break
-                    for parent_uuid in match_pair[3].get_parents():
-                        for bd_object in self.flow_result.unmatched_sets['TargetSet']:
-                            if bd_object.uuid == parent_uuid:
-                                target_set.add(bd_object)
-                                break
-                    parent_flow_result: FlowResults = FlowResults(source_set, target_set)
-                    parent_flow = FlowManager(parent_flow_result)
-                    parent_flow.run_diff_flow()
-                    # Merge the new results into the main results object
-                    self.flow_result.merge_results(parent_flow_result)
-
-                # Run the diffing flow on the children of matched functions
-                source_set.clear()
-                target_set.clear()
-                for match_pair in self.flow_result.potentially_matched_bd_objects:
-                    for child_uuid in match_pair[2].get_children():
-                        for bd_object in self.flow_result.unmatched_sets['SourceSet']:
-                            if bd_object.uuid == child_uuid:
-                                source_set.add(bd_object)
-                                break
-                    for child_uuid in match_pair[3].get_children():
-                        for bd_object in self.flow_result.unmatched_sets['TargetSet']:
-                            if bd_object.uuid == child_uuid:
-                                target_set.add(bd_object)
-                                break
-                    child_flow_results: FlowResults = FlowResults(source_set, target_set)
-                    child_flow: FlowManager = FlowManager(child_flow_results)
-                    child_flow.run_diff_flow()
-                    # Merge the new results into the main results object
-                    self.flow_result.merge_results(child_flow_results)
-
-        log.log_debug(f'{"*" * 120} \n All Properties finished processing. Matched objects are: \n')
-        for match_pair in self.flow_result.matched_bd_objects:
-            log.log_debug(f'{"*" * 120} \n\n {match_pair[1]} <-> '
-                          f'{match_pair[2]}'
-                          f', Confidence: {match_pair[0]} \n'
-                          )
+        Log.log_debug('run_diff_flow(): Started Processing. Object type: %s, IR type: %s', self.target_bd_obj.name,
+                      self.target_bd_IR.name)
+
+        with self.instrumentation.span('flow', f'{self.target_bd_obj.name} initial matching'):
+            initial_matches = self.match_sets(self.flow_result.unmatched_sets['SourceSet'],
+                                              self.flow_result.unmatched_sets['TargetSet'])
+        self.instrumentation.count(f'{self.target_bd_obj.name}.initial_matches', len(initial_matches))
+        Log.log_info('run_diff_flow(): Initial matching found %d matches.', len(initial_matches))
+
+        with self.instrumentation.span('flow', f'{self.target_bd_obj.name} propagation'):
+            self.propagate_matches(initial_matches)
+
+        if Log.is_enabled(Log.DEBUG):
+            Log.log_debug('%s \n All Properties finished processing. Matched objects are: \n', "*" * 120)
+            for match_pair in self.flow_result.matched_bd_objects:
+                Log.log_debug('%s \n\n %s <-> %s, Confidence: %s \n', "*" * 120, match_pair[1], match_pair[2],
+                              match_pair[0])
 
         return self.flow_result
 
+    def match_sets(self, source_set: BDSet, target_set: BDSet) -> List[List]:
+        """
+        Run all the properties and selectors on the given subsets of the unmatched sets.
+        :return: The matched_bd_objects entries of the new matches found.
+        """
+        first_new_match = len(self.flow_result.matched_bd_objects)
+
+        for current_property in self.properties:
+            if not source_set or not target_set:
+                break
+
+            # Create the initial mapping according to the currently loaded property.
+            # This will update the potential_matched_sets.
+            Log.log_debug('Creating initial mapping for property: %s', current_property.property_name)
+            with self.instrumentation.span('property', current_property.property_name):
+                self.create_initial_mapping(current_property, source_set, target_set)
+
+            # Use Selectors to refine the search as much as possible.
+            # Each selector will attempt to uniquely match objects in the potential sets.
+            for current_selector in self.selectors:
+                Log.log_debug('Processing Selector %s...', current_selector.selector_name)
+                with self.instrumentation.span('selector', current_selector.selector_name):
+                    if current_selector.selector_comparison_result_type == \
+                            bd_enums.SelectorComparisonResultType.Boolean:
+                        self.match_by_boolean_selector(current_selector)
+                    elif current_selector.selector_comparison_result_type == \
+                            bd_enums.SelectorComparisonResultType.IntDistance:
+                        self.match_by_distance_selector(current_selector)
+
+            # After all property matches were "deep dive" matched by Selectors, remove the matched objects from the
+            # potential and unmatched sets so that further properties will not run on them.
+            Log.log_debug('Finished processing Property %s, running cleanup_match_sets().',
+                          current_property.property_name)
+            accepted_matches = self.cleanup_match_sets()
+            self.instrumentation.count(f'property.{current_property.property_name}.matches', len(accepted_matches))
+            for [_, source_match_obj, target_match_obj] in accepted_matches:
+                source_set.discard(source_match_obj)
+                target_set.discard(target_match_obj)
+            Log.log_debug('Finished cleanup.')
+
+        return self.flow_result.matched_bd_objects[first_new_match:]
+
+    def propagate_matches(self, matches: List[List]):
+        """
+        Iteratively propagate matches along the call graph (or CFG), in the manner of the BinDiff drill down:
+        For every matched pair, the unmatched parents of both objects and the unmatched children of both objects are
+        matched against each other. Matches found this way are queued for the next propagation round, and the
+        propagation stops at a fixed point, when a round does not produce any new matches.
+        Each matched pair is processed exactly once, and the number of matches every round produced is recorded in
+        flow_result.propagation_rounds.
+        """
+        worklist: List[List] = list(matches)
+        while worklist:
+            # Drill down from the most confident matches first, so their neighbourhoods are matched before the
+            # neighbourhoods of weaker matches claim the same objects.
+            worklist.sort(key=lambda match: match[0], reverse=True)
+
+            round_matches: List[List] = list()
+            round_name = f'{self.target_bd_obj.name} propagation round {len(self.flow_result.propagation_rounds) + 1}'
+            with self.instrumentation.span('propagation', round_name, {'worklist': len(worklist)}):
+                for [_, source_match_obj, target_match_obj] in worklist:
+                    for get_unmatched_neighbours in (self.flow_result.get_unmatched_parents,
+                                                     self.flow_result.get_unmatched_children):
+                        source_set = self.create_empty_set()
+                        source_set.update(get_unmatched_neighbours('SourceSet', source_match_obj))
+                        target_set = self.create_empty_set()
+                        target_set.update(get_unmatched_neighbours('TargetSet', target_match_obj))
+
+                        if source_set and target_set:
+                            round_matches.extend(self.match_sets(source_set, target_set))
+
+            self.instrumentation.count(f'{self.target_bd_obj.name}.propagation_round_matches', len(round_matches))
+            self.flow_result.propagation_rounds.append(len(round_matches))
+            Log.log_info('propagate_matches(): Round %d processed %d matches and produced %d new matches.',
+                         len(self.flow_result.propagation_rounds), len(worklist), len(round_matches))
+            worklist = round_matches
+
+    def create_empty_set(self) -> BDSet:
+        bd_set: BDSet = BDSet()
+        bd_set.base_object_type = self.target_bd_obj
+        bd_set.base_object_IR = self.target_bd_IR
+        return bd_set
+
     def _refine_potential_matches(self):
         # Further refine the potential matches by applying a confidence score to the match based on the
         # amount and quality of selectors used to match them.
-        # If a match is determined to be below the threshold defined in the Configuration file both BDObjects are
+        # If a match is determined to be below the threshold defined in the Configuration file, or conflicts with a
+        # more confident match of its source or target (see PotentialMatchTable.partition), both BDObjects are
         # returned to the un-matched pool for further matching attempts.
 
         threshold = Configuration.DEFAULT_THRESHOLD
@@ -200,48 +214,50 @@ class FlowManager:
         if self.target_bd_obj == bd_enums.TargetType.Instruction:
             threshold = Configuration.INSTRUCTION_SELECTOR_THRESHOLD
 
-        log.log_debug(f'_refine_potential_matches: Processing with threshold {threshold}')
+        Log.log_debug('_refine_potential_matches: Processing with threshold %s', threshold)
 
-        for potential_match in self.flow_result.potentially_matched_bd_objects:
-            [_, selector_confidence, source_match_obj, target_match_obj] = potential_match
-            if selector_confidence < threshold:
-                # By removing the potential_match from the list, it will not be deleted from the un-matched sets and
-                # thus further matching attempts will be made on the objects.
-                self.flow_result.potentially_matched_bd_objects.remove(potential_match)
-            else:
-                self.flow_result.matched_bd_objects.append([selector_confidence, source_match_obj, target_match_obj])
+        accepted_matches, rejected_matches = self.flow_result.potentially_matched_bd_objects.partition(threshold)
+        for [pair_uuid, _, _, _] in rejected_matches:
+            # By removing the potential_match from the table, it will not be deleted from the un-matched sets and
+            # thus further matching attempts will be made on the objects.
+            self.flow_result.potentially_matched_bd_objects.remove(pair_uuid)
+        for [_, selector_confidence, source_match_obj, target_match_obj] in accepted_matches:
+            self.flow_result.matched_bd_objects.append([selector_confidence, source_match_obj, target_match_obj])
 
-    def cleanup_match_sets(self):
+    def cleanup_match_sets(self) -> List[List]:
         """
         Responsible for removing all the matched BDObjects from the potential matches or unmatched sets.
+        :return: The matched_bd_objects entries of the matches accepted by this cleanup.
         """
+        first_new_match = len(self.flow_result.matched_bd_objects)
 
         # Remove matches with low confidence before performing cleanup
         self._refine_potential_matches()
 
         for [_, _, source_match_obj, target_match_obj] in self.flow_result.potentially_matched_bd_objects:
-            if source_match_obj in self.flow_result.unmatched_sets['SourceSet']:
-                self.flow_result.unmatched_sets['SourceSet'].remove(source_match_obj)
-            if target_match_obj in self.flow_result.unmatched_sets['TargetSet']:
-                self.flow_result.unmatched_sets['TargetSet'].remove(target_match_obj)
+            self.flow_result.remove_unmatched('SourceSet', source_match_obj)
+            self.flow_result.remove_unmatched('TargetSet', target_match_obj)
 
         # Clear the potential candidates list for the next Property diffing.
         self.flow_result.potentially_matched_bd_objects.clear()
 
-    def create_initial_mapping(self, current_property: Property):
+        return self.flow_result.matched_bd_objects[first_new_match:]
+
+    def create_initial_mapping(self, current_property: Property, source_set: BDSet, target_set: BDSet):
         """
         An initial "base" mapping is created by first dividing the sets into subsets of nodes that are coarsely related
         by using all Property objects found in the plugins directory, and later for each of the subset groups match
         them in a more refined way using the input selector.
         """
 
-        log.log_debug(f'\nProcessing Property {current_property.__class__}\n')
+        Log.log_debug('\nProcessing Property %s\n', current_property.__class__)
 
-        matched_sets: List[Tuple[BDSet, BDSet]] = current_property.exec_comparison_heuristic(
-            self.flow_result.unmatched_sets["SourceSet"],
-            self.flow_result.unmatched_sets["TargetSet"]
-        )
-        log.log_debug(f'Property {current_property.property_name} found {len(matched_sets)} matching sets.\n')
+        matched_sets: List[Tuple[BDSet, BDSet]] = current_property.exec_comparison_heuristic(source_set, target_set)
+        Log.log_debug('Property %s found %d matching sets.\n', current_property.property_name, len(matched_sets))
+        if self.instrumentation.enabled:
+            counter_name = f'property.{current_property.property_name}.candidate_pairs'
+            for potential_source_set, potential_target_set in matched_sets:
+                self.instrumentation.count(counter_name, len(potential_source_set) * len(potential_target_set))
 
         # Re-initialize the potential_matched_sets as the new initial mapping
         self.potential_matched_sets = matched_sets
@@ -252,43 +268,86 @@ class FlowManager:
         the given selector.
         This function only works on selectors that return a boolean value (meaning a True\False statement about the
         similarity of the objects).
+        Selectors that expose a comparison key are matched by hashing (see match_by_comparison_key), all other
+        selectors are executed on every source and target pair.
         """
         for potential_source_set, potential_target_set in self.potential_matched_sets:
-            log.log_info(f'Selector {selector.selector_name}: Started processing. \n')
-            for source_obj in potential_source_set:
-                # Only a unique match applies - i.e if the source matches more then 1 single destination object
-                # then no match is recorded.
-                match_count = 0
-                matched_objs: Optional[Tuple[BDObject, BDObject]] = None
-                for target_obj in potential_target_set:
-                    if selector.exec_comparison_heuristic(source_obj, target_obj):
-                        if match_count > 1:
-                            # More then 1 match, no unique match found.
-                            matched_objs = None
-                            break
-                        else:
-                            match_count += 1
-                            matched_objs = (source_obj, target_obj)
-
-                if matched_objs:
-                    # The Selector has found a unique match between the source and target objects.
-                    matched_objs_uuid = xxhash.xxh32(str(matched_objs[0].uuid) + str(matched_objs[1].uuid)).intdigest()
-                    existing_match = None
-                    for potential_match in self.flow_result.potentially_matched_bd_objects:
-                        if potential_match[0] == matched_objs_uuid:
-                            existing_match = True
-                            # Calculate the avarage selector quality
-                            potential_match[1] = (potential_match[1] + selector.selector_quality.value) / 2
-                            break
-                    if not existing_match:
-                        # If the pair of Objects has yet to be matched by a selector, enter the first entry for it
-                        # in the potential table.
-                        self.flow_result.potentially_matched_bd_objects.append([matched_objs_uuid,
-                                                                                selector.selector_quality.value,
-                                                                                matched_objs[0], matched_objs[1]])
-                        log.log_debug(f'Selector {selector.selector_name} found a match: {matched_objs[0]} <-> '
-                                      f'{matched_objs[1]}, '
-                                      f'{selector.selector_quality.value}')
+            # Logged once per potential set pair, which can be tens of thousands of times per flow.
+            Log.log_rate_limited(Log.INFO, 'match_by_boolean_selector', 10,
+                                 'Selector %s: Started processing. \n', selector.selector_name)
+            if selector.selector_has_comparison_key:
+                matches = self.match_by_comparison_key(selector, potential_source_set, potential_target_set)
+            else:
+                matches = self.match_by_pairwise_comparison(selector, potential_source_set, potential_target_set)
+
+            self.instrumentation.count(f'selector.{selector.selector_name}.matches', len(matches))
+            for source_obj, target_obj in matches:
+                self.add_potential_match(selector, source_obj, target_obj)
+
+    @staticmethod
+    def match_by_pairwise_comparison(selector: Selector, potential_source_set: BDSet,
+                                     potential_target_set: BDSet) -> List[Tuple[BDObject, BDObject]]:
+        """
+        Match each source object to the single target object it is similar to, by executing the selector on every
+        source and target pair - O(n*m).
+        """
+        matches: List[Tuple[BDObject, BDObject]] = list()
+        for source_obj in potential_source_set:
+            # Only a unique match applies - i.e if the source matches more then 1 single destination object
+            # then no match is recorded.
+            matched_objs: Optional[Tuple[BDObject, BDObject]] = None
+            for target_obj in potential_target_set:
+                if selector.exec_comparison_heuristic(source_obj, target_obj):
+                    if matched_objs:
+                        # More then 1 match, no unique match found.
+                        matched_objs = None
+                        break
+                    else:
+                        matched_objs = (source_obj, target_obj)
+
+            if matched_objs:
+                matches.append(matched_objs)
+
+        return matches
+
+    @staticmethod
+    def match_by_comparison_key(selector: Selector, potential_source_set: BDSet,
+                                potential_target_set: BDSet) -> List[Tuple[BDObject, BDObject]]:
+        """
+        Hash join the source and target sets on the selector comparison key - O(n+m).
+        Both sets are bucketed by their comparison key once, and a match is reported only for keys that are unique in
+        both the source set and the target set.
+        """
+        source_buckets: Dict[Hashable, List[BDObject]] = dict()
+        for source_obj in potential_source_set:
+            source_key = selector.get_comparison_key(source_obj)
+            if source_key is not None:
+                source_buckets.setdefault(source_key, []).append(source_obj)
+
+        target_buckets: Dict[Hashable, List[BDObject]] = dict()
+        for target_obj in potential_target_set:
+            target_key = selector.get_comparison_key(target_obj)
+            if target_key is not None:
+                target_buckets.setdefault(target_key, []).append(target_obj)
+
+        matches: List[Tuple[BDObject, BDObject]] = list()
+        for key, source_objs in source_buckets.items():
+            target_objs = target_buckets.get(key)
+            if target_objs and len(source_objs) == 1 and len(target_objs) == 1:
+                matches.append((source_objs[0], target_objs[0]))
+
+        return matches
+
+    def add_potential_match(self, selector: Selector, source_obj: BDObject, target_obj: BDObject):
+        """
+        Record a unique match made by the selector in the potential match table, or update the confidence of the pair
+        if it was already matched by a previous selector.
+        """
+        if self.flow_result.potentially_matched_bd_objects.upsert(source_obj, target_obj,
+                                                                   selector.selector_quality.value):
+            Log.log_sampled(Log.DEBUG, selector.selector_name, Configuration.LOG_SAMPLE_RATE,
+                            'Selector %s found a match: %s <-> %s, %s', selector.selector_name, source_obj, target_obj,
+                            selector.selector_quality.value)
 
     def match_by_distance_selector(self, selector: Selector):
         """
@@ -296,41 +355,73 @@ class FlowManager:
         the given selector as an int value indicating the similarity distance between the objects.
         This function only works on selectors that return an int value (meaning a similarity score between 2 objects).
         The match is made by finding the closest unique between the scores. (scores do NOT need to be equal, just close)
+        Selectors that expose a feature vector are matched through a nearest neighbour index
+        (see match_by_nearest_neighbour), all other selectors are executed on every source and target pair.
         """
 
         for potential_source_set, potential_target_set in self.potential_matched_sets:
-            for source_obj in potential_source_set:
-                # Only a unique match applies - i.e if the source matches more then 1 single destination object
-                # then no match is recorded.
-                minimal_match_score = pow(2, 32)
-                matched_objs: Optional[Tuple[BDObject, BDObject]] = None
-                for target_obj in potential_target_set:
-                    current_match_score = selector.exec_comparison_heuristic(source_obj, target_obj)
-                    if current_match_score == minimal_match_score:
-                        minimal_match_score = pow(2, 32)
-                        matched_objs = None
-                    elif current_match_score < minimal_match_score:
-                        minimal_match_score = current_match_score
-                        matched_objs = (source_obj, target_obj)
+            if selector.selector_has_feature_vector:
+                matches = self.match_by_nearest_neighbour(selector, potential_source_set, potential_target_set)
+            else:
+                matches = self.match_by_pairwise_distance(selector, potential_source_set, potential_target_set)
 
-                if matched_objs:
-                    # A unique minimal match was found
-
-                    matched_objs_uuid = xxhash.xxh32(str(matched_objs[0].uuid) + str(matched_objs[1].uuid)).intdigest()
-                    existing_match = False
-                    for potential_match in self.flow_result.potentially_matched_bd_objects:
-                        if potential_match[0] == matched_objs_uuid:
-                            existing_match = True
-                            # Calculate the average selector quality
-                            potential_match[1] = (potential_match[1] + selector.selector_quality.value) / 2
-                            break
-                    if not existing_match:
-                        # If the pair of Objects has yet to be matched by a selector, enter the first entry for it
-                        # in the potential table.
-                        self.flow_result.potentially_matched_bd_objects.append([matched_objs_uuid,
-                                                                                selector.selector_quality.value,
-                                                                                matched_objs[0], matched_objs[1]])
-                        log.log_debug(f'Selector {selector} found a match: {matched_objs[0]} <-> '
-                                      f'{matched_objs[1]}, '
-                                      f'{selector.selector_quality.value}')
+            self.instrumentation.count(f'selector.{selector.selector_name}.matches', len(matches))
+            for source_obj, target_obj in matches:
+                self.add_potential_match(selector, source_obj, target_obj)
 
+    @staticmethod
+    def match_by_pairwise_distance(selector: Selector, potential_source_set: BDSet,
+                                   potential_target_set: BDSet) -> List[Tuple[BDObject, BDObject]]:
+        """
+        Match each source object to the target object with the unique minimal distance from it, by executing the
+        selector on every source and target pair - O(n*m).
+        """
+        matches: List[Tuple[BDObject, BDObject]] = list()
+        for source_obj in potential_source_set:
+            # Only a unique match applies - i.e if the minimal distance is shared by more then 1 single destination
+            # object then no match is recorded.
+            minimal_match_score = math.inf
+            matched_objs: Optional[Tuple[BDObject, BDObject]] = None
+            for target_obj in potential_target_set:
+                current_match_score = selector.exec_comparison_heuristic(source_obj, target_obj)
+                if current_match_score == minimal_match_score:
+                    matched_objs = None
+                elif current_match_score < minimal_match_score:
+                    minimal_match_score = current_match_score
+                    matched_objs = (source_obj, target_obj)
+
+            if matched_objs:
+                matches.append(matched_objs)
+
+        return matches
+
+    @staticmethod
+    def match_by_nearest_neighbour(selector: Selector, potential_source_set: BDSet,
+                                   potential_target_set: BDSet) -> List[Tuple[BDObject, BDObject]]:
+        """
+        Match each source object to the target object with the unique minimal distance from it - O(n log n).
+        The target set feature vectors are indexed once (a sorted array for 1-D vectors, a KD-tree otherwise), and
+        each source object queries the index for its nearest and second nearest targets. The match is unique if the
+        nearest target is strictly closer than the second nearest one.
+        """
+        target_points = list()
+        for target_obj in potential_target_set:
+            target_vector = selector.get_feature_vector(target_obj)
+            if target_vector is not None:
+                target_points.append((target_vector, target_obj))
+
+        matches: List[Tuple[BDObject, BDObject]] = list()
+        if not target_points:
+            return matches
+
+        neighbour_index = NearestNeighbours.build_neighbour_index(target_points)
+        for source_obj in potential_source_set:
+            source_vector = selector.get_feature_vector(source_obj)
+            if source_vector is None:
+                continue
+
+            neighbours = neighbour_index.two_nearest(source_vector)
+            if len(neighbours) == 1 or neighbours[0][0] < neighbours[1][0]:
+                matches.append((source_obj, neighbours[0][1]))
+
+        return matches
@@ -1,5 +1,6 @@
 from typing import *
 from ..Abstracts import BDObject, BDSet
+from .MatchTable import PotentialMatchTable
 
 
 class FlowResults:
@@ -18,14 +19,14 @@ class FlowResults:
         #                     sub-BDObjects that compose it (e.g a BDFunction entry will contain the FlowResults
         #                     of its matched BDBasicBlock).
         self.matched_bd_objects: List[List[AnyStr, BDObject, BDObject, FlowResults]] = list()
-        # potentially_matched_bd_objects: A list containing objects that were matched by different Selectors. The
-        #                                 selector quality is added to the overall match quality in each tuple in
+        # potentially_matched_bd_objects: A table containing objects that were matched by different Selectors. The
+        #                                 selector quality is added to the overall match quality in each entry in
         #                                 order to calculate the confidence score for this match.
         #                                 If the confidence score is higher then the threshold defined in the Config
         #                                 file, the BDObjects are moved to the matched_bd_objects list.
-        #                                 The first item in the tuple represents the uuid of the 2 BDObjects in order
-        #                                 to quickly evaluate if the pair has already been matched by another Selector.
-        self.potentially_matched_bd_objects: List[List[AnyStr, SupportsInt, BDObject, BDObject]] = list()
+        #                                 Entries are keyed by the uuid of the 2 BDObjects in order to quickly
+        #                                 evaluate if the pair has already been matched by another Selector.
+        self.potentially_matched_bd_objects: PotentialMatchTable = PotentialMatchTable()
         # potential_matched_sets: A list containing tuples of sets that contain BDObjects that were detected by a
         #                         Property to be similar.
         #                         The sets will be further refined by running Selectors on them.
@@ -35,16 +36,57 @@ class FlowResults:
         #                 refined by Selectors.
         self.unmatched_sets: Dict[AnyStr, BDSet, AnyStr, BDSet] = {'SourceSet': source_base_set,
                                                                    'TargetSet': target_base_set}
+        # propagation_rounds: The amount of new matches produced by each round of match propagation.
+        self.propagation_rounds: List[int] = list()
+        # unmatched_index: Resolves the uuid of an unmatched BDObject to the object itself, per unmatched set.
+        #                  Must be kept in sync with unmatched_sets, so objects should only be removed from the
+        #                  unmatched sets through remove_unmatched().
+        self.unmatched_index: Dict[AnyStr, Dict[int, BDObject]] = {
+            set_name: {bd_object.uuid: bd_object for bd_object in bd_set}
+            for set_name, bd_set in self.unmatched_sets.items()
+        }
+        # adjacency_cache: {BDObject.uuid: (parents uuids, children uuids)} - the call graph \ CFG neighbours of every
+        #                  object the flow propagated through, so they are only resolved once per object.
+        self.adjacency_cache: Dict[int, Tuple[List[int], List[int]]] = dict()
+
+    def remove_unmatched(self, set_name: AnyStr, bd_object: BDObject):
+        """
+        Remove a BDObject from the given unmatched set (if it is still there).
+        """
+        self.unmatched_sets[set_name].discard(bd_object)
+        self.unmatched_index[set_name].pop(bd_object.uuid, None)
+
+    def get_unmatched(self, set_name: AnyStr, uuid: int) -> Optional[BDObject]:
+        return self.unmatched_index[set_name].get(uuid)
+
+    def get_adjacency(self, bd_object: BDObject) -> Tuple[List[int], List[int]]:
+        adjacency = self.adjacency_cache.get(bd_object.uuid)
+        if adjacency is None:
+            adjacency = (bd_object.parents, bd_object.children)
+            self.adjacency_cache[bd_object.uuid] = adjacency
+        return adjacency
+
+    def get_unmatched_parents(self, set_name: AnyStr, bd_object: BDObject) -> List[BDObject]:
+        """
+        :return: The parents of bd_object which are still in the given unmatched set.
+        """
+        unmatched_index = self.unmatched_index[set_name]
+        return [unmatched_index[uuid] for uuid in self.get_adjacency(bd_object)[0] if uuid in unmatched_index]
+
+    def get_unmatched_children(self, set_name: AnyStr, bd_object: BDObject) -> List[BDObject]:
+        """
+        :return: The children of bd_object which are still in the given unmatched set.
+        """
+        unmatched_index = self.unmatched_index[set_name]
+        return [unmatched_index[uuid] for uuid in self.get_adjacency(bd_object)[1] if uuid in unmatched_index]
 
     def merge_results(self, result_to_merge):
         # Add each new matched BDObject pair to matched list, and remove the pair from the unmatched list
         for matched_bd_object in result_to_merge.matched_bd_objects:
             if matched_bd_object not in self.matched_bd_objects:
                 self.matched_bd_objects.append(matched_bd_object)
-            if matched_bd_object[1] in self.unmatched_sets['SourceSet']:
-                self.unmatched_sets['SourceSet'].remove(matched_bd_object[1])
-            if matched_bd_object[2] in self.unmatched_sets['TargetSet']:
-                self.unmatched_sets['TargetSet'].remove(matched_bd_object[1])
+            self.remove_unmatched('SourceSet', matched_bd_object[1])
+            self.remove_unmatched('TargetSet', matched_bd_object[2])
 
     def get_average_quality(self) -> int:
         """
@@ -0,0 +1,120 @@
+from typing import *
+from ..Abstracts.BDObject import BDObject
+
+# The uuid of a potential match is the pair of uuids of the matched source and target BDObjects.
+PairUUID = Tuple[int, int]
+
+
+class PotentialMatchTable:
+    """
+    Holds the potential matches found by Selectors, keyed by the uuid of the matched pair.
+    Each entry is a list of [pair_uuid, confidence, source_obj, target_obj], where the confidence is the running
+    average of the qualities of all the selectors that matched the pair.
+    The table also indexes its entries by the source and by the target object, so that all the potential matches
+    of a single BDObject can be found without scanning the whole table.
+    """
+
+    def __init__(self):
+        # entries: {pair_uuid: [pair_uuid, confidence, source_obj, target_obj]}
+        self.entries: Dict[PairUUID, List] = dict()
+        # by_source \ by_target: {BDObject.uuid: {pair_uuid, ...}}
+        self.by_source: Dict[int, Set[PairUUID]] = dict()
+        self.by_target: Dict[int, Set[PairUUID]] = dict()
+
+    @staticmethod
+    def generate_pair_uuid(source_obj: BDObject, target_obj: BDObject) -> PairUUID:
+        return source_obj.uuid, target_obj.uuid
+
+    def upsert(self, source_obj: BDObject, target_obj: BDObject, quality: SupportsInt) -> bool:
+        """
+        Add a potential match to the table, or average the quality into its confidence if the pair already exists.
+        :return: True if a new entry was created, False if an existing entry was updated.
+        """
+        pair_uuid = self.generate_pair_uuid(source_obj, target_obj)
+        entry = self.entries.get(pair_uuid)
+        if entry:
+            # Calculate the average selector quality
+            entry[1] = (entry[1] + quality) / 2
+            return False
+
+        self.entries[pair_uuid] = [pair_uuid, quality, source_obj, target_obj]
+        self.by_source.setdefault(source_obj.uuid, set()).add(pair_uuid)
+        self.by_target.setdefault(target_obj.uuid, set()).add(pair_uuid)
+        return True
+
+    def get(self, pair_uuid: PairUUID) -> Optional[List]:
+        return self.entries.get(pair_uuid)
+
+    def get_by_source(self, source_obj: BDObject) -> List[List]:
+        return [self.entries[pair_uuid] for pair_uuid in self.by_source.get(source_obj.uuid, ())]
+
+    def get_by_target(self, target_obj: BDObject) -> List[List]:
+        return [self.entries[pair_uuid] for pair_uuid in self.by_target.get(target_obj.uuid, ())]
+
+    def remove(self, pair_uuid: PairUUID):
+        entry = self.entries.pop(pair_uuid, None)
+        if entry:
+            self._unindex(self.by_source, entry[2].uuid, pair_uuid)
+            self._unindex(self.by_target, entry[3].uuid, pair_uuid)
+
+    @staticmethod
+    def _unindex(index: Dict[int, Set[PairUUID]], obj_uuid: int, pair_uuid: PairUUID):
+        pair_uuids = index.get(obj_uuid)
+        if pair_uuids is not None:
+            pair_uuids.discard(pair_uuid)
+            if not pair_uuids:
+                del index[obj_uuid]
+
+    def partition(self, threshold: SupportsInt) -> Tuple[List[List], List[List]]:
+        """
+        Split the table entries into the accepted and the rejected matches - a source (or target) object may only be
+        matched to a single object.
+        Entries with a confidence below threshold are rejected. The rest are accepted from the most confident one down,
+        and accepting an entry rejects all the other entries of its source and of its target (found through the
+        by_source and by_target indexes). An entry that is as confident as another entry of its source or target is
+        ambiguous, so it is rejected along with all the other entries of its source and target.
+        :return: (accepted entries, rejected entries)
+        """
+        accepted: List[List] = list()
+        rejected: List[List] = list()
+        # pending: {pair_uuid: entry} of the entries above the threshold that were not accepted or rejected yet.
+        pending: Dict[PairUUID, List] = dict()
+        for pair_uuid, entry in self.entries.items():
+            if entry[1] < threshold:
+                rejected.append(entry)
+            else:
+                pending[pair_uuid] = entry
+
+        for entry in sorted(pending.values(), key=lambda pending_entry: pending_entry[1], reverse=True):
+            pair_uuid = entry[0]
+            if pair_uuid not in pending:
+                continue
+            del pending[pair_uuid]
+
+            competitors = [pending.pop(competitor_uuid) for competitor_uuid in
+                           self.by_source[entry[2].uuid] | self.by_target[entry[3].uuid]
+                           if competitor_uuid in pending]
+            if any(competitor[1] == entry[1] for competitor in competitors):
+                rejected.append(entry)
+            else:
+                accepted.append(entry)
+            rejected.extend(competitors)
+
+        return accepted, rejected
+
+    def clear(self):
+        self.entries.clear()
+        self.by_source.clear()
+        self.by_target.clear()
+
+    def __contains__(self, pair_uuid: PairUUID) -> bool:
+        return pair_uuid in self.entries
+
+    def __iter__(self) -> Iterator[List]:
+        return iter(self.entries.values())
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __repr__(self):
+        return repr(list(self.entries.values()))
@@ -4,6 +4,7 @@ from ..Abstracts import Attribute, Selector, Property
 from typing import Dict
 from binaryninja import *
 from ..Enums import bd_enums
+from ..Utility import Log
 
 
 def import_attributes(target_ir: bd_enums.IRType):
@@ -17,8 +18,8 @@ def import_attributes(target_ir: bd_enums.IRType):
             attr_instance = attribute_class_obj()
             loaded_attributes.update({module_name: attr_instance})
         except ModuleNotFoundError:
-            log.log_debug(f'import_attributes: No package named NinjDiff.Operation.Attributes.{target_ir.value} found')
-    log.log_debug(f'Loaded the following Attribute plugins: \n {loaded_attributes}')
+            Log.log_debug('import_attributes: No package named NinjDiff.Operation.Attributes.%s found', target_ir.value)
+    Log.log_debug('Loaded the following Attribute plugins: \n %s', loaded_attributes)
 
     return loaded_attributes
 
@@ -32,7 +33,7 @@ def import_properties(target_ir: bd_enums.IRType):
         property_class_obj: Property = getattr(property_module, module_name)
         loaded_properties.update({module_name: property_class_obj})
 
-    log.log_debug(f'Loaded the following Property plugins: \n {loaded_properties}')
+    Log.log_debug('Loaded the following Property plugins: \n %s', loaded_properties)
 
     return loaded_properties
 
@@ -46,6 +47,6 @@ def import_selectors(target_ir: bd_enums.IRType):
         selector_class_obj: Selector = getattr(selector_module, module_name)
         loaded_selectors.update({module_name: selector_class_obj})
 
-    log.log_debug(f'Loaded the following Selector plugins: \n {loaded_selectors}')
+    Log.log_debug('Loaded the following Selector plugins: \n %s', loaded_selectors)
 
     return loaded_selectors
@@ -1,53 +1,68 @@
-from typing import Tuple
+from typing import Tuple, TYPE_CHECKING
 
 from ...Abstracts.BDObject import BDObject
 from ...Abstracts.BDSet import BDSet
 from ...Enums import bd_enums
-import binaryninja
+from ... import Configuration
 import xxhash
 
+if TYPE_CHECKING:
+    import binaryninja
+
 
 class BDBasicBlock(BDObject):
     """
     Represents a Basic Block operand for comparisons
     """
 
+    __slots__ = ('parent_bd_function', 'start', 'index')
+
     bd_obj_type = bd_enums.TargetType.BasicBlock
     bd_obj_IR: bd_enums.IRType = bd_enums.IRType.Assembly
 
-    def __init__(self, bn_basic_block: binaryninja.BasicBlock, parent_bd_function):
-        self.underlying_obj: binaryninja.BasicBlock = bn_basic_block
+    def __init__(self, bn_basic_block: 'binaryninja.BasicBlock', parent_bd_function):
         self.parent_bd_function = parent_bd_function
-        super().__init__()
+        # The start address and index identify the basic block inside its function, and are used to resolve it.
+        self.start: int = bn_basic_block.start
+        self.index: int = bn_basic_block.index
+        super().__init__(bn_basic_block)
         self.uuid = self.generate_uuid(self.underlying_obj)
 
+    def resolve_underlying_obj(self) -> 'binaryninja.BasicBlock':
+        return self.parent_bd_function.underlying_obj.get_basic_block_at(self.start)
+
+    def get_cache_address(self) -> Tuple[int, int]:
+        return self.parent_bd_function.start, self.start
+
     def get_parents(self):
-        children_list = list()
+        parents_list = list()
         for incoming_branch in self.underlying_obj.incoming_edges:
-            children_list.append(self.generate_uuid(incoming_branch.target))
-        return children_list
+            parents_list.append(self.generate_uuid(incoming_branch.source))
+        return parents_list
 
     def get_children(self):
-        parents_list = list()
+        children_list = list()
         for outgoing_branch in self.underlying_obj.outgoing_edges:
-            parents_list.append(self.generate_uuid(outgoing_branch.target))
-        return parents_list
+            children_list.append(self.generate_uuid(outgoing_branch.target))
+        return children_list
 
     @staticmethod
-    def generate_uuid(bn_basic_block: binaryninja.BasicBlock):
-        uuid = xxhash.xxh32()
+    def generate_uuid(bn_basic_block: 'binaryninja.BasicBlock'):
+        # Basic block uuids are unique in the DB, so they are 64 bit wide to make collisions unlikely.
+        uuid = xxhash.xxh64()
         uuid.update(str(bn_basic_block.disassembly_text))
         uuid.update(str(bn_basic_block.index))
         uuid.update(bn_basic_block.function.name)
         uuid.update(bn_basic_block.view.file.filename)
 
-        return uuid.intdigest()
+        # Neo4j only supports JAVA long values
+        return uuid.intdigest() & Configuration.MAX_INT
 
     def __hash__(self):
         return self.uuid
 
     def __repr__(self):
-        return hex(self.underlying_obj.start) + '-' + str(self.underlying_obj.index)
+        return hex(self.start) + '-' + str(self.index)
 
     def __str__(self):
         return self.__repr__()
@@ -58,12 +73,14 @@ class BDBasicBlockEdge(BDObject):
     Represents a Control Flow Graph edge - a directed link between 2 BDBasicBlock objects.
     """
 
+    __slots__ = ()
+
     bd_obj_type = bd_enums.TargetType.BasicBlockEdge
     bd_obj_IR: bd_enums.IRType = bd_enums.IRType.Assembly
 
     def __init__(self, source_bd_bb: BDBasicBlock, target_bd_bb: BDBasicBlock):
-        self.underlying_obj: Tuple = (source_bd_bb, target_bd_bb)
-        super().__init__()
+        # The underlying object is the (source, target) BDBasicBlock pair, which is never released.
+        super().__init__((source_bd_bb, target_bd_bb))
         self.uuid = self.generate_uuid(self.underlying_obj[0], self.underlying_obj[1])
 
     def get_parents(self) -> None:
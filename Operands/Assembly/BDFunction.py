@@ -2,28 +2,42 @@ from ...Abstracts.BDObject import BDObject
 from ...Abstracts.BDSet import BDSet
 from .BDBasicBlock import BDBasicBlock
 from ...Enums import bd_enums
-import binaryninja
+import bisect
 import xxhash
-from typing import Dict
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
 from ... import Configuration
 
+if TYPE_CHECKING:
+    import binaryninja
+
 
 class BDFunction(BDObject):
     """
     Represents a Function operand for comparisons
     """
 
+    __slots__ = ('view', 'start', 'name', 'bd_basic_blocks', 'basic_block_call_sites')
+
     bd_obj_type = bd_enums.TargetType.Function
     bd_obj_IR: bd_enums.IRType = bd_enums.IRType.Assembly
 
-    def __init__(self, bn_func: binaryninja.Function):
-        self.underlying_obj: binaryninja.Function = bn_func
-        super().__init__()
+    def __init__(self, bn_func: 'binaryninja.Function'):
+        # The view and start address identify the function, and are used to resolve it.
+        self.view: 'binaryninja.BinaryView' = bn_func.view
+        self.start: int = bn_func.start
+        self.name: str = bn_func.name
+        super().__init__(bn_func)
         self.uuid = self.generate_uuid(self.underlying_obj)
 
         # bd_basic_blocks {BDBasicBlock.uuid: BDBasicBlock
         self.bd_basic_blocks: Dict[int, BDBasicBlock] = dict()
 
+        # basic_block_call_sites {basic block start address: [call site address, ...]}, built on first use.
+        self.basic_block_call_sites: Optional[Dict[int, List[int]]] = None
+
+    def resolve_underlying_obj(self) -> 'binaryninja.Function':
+        return self.view.get_function_at(self.start)
+
     def get_parents(self):
         parents_list = list()
         for func in self.underlying_obj.callers:
@@ -37,30 +51,64 @@ class BDFunction(BDObject):
         return children_list
 
     @staticmethod
-    def generate_uuid(underlying_function_object: binaryninja.Function):
-        uuid = xxhash.xxh32()
+    def generate_uuid(underlying_function_object: 'binaryninja.Function'):
+        # Function uuids are unique in the DB, so they are 64 bit wide to make collisions unlikely.
+        uuid = xxhash.xxh64()
         uuid.update(underlying_function_object.name)
         uuid.update(underlying_function_object.view.file.filename)
 
-        return uuid.intdigest()
+        # Neo4j only supports JAVA long values
+        return uuid.intdigest() & Configuration.MAX_INT
+
+    def get_cache_address(self) -> Tuple[int, int]:
+        return self.start, self.start
 
     def populate_basic_blocks(self):
         if self.bd_basic_blocks:
             # Basic Blocks are already populated
             pass
         else:
-            for bb in self.underlying_obj.basic_blocks:
-                bd_basic_block = BDBasicBlock(bb, self)
+            basic_blocks = self.underlying_obj.basic_blocks
+            bd_basic_blocks: Dict[int, BDBasicBlock] = dict()
+            for bb in basic_blocks:
+                bd_basic_blocks[bb.index] = BDBasicBlock(bb, self)
+
+            # The CFG adjacency of all basic blocks is built in one pass over the edges, by the index of each neighbour,
+            # instead of generating the uuid of every neighbour of every basic block.
+            for bb in basic_blocks:
+                bd_basic_blocks[bb.index].set_adjacency(
+                    [bd_basic_blocks[edge.source.index].uuid for edge in bb.incoming_edges],
+                    [bd_basic_blocks[edge.target.index].uuid for edge in bb.outgoing_edges])
+
+            for bd_basic_block in bd_basic_blocks.values():
                 self.bd_basic_blocks.update({bd_basic_block.uuid: bd_basic_block})
 
+    def get_basic_block_call_sites(self) -> Dict[int, List[int]]:
+        """
+        Bucket the call sites of the function by the basic block containing them.
+        The buckets are built once per function, by a binary search over the sorted basic block start addresses.
+        :return: {basic block start address: [call site address, ...]}
+        """
+        if self.basic_block_call_sites is None:
+            basic_blocks = sorted(self.underlying_obj.basic_blocks, key=lambda bb: bb.start)
+            basic_block_starts = [bb.start for bb in basic_blocks]
+
+            self.basic_block_call_sites = {bb_start: list() for bb_start in basic_block_starts}
+            for call_site in self.underlying_obj.call_sites:
+                position = bisect.bisect_right(basic_block_starts, call_site.address) - 1
+                if position >= 0 and call_site.address < basic_blocks[position].end:
+                    self.basic_block_call_sites[basic_block_starts[position]].append(call_site.address)
+
+        return self.basic_block_call_sites
+
     def __hash__(self):
         return self.uuid
 
     def __repr__(self):
-        return self.underlying_obj.name
+        return self.name
 
     def __str__(self):
-        return self.underlying_obj.name
+        return self.name
 
 
 class BDFunctionSet(BDSet):
@@ -73,3 +121,34 @@ class BDFunctionSet(BDSet):
 
     def __init__(self):
         super().__init__()
+
+    @classmethod
+    def from_binary_view(cls, bv: 'binaryninja.BinaryView',
+                         min_instruction_length: int = Configuration.MIN_FUNCTION_INSTRUCTION_LENGTH):
+        """
+        Create a BDFunction for every function in the binary view with at least min_instruction_length instructions.
+        The call graph adjacency of all the functions is built in one pass over the callees of each function, and the
+        uuid of each function is only generated once.
+        """
+        functions: List['binaryninja.Function'] = list(bv.functions)
+        function_uuids: Dict[int, int] = {func.start: BDFunction.generate_uuid(func) for func in functions}
+
+        children: Dict[int, List[int]] = dict()
+        parents: Dict[int, List[int]] = {func_start: list() for func_start in function_uuids}
+        for func in functions:
+            func_children = children[func.start] = list()
+            for callee in func.callees:
+                callee_uuid = function_uuids.get(callee.start)
+                if callee_uuid is None:
+                    callee_uuid = function_uuids[callee.start] = BDFunction.generate_uuid(callee)
+                func_children.append(callee_uuid)
+                parents.setdefault(callee.start, list()).append(function_uuids[func.start])
+
+        function_set = cls()
+        for func in functions:
+            if sum(1 for _ in func.instructions) >= min_instruction_length:
+                bd_func = BDFunction(func)
+                bd_func.set_adjacency(parents[func.start], children[func.start])
+                function_set.add(bd_func)
+
+        return function_set
@@ -1,6 +1,7 @@
 from ....Enums import bd_enums
 from ....Operands.Assembly.BDBasicBlock import BDBasicBlock
 from ....Abstracts.Attribute import Attribute
+from ....Utility import Log, ViewCache
 from typing import Dict, Optional
 import xxhash
 from binaryninja import *
@@ -10,8 +11,12 @@ class BasicBlockCallees(Attribute):
     """
     Get the hash of the names of the callees in the basic block.
     Un-documented function are not considered for this Attribute.
+    The call sites of the basic block are taken from the call site buckets of its function (see
+    BDFunction.get_basic_block_call_sites), and the callee names are memoised per binary view.
     """
 
+    callee_names_key: str = 'NinjDiff.BasicBlockCallees.callee_names'
+
     def __init__(self):
         super().__init__(name='BasicBlockCallees', value_type=bd_enums.AttrScope.Contextual,
                          ir_type=bd_enums.IRType.Assembly, target_type=bd_enums.TargetType.BasicBlock)
@@ -24,16 +29,21 @@ class BasicBlockCallees(Attribute):
             pass
         else:
             names_hash = xxhash.xxh32()
-            bb_start = base_object.underlying_obj.start
-            bb_end = base_object.underlying_obj.end
-
-            for call_site in base_object.underlying_obj.function.call_sites:
-                if call_site.address in range(bb_start, bb_end):
-                    bv: BinaryView = base_object.underlying_obj.view
-                    for callee in bv.get_callees(call_site.address):
-                        callee_name: str = bv.get_function_at(callee).name
-                        if callee_name and not callee_name.startswith('sub_'):
-                            names_hash.update(callee_name)
+            bv: BinaryView = base_object.underlying_obj.view
+            # callee_names {callee address: callee function name (None if there is no function there)}
+            callee_names: Dict[int, Optional[str]] = ViewCache.get_view_value(bv, self.callee_names_key,
+                                                                              lambda view: dict())
+
+            call_sites = base_object.parent_bd_function.get_basic_block_call_sites()
+            for call_site_address in call_sites.get(base_object.underlying_obj.start, []):
+                for callee in bv.get_callees(call_site_address):
+                    if callee not in callee_names:
+                        callee_function: Function = bv.get_function_at(callee)
+                        callee_names[callee] = callee_function.name if callee_function else None
+
+                    callee_name = callee_names[callee]
+                    if callee_name and not callee_name.startswith('sub_'):
+                        names_hash.update(callee_name)
 
             BasicBlockCallees_value = {
                 'callee_names_hash': names_hash.intdigest()
@@ -41,6 +51,6 @@ class BasicBlockCallees(Attribute):
             base_object.add_attribute_value('BasicBlockCallees', BasicBlockCallees_value)
 
             if names_hash.intdigest() == 0:
-                log.log_debug(f'BasicBlockCallees: No names to extract, names_hash is 0')
+                Log.log_debug('BasicBlockCallees: No names to extract, names_hash is 0')
 
         return BasicBlockCallees_value if BasicBlockCallees_value else None
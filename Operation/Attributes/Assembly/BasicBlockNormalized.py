@@ -2,6 +2,7 @@ from ....Enums import bd_enums
 from ....Operands.Assembly.BDFunction import BDFunction
 from ....Operands.Assembly.BDBasicBlock import BDBasicBlock
 from ....Abstracts.Attribute import Attribute
+from ....Utility import Log
 import hashlib
 import pyprimesieve
 from binaryninja import *
@@ -44,7 +45,7 @@ class BasicBlockNormalized(Attribute):
                         else:
                             normalized_disassembly.append(instruction_text_token.text)
                     except TypeError as e:
-                        log.log_debug(f'BasicBlockNormalized: Exception while trying to normalize - {e}')
+                        Log.log_debug('BasicBlockNormalized: Exception while trying to normalize - %s', e)
                         pass
 
             BasicBlockNormalized_value = {
@@ -15,9 +15,6 @@ class FunctionCallSiteTargets(Attribute):
         super().__init__(name='FunctionCallSiteTargets', value_type=bd_enums.AttrScope.Contextual,
                          ir_type=bd_enums.IRType.Assembly, target_type=bd_enums.TargetType.Function)
 
-        # function_callsites = {callsite_address: target_function_address, target_function_name, target_function_symbol}
-        self.function_callsites: Dict = dict()
-
     def extract_attribute(self, base_object: BDFunction) -> Dict[str, Tuple[int, int, str, int]]:
         # Check if value already exists
         FunctionCallSiteTargets_value = base_object.get_attribute_value('FunctionCallSiteTargets')
@@ -27,6 +24,9 @@ class FunctionCallSiteTargets(Attribute):
         if FunctionCallSiteTargets_value:
             pass
         else:
+            # function_callsites = {callsite_address: target_function_address, target_function_name,
+            #                       target_function_symbol}
+            function_callsites: Dict = dict()
             for callsite_ref in base_object.underlying_obj.call_sites:
                 for target_function_address in bv.get_code_refs_from(callsite_ref.address):
                     target_function: Function = bv.get_function_at(target_function_address)
@@ -41,7 +41,7 @@ class FunctionCallSiteTargets(Attribute):
                             target_function_name = target_function.name
                             target_function_symbol_type: int = 0
 
-                        self.function_callsites.update({f'addr_{str(callsite_ref.address)}':
+                        function_callsites.update({f'addr_{str(callsite_ref.address)}':
                             [
                                 str(target_function_address),
                                 target_function_name,
@@ -49,9 +49,9 @@ class FunctionCallSiteTargets(Attribute):
                             ]
                         })
 
-            FunctionCallSiteTargets_value = self.function_callsites
+            FunctionCallSiteTargets_value = function_callsites
             FunctionCallSiteTargets_value.update({'uuid': self.create_attribute_uuid(FunctionCallSiteTargets_value)})
 
-            base_object.add_attribute_value('FunctionCallSiteTargets', self.function_callsites)
+            base_object.add_attribute_value('FunctionCallSiteTargets', function_callsites)
 
         return FunctionCallSiteTargets_value if FunctionCallSiteTargets_value else None
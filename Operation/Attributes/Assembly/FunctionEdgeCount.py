@@ -1,8 +1,25 @@
 from ....Enums import bd_enums
 from ....Operands.Assembly.BDFunction import BDFunction
-from ....Abstracts.Attribute import Attribute
+from ....Abstracts.Attribute import Attribute, AttributeAccumulator
+from ....Utility import FeatureWalker
 from typing import Dict, Optional
 
+
+class FunctionEdgeCountAccumulator(AttributeAccumulator):
+    visits_edges: bool = True
+
+    def __init__(self):
+        self.edge_count: int = 0
+
+    def visit_edge(self, edge):
+        self.edge_count += 1
+
+    def finish(self) -> Dict:
+        return {
+            'edge_count': self.edge_count
+        }
+
+
 class FunctionEdgeCount(Attribute):
     """
     Retrieve the number of basic blocks within an Assembly Function.
@@ -12,6 +29,9 @@ class FunctionEdgeCount(Attribute):
         super().__init__(name='FunctionEdgeCount', value_type=bd_enums.AttrScope.InVariant,
                          ir_type=bd_enums.IRType.Assembly, target_type=bd_enums.TargetType.Function)
 
+    def create_accumulator(self, base_object: BDFunction) -> FunctionEdgeCountAccumulator:
+        return FunctionEdgeCountAccumulator()
+
     def extract_attribute(self, base_object: BDFunction) -> Optional[Dict]:
         # Check if value already exists
         FunctionEdgeCount_value = base_object.get_attribute_value('FunctionEdgeCount')
@@ -19,14 +39,7 @@ class FunctionEdgeCount(Attribute):
         if FunctionEdgeCount_value:
             pass
         else:
-            i = 0
-            for bb in base_object.underlying_obj.basic_blocks:
-                i += len(bb.outgoing_edges)
-            edge_count = i
-
-            FunctionEdgeCount_value = {
-                'edge_count': edge_count
-            }
+            FunctionEdgeCount_value = FeatureWalker.extract_attribute(self, base_object)
 
             base_object.add_attribute_value('FunctionEdgeCount', FunctionEdgeCount_value)
 
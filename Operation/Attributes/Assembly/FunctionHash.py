@@ -1,8 +1,26 @@
 from ....Enums import bd_enums
 from ....Operands.Assembly.BDFunction import BDFunction
-from ....Abstracts.Attribute import Attribute
+from ....Abstracts.Attribute import Attribute, AttributeAccumulator
+from ....Utility import FeatureWalker
 import xxhash
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+
+
+class FunctionHashAccumulator(AttributeAccumulator):
+    visits_instructions: bool = True
+
+    def __init__(self):
+        self.hash_value = xxhash.xxh32()
+
+    def visit_instruction(self, tokens: List, address: int):
+        for instruction in tokens:
+            self.hash_value.update(instruction.text)
+
+    def finish(self) -> Dict:
+        return {
+            'hash': self.hash_value.intdigest()
+        }
+
 
 class FunctionHash(Attribute):
     """
@@ -13,6 +31,9 @@ class FunctionHash(Attribute):
         super().__init__(name='FunctionHash', value_type=bd_enums.AttrScope.Contextual,
                          ir_type=bd_enums.IRType.Assembly, target_type=bd_enums.TargetType.Function)
 
+    def create_accumulator(self, base_object: BDFunction) -> FunctionHashAccumulator:
+        return FunctionHashAccumulator()
+
     def extract_attribute(self, base_object: BDFunction) -> Optional[Dict]:
         # Check if value already exists
         FunctionHash_value = base_object.get_attribute_value('FunctionHash')
@@ -20,14 +41,7 @@ class FunctionHash(Attribute):
         if FunctionHash_value:
             pass
         else:
-            hash_value = xxhash.xxh32()
-            for instruction_expression in base_object.underlying_obj.instructions:
-                for instruction in instruction_expression[0]:
-                    hash_value.update(instruction.text)
-
-            FunctionHash_value = {
-                'hash': hash_value.intdigest()
-            }
+            FunctionHash_value = FeatureWalker.extract_attribute(self, base_object)
 
             base_object.add_attribute_value('FunctionHash', FunctionHash_value)
 
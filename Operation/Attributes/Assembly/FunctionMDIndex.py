@@ -1,9 +1,44 @@
 from ....Enums import bd_enums
 from ....Operands.Assembly.BDFunction import BDFunction
-from ....Abstracts.Attribute import Attribute
+from ....Abstracts.Attribute import Attribute, AttributeAccumulator
+from ....Utility import CFGEmbedding, FeatureWalker
 from binaryninja import *
-from typing import Dict, List, Tuple, SupportsFloat, Optional
-import math
+from typing import Dict, List, Tuple, Optional
+
+
+class FunctionMDIndexAccumulator(AttributeAccumulator):
+    visits_edges: bool = True
+
+    def __init__(self, base_object: BDFunction):
+        self.base_object: BDFunction = base_object
+        # (source bb index, destination bb index) of every CFG edge
+        self.edges: List[Tuple[int, int]] = list()
+        self.in_degrees: Dict[int, int] = dict()
+        self.out_degrees: Dict[int, int] = dict()
+        self.current_bb_index: int = 0
+
+    def visit_basic_block(self, basic_block: BasicBlock, outgoing_edges: List):
+        self.current_bb_index = basic_block.index
+        self.out_degrees[basic_block.index] = len(outgoing_edges)
+
+    def visit_edge(self, edge: BasicBlockEdge):
+        destination_index = edge.target.index
+        self.edges.append((self.current_bb_index, destination_index))
+        self.in_degrees[destination_index] = self.in_degrees.get(destination_index, 0) + 1
+
+    def get_features(self) -> List[Tuple[int, int, int, int, int]]:
+        # Mapping between basic block index and its position in the order
+        topological_order = self.base_object.get_attribute_value('FunctionTopologicalSort')['topological_sort']
+
+        return [(topological_order[source_index],
+                 self.in_degrees.get(source_index, 0),
+                 self.out_degrees.get(source_index, 0),
+                 self.in_degrees.get(destination_index, 0),
+                 self.out_degrees.get(destination_index, 0))
+                for source_index, destination_index in self.edges]
+
+    def finish(self) -> Dict:
+        return FunctionMDIndex.compute_value(self.get_features())
 
 
 class FunctionMDIndex(Attribute):
@@ -13,11 +48,19 @@ class FunctionMDIndex(Attribute):
     see http://citeseerx.ist.psu.edu/viewdoc/download?doi=10.1.1.661.9484&rep=rep1&type=pdf , Section 5.
     """
 
+    offloadable: bool = True
+    # Version 2 is calculated from version 2 of FunctionTopologicalSort.
+    # Version 3 sums the per-edge values with math.fsum (see Utility.CFGEmbedding).
+    version: int = 3
+
     def __init__(self):
         super().__init__(name='FunctionMDIndex', value_type=bd_enums.AttrScope.Contextual,
                          ir_type=bd_enums.IRType.Assembly, target_type=bd_enums.TargetType.Function,
                          dependencies=['FunctionTopologicalSort'])
 
+    def create_accumulator(self, base_object: BDFunction) -> FunctionMDIndexAccumulator:
+        return FunctionMDIndexAccumulator(base_object)
+
     def extract_attribute(self, base_object: BDFunction) -> Optional[Dict]:
         # Check if value already exists
         FunctionMDIndex_value = base_object.get_attribute_value('FunctionMDIndex')
@@ -25,42 +68,34 @@ class FunctionMDIndex(Attribute):
         if FunctionMDIndex_value:
             pass
         else:
-            # Mapping between basic block index and its position in the order
-            topological_order = base_object.get_attribute_value('FunctionTopologicalSort')['topological_sort']
-
-            md_index: SupportsFloat = 0
-            relaxed_md_index: SupportsFloat = 0
-            for bb in base_object.underlying_obj.basic_blocks:
-                for edge in bb.outgoing_edges:
-                    source_bb: BasicBlock = edge.source
-                    destination_bb: BasicBlock = edge.target
-
-                    source_topological_position = topological_order[source_bb.index]
-                    tup: Tuple = (source_topological_position,
-                                  len(source_bb.incoming_edges),
-                                  len(source_bb.outgoing_edges),
-                                  len(destination_bb.incoming_edges),
-                                  len(destination_bb.outgoing_edges)
-                                  )
-
-                    # sqrt(2) = 1.4142135623730951 , sqrt(3) = 1.7320508075688772 , sqrt(5) = 2.23606797749979
-                    # sqrt(7) = 2.6457513110645907
-                    relaxed_emb: float = tup[1] * 1.4142135623730951 + \
-                                         tup[2] * 1.7320508075688772 + \
-                                         tup[3] * 2.23606797749979 + \
-                                         tup[4] * 2.6457513110645907
-
-                    emb: float = relaxed_emb + tup[0]
-
-                    relaxed_md_index += 1 / math.sqrt(relaxed_emb)
-                    md_index += 1 / math.sqrt(emb)
+            FunctionMDIndex_value = self.compute_value(self.gather_features(base_object))
 
+            base_object.add_attribute_value('FunctionMDIndex', FunctionMDIndex_value)
+
+        return FunctionMDIndex_value if FunctionMDIndex_value else None
+
+    def gather_features(self, base_object: BDFunction) -> List[Tuple[int, int, int, int, int]]:
+        """
+        :return: A list of (source topological position, source in-degree, source out-degree, destination in-degree,
+                 destination out-degree) tuples, one per CFG edge.
+        """
+        accumulator = self.create_accumulator(base_object)
+        FeatureWalker.walk_function(base_object, [accumulator])
+        return accumulator.get_features()
+
+    @staticmethod
+    def compute_value(features: List[Tuple[int, int, int, int, int]]) -> Dict:
+        return FunctionMDIndex.batch_compute_values([features])[0]
+
+    @classmethod
+    def batch_compute_values(cls, features_batch: List[List[Tuple[int, int, int, int, int]]]) -> List[Dict]:
+        FunctionMDIndex_values: List[Dict] = list()
+        for md_index, relaxed_md_index in CFGEmbedding.md_indexes(features_batch):
             FunctionMDIndex_value = {
                 'md_index': md_index,
                 'relaxed_md_index': relaxed_md_index
             }
-            FunctionMDIndex_value.update({'uuid': self.create_attribute_uuid(FunctionMDIndex_value)})
-
-            base_object.add_attribute_value('FunctionMDIndex', FunctionMDIndex_value)
+            FunctionMDIndex_value.update({'uuid': Attribute.create_attribute_uuid(FunctionMDIndex_value)})
+            FunctionMDIndex_values.append(FunctionMDIndex_value)
 
-        return FunctionMDIndex_value if FunctionMDIndex_value else None
+        return FunctionMDIndex_values
@@ -1,8 +1,40 @@
 from ....Enums import bd_enums
 from ....Operands.Assembly.BDFunction import BDFunction
-from ....Abstracts.Attribute import Attribute
+from ....Abstracts.Attribute import Attribute, AttributeAccumulator
+from ....Utility import FeatureWalker, Log
 from binaryninja import *
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+
+
+class FunctionNormalizedAccumulator(AttributeAccumulator):
+    visits_instructions: bool = True
+
+    def __init__(self):
+        self.normalized_disassembly: List[str] = list()
+
+    def visit_instruction(self, tokens: List, address: int):
+        for instruction_text_token in tokens:
+            try:
+                if instruction_text_token.type == InstructionTextTokenType.RegisterToken:
+                    self.normalized_disassembly.append('REG')
+                elif instruction_text_token.type in (InstructionTextTokenType.PossibleAddressToken,
+                                                     InstructionTextTokenType.CodeRelativeAddressToken):
+                    self.normalized_disassembly.append('MEM')
+                elif instruction_text_token.type in (InstructionTextTokenType.IntegerToken,
+                                                     InstructionTextTokenType.CharacterConstantToken):
+                    self.normalized_disassembly.append('CST')
+                else:
+                    self.normalized_disassembly.append(instruction_text_token.text)
+            except TypeError as e:
+                Log.log_debug('FunctionNormalized: Exception while trying to normalize - %s', e)
+                pass
+
+    def finish(self) -> Dict:
+        FunctionNormalized_value = {
+            'function_normalized': self.normalized_disassembly
+        }
+        FunctionNormalized_value.update({'uuid': Attribute.create_attribute_uuid(FunctionNormalized_value)})
+        return FunctionNormalized_value
 
 
 class FunctionNormalized(Attribute):
@@ -18,7 +50,9 @@ class FunctionNormalized(Attribute):
     def __init__(self):
         super().__init__(name='FunctionNormalized', value_type=bd_enums.AttrScope.InVariant,
                          ir_type=bd_enums.IRType.Assembly, target_type=bd_enums.TargetType.Function)
-        self.normalized_disassembly: List[str] = list()
+
+    def create_accumulator(self, base_object: BDFunction) -> FunctionNormalizedAccumulator:
+        return FunctionNormalizedAccumulator()
 
     def extract_attribute(self, base_object: BDFunction) -> Optional[Dict]:
         # Check if value already exists
@@ -27,27 +61,7 @@ class FunctionNormalized(Attribute):
         if FunctionNormalized_value:
             pass
         else:
-            for instruction_tuple in base_object.underlying_obj.instructions:
-                for instruction_text_token in instruction_tuple[0]:
-                    try:
-                        if instruction_text_token.type == InstructionTextTokenType.RegisterToken:
-                            self.normalized_disassembly.append('REG')
-                        elif instruction_text_token.type in (InstructionTextTokenType.PossibleAddressToken,
-                                                             InstructionTextTokenType.CodeRelativeAddressToken):
-                            self.normalized_disassembly.append('MEM')
-                        elif instruction_text_token.type in (InstructionTextTokenType.IntegerToken,
-                                                             InstructionTextTokenType.CharacterConstantToken):
-                            self.normalized_disassembly.append('CST')
-                        else:
-                            self.normalized_disassembly.append(instruction_text_token.text)
-                    except TypeError as e:
-                        log.log_debug(f'FunctionNormalized: Exception while trying to normalize - {e}')
-                        pass
-
-            FunctionNormalized_value = {
-                'function_normalized': self.normalized_disassembly
-            }
-            FunctionNormalized_value.update({'uuid': self.create_attribute_uuid(FunctionNormalized_value)})
+            FunctionNormalized_value = FeatureWalker.extract_attribute(self, base_object)
 
             base_object.add_attribute_value('FunctionNormalized', FunctionNormalized_value)
 
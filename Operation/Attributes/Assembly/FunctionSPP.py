@@ -1,26 +1,47 @@
 from ....Enums import bd_enums
 from ....Operands.Assembly.BDFunction import BDFunction
-from ....Abstracts.Attribute import Attribute
-import hashlib
-import pyprimesieve
+from ....Abstracts.Attribute import Attribute, AttributeAccumulator
+from ....Utility import FeatureWalker, PrimeTable
 from binaryninja import *
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+from collections import Counter
 from .... import Configuration
 
 
+class FunctionSPPAccumulator(AttributeAccumulator):
+    visits_instructions: bool = True
+
+    def __init__(self, attribute: 'FunctionSPP', arch_name: str):
+        self.attribute: FunctionSPP = attribute
+        self.arch_name: str = arch_name
+        # The multiset of the function mnemonics, the product of their primes is calculated in finish.
+        self.mnemonics: Counter = Counter()
+
+    def visit_instruction(self, tokens: List, address: int):
+        for instruction_text_token in tokens:
+            if instruction_text_token.type == InstructionTextTokenType.InstructionToken:
+                self.mnemonics[instruction_text_token.text] += 1
+
+    def finish(self) -> Dict:
+        return {
+            'function_spp': PrimeTable.get_prime_table(self.arch_name).get_product(self.mnemonics,
+                                                                                   self.attribute.modulu_value)
+        }
+
+
 class FunctionSPP(Attribute):
     """
     Construct the Small Prime Product value of a given basic block.
     """
 
-    # This dict caches all values discovered in order to make the extraction process faster.
-    opcode_to_prime: Dict[str, int] = dict()
     modulu_value = Configuration.MAX_INT
 
     def __init__(self):
         super().__init__(name='FunctionSPP', value_type=bd_enums.AttrScope.InVariant,
                          ir_type=bd_enums.IRType.Assembly, target_type=bd_enums.TargetType.Function)
-        self.spp_value = 1
+
+    def create_accumulator(self, base_object: BDFunction) -> FunctionSPPAccumulator:
+        return FunctionSPPAccumulator(self, base_object.underlying_obj.arch.name)
 
     def extract_attribute(self, base_object: BDFunction) -> Optional[Dict]:
         # Check if value already exists
@@ -29,33 +50,8 @@ class FunctionSPP(Attribute):
         if FunctionSPP_value:
             pass
         else:
-            for instruction_tuple in base_object.underlying_obj.instructions:
-                for instruction_text_token in instruction_tuple[0]:
-                    try:
-                        if instruction_text_token.type == InstructionTextTokenType.InstructionToken:
-                            mapped_prime = self.get_mapped_prime(instruction_text_token.text.encode('utf8'))
-                            self.spp_value = (self.spp_value * mapped_prime) % self.modulu_value
-                    except TypeError as e:
-                        log.log_info(f'SPP Exception: {e}')
-                        pass
-
-            FunctionSPP_value = {
-                'function_spp': self.spp_value
-            }
+            FunctionSPP_value = FeatureWalker.extract_attribute(self, base_object)
 
             base_object.add_attribute_value('FunctionSPP', FunctionSPP_value)
 
         return FunctionSPP_value if FunctionSPP_value else None
-
-    def get_mapped_prime(self, token: str):
-
-        prime = self.opcode_to_prime.get(token)
-        if prime:
-            pass
-        else:
-            helper_hash: hashlib.blake2b = hashlib.blake2b(digest_size=3)
-            helper_hash.update(token)
-            prime = pyprimesieve.primes_nth(int(helper_hash.hexdigest(), 16))
-            self.opcode_to_prime[token] = prime
-
-        return prime
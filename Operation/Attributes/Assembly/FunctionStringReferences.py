@@ -1,16 +1,43 @@
 from ....Enums import bd_enums
 from ....Operands.Assembly.BDFunction import BDFunction
 from ....Abstracts.Attribute import Attribute
-from typing import Dict, Optional
+from ....Utility import ViewCache
+from typing import Dict, List, Optional, Tuple
 import xxhash
 from binaryninja import *
 
 
+def build_string_reference_index(bv: BinaryView) -> Dict[int, List[Tuple[int, str]]]:
+    """
+    Map every function to the strings it references, in a single pass over the strings of the binary view.
+    :return: {function start address: [(referencing instruction address, string), ...]}, sorted by address.
+    """
+    string_reference_index: Dict[int, List[Tuple[int, str]]] = dict()
+    for string_reference in bv.strings:
+        for code_ref in bv.get_code_refs(string_reference.start):
+            if code_ref.function:
+                string_reference_index.setdefault(code_ref.function.start, []).append((code_ref.address,
+                                                                                        string_reference.value))
+
+    for function_string_references in string_reference_index.values():
+        function_string_references.sort()
+
+    return string_reference_index
+
+
 class FunctionStringReferences(Attribute):
     """
     Retrieve all the individual string references in a function, as well as a combined hash of all of them.
+    The strings referenced by all the functions are found in a single pass over the strings of the binary view (see
+    build_string_reference_index), and are hashed in the order of the addresses referencing them.
     """
 
+    # Version 2 finds the strings through the code references of the strings, instead of through the constants
+    # referenced by the function.
+    version: int = 2
+
+    string_reference_index_key: str = 'NinjDiff.FunctionStringReferences.string_reference_index'
+
     def __init__(self):
         super().__init__(name='FunctionStringReferences', value_type=bd_enums.AttrScope.Contextual,
                          ir_type=bd_enums.IRType.Assembly, target_type=bd_enums.TargetType.Function)
@@ -23,15 +50,14 @@ class FunctionStringReferences(Attribute):
             pass
 
         else:
-            strings_hash = xxhash.xxh32()
             current_function: Function = base_object.underlying_obj
+            string_reference_index = ViewCache.get_view_value(current_function.view,
+                                                              self.string_reference_index_key,
+                                                              build_string_reference_index)
 
-            for addr in range(current_function.lowest_address, current_function.highest_address):
-                const_refs = current_function.get_constants_referenced_by(addr)
-                for ref in const_refs:
-                    string = current_function.view.get_string_at(ref.value)
-                    if string:
-                        strings_hash.update(string.value.encode('utf8'))
+            strings_hash = xxhash.xxh32()
+            for address, string in string_reference_index.get(current_function.start, []):
+                strings_hash.update(string.encode('utf8'))
 
             FunctionStringReferences_value = {
                 'strings_hash': strings_hash.intdigest()
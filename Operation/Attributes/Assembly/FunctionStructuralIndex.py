@@ -1,29 +1,50 @@
 from ....Enums import bd_enums
 from ....Operands.Assembly.BDFunction import BDFunction
-from ....Abstracts.Attribute import Attribute
-import hashlib
-import pyprimesieve
+from ....Abstracts.Attribute import Attribute, AttributeAccumulator
+from ....Utility import FeatureWalker
+from ....Utility import CFGEmbedding
 from binaryninja import *
-from typing import Dict, Optional
-import math
+from typing import Dict, List, Optional, Tuple
 
 
-def generate_single_bb_index(edge: BasicBlockEdge):
-    src_bb: BasicBlock = edge.source
-    dst_bb: BasicBlock = edge.target
+class FunctionStructuralIndexAccumulator(AttributeAccumulator):
+    visits_edges: bool = True
 
-    back_edge = 1 if edge.back_edge else 1.5
-    in_degree_src = len(src_bb.incoming_edges) * math.sqrt(2)
-    out_degree_src = len(src_bb.outgoing_edges) * math.sqrt(3)
-    in_degree_dst = len(dst_bb.incoming_edges) * math.sqrt(5)
-    out_degree_dst = len(dst_bb.outgoing_edges) * math.sqrt(7)
-    src_dominator_count = len(src_bb.dominators) * math.sqrt(11)
-    dst_dominator_count = len(dst_bb.dominators) * math.sqrt(13)
-    src_post_dominator_count = len(src_bb.post_dominators) * math.sqrt(17)
-    dst_post_dominator_count = len(dst_bb.post_dominators) * math.sqrt(19)
+    def __init__(self):
+        # (source bb index, destination bb index) -> is it a back edge, for every CFG edge. Parallel edges between the
+        # same basic blocks are only counted once, and the first one traversed is kept.
+        self.edges: Dict[Tuple[int, int], bool] = dict()
+        self.in_degrees: Dict[int, int] = dict()
+        self.out_degrees: Dict[int, int] = dict()
+        self.dominator_counts: Dict[int, int] = dict()
+        self.post_dominator_counts: Dict[int, int] = dict()
+        self.current_bb_index: int = 0
+
+    def visit_basic_block(self, basic_block: BasicBlock, outgoing_edges: List):
+        self.current_bb_index = basic_block.index
+        self.out_degrees[basic_block.index] = len(outgoing_edges)
+        self.dominator_counts[basic_block.index] = len(basic_block.dominators)
+        self.post_dominator_counts[basic_block.index] = len(basic_block.post_dominators)
+
+    def visit_edge(self, edge: BasicBlockEdge):
+        destination_index = edge.target.index
+        self.in_degrees[destination_index] = self.in_degrees.get(destination_index, 0) + 1
+        self.edges.setdefault((self.current_bb_index, destination_index), edge.back_edge)
 
-    return back_edge + in_degree_src + out_degree_src + in_degree_dst + out_degree_dst + src_dominator_count + \
-           dst_dominator_count + src_post_dominator_count + dst_post_dominator_count
+    def get_features(self) -> List[CFGEmbedding.StructuralIndexEdge]:
+        return [(1 if back_edge else 1.5,
+                 self.in_degrees.get(source_index, 0),
+                 self.out_degrees.get(source_index, 0),
+                 self.in_degrees.get(destination_index, 0),
+                 self.out_degrees.get(destination_index, 0),
+                 self.dominator_counts.get(source_index, 0),
+                 self.dominator_counts.get(destination_index, 0),
+                 self.post_dominator_counts.get(source_index, 0),
+                 self.post_dominator_counts.get(destination_index, 0))
+                for (source_index, destination_index), back_edge in self.edges.items()]
+
+    def finish(self) -> Dict:
+        return FunctionStructuralIndex.compute_value(self.get_features())
 
 
 class FunctionStructuralIndex(Attribute):
@@ -42,10 +63,17 @@ class FunctionStructuralIndex(Attribute):
         9. amount of post dominator basic blocks of the destination bb
     """
 
+    offloadable: bool = True
+    # Version 2 sums the per-edge values with math.fsum (see Utility.CFGEmbedding).
+    version: int = 2
+
     def __init__(self):
-        super().__init__(name='FunctionSPP', value_type=bd_enums.AttrScope.InVariant,
+        super().__init__(name='FunctionStructuralIndex', value_type=bd_enums.AttrScope.InVariant,
                          ir_type=bd_enums.IRType.Assembly, target_type=bd_enums.TargetType.Function)
 
+    def create_accumulator(self, base_object: BDFunction) -> FunctionStructuralIndexAccumulator:
+        return FunctionStructuralIndexAccumulator()
+
     def extract_attribute(self, base_object: BDFunction) -> Optional[Dict]:
         # Check if value already exists
         FunctionStructuralIndex_value = base_object.get_attribute_value('FunctionStructuralIndex')
@@ -53,23 +81,25 @@ class FunctionStructuralIndex(Attribute):
         if FunctionStructuralIndex_value:
             pass
         else:
-            function_index = 0
-            # edge_cache is a set of strings in the form src_bb.index -> dst_bb.index .
-            # The cache denotes the edges that were already traversed.
-            edge_cache = set()
-            for bb in base_object.underlying_obj.basic_blocks:
-                for edge in bb.outgoing_edges:
-                    cache = str(edge.source.index) + '-' + str(edge.target.index)
-                    if cache in edge_cache:
-                        continue
-                    else:
-                        edge_cache.add(cache)
-                        function_index += 1 / math.sqrt(generate_single_bb_index(edge))
-
-            FunctionStructuralIndex_value = {
-                'function_index': function_index
-            }
+            FunctionStructuralIndex_value = self.compute_value(self.gather_features(base_object))
 
             base_object.add_attribute_value('FunctionStructuralIndex', FunctionStructuralIndex_value)
 
         return FunctionStructuralIndex_value if FunctionStructuralIndex_value else None
+
+    def gather_features(self, base_object: BDFunction) -> List[CFGEmbedding.StructuralIndexEdge]:
+        """
+        :return: A 9 tuple of features per unique CFG edge, in the order of CFGEmbedding.StructuralIndexEdge.
+        """
+        accumulator = self.create_accumulator(base_object)
+        FeatureWalker.walk_function(base_object, [accumulator])
+        return accumulator.get_features()
+
+    @staticmethod
+    def compute_value(features: List[CFGEmbedding.StructuralIndexEdge]) -> Dict:
+        return FunctionStructuralIndex.batch_compute_values([features])[0]
+
+    @classmethod
+    def batch_compute_values(cls, features_batch: List[List[CFGEmbedding.StructuralIndexEdge]]) -> List[Dict]:
+        return [{'function_index': function_index}
+                for function_index in CFGEmbedding.structural_indexes(features_batch)]
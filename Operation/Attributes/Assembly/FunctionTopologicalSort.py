@@ -1,9 +1,25 @@
 from ....Enums import bd_enums
 from ....Operands.Assembly.BDFunction import BDFunction
-from ....Abstracts.Attribute import Attribute
+from ....Abstracts.Attribute import Attribute, AttributeAccumulator
 from binaryninja import *
-from typing import Dict, List, SupportsInt, Tuple, Optional
-from ....Utility import TarjanSort
+from typing import Dict, List, Optional
+from ....Utility import TarjanSort, FeatureWalker
+
+
+class FunctionTopologicalSortAccumulator(AttributeAccumulator):
+    visits_edges: bool = True
+
+    def __init__(self):
+        # adjacency[i] is the list of indexes of the children of the basic block whose index is i
+        self.adjacency: List[List[int]] = list()
+
+    def visit_basic_block(self, basic_block: BasicBlock, outgoing_edges: List):
+        if basic_block.index >= len(self.adjacency):
+            self.adjacency.extend([] for _ in range(basic_block.index + 1 - len(self.adjacency)))
+        self.adjacency[basic_block.index] = [edge.target.index for edge in outgoing_edges]
+
+    def finish(self) -> Dict:
+        return FunctionTopologicalSort.compute_value(self.adjacency)
 
 
 class FunctionTopologicalSort(Attribute):
@@ -12,10 +28,16 @@ class FunctionTopologicalSort(Attribute):
     As a side effect, also returns the natural loop count in the function.
     """
 
+    # Version 2 fixed the mapping between the basic block indexes and their positions in the order.
+    version: int = 2
+
     def __init__(self):
         super().__init__(name='FunctionTopologicalSort', value_type=bd_enums.AttrScope.InVariant,
                          ir_type=bd_enums.IRType.Assembly, target_type=bd_enums.TargetType.Function)
 
+    def create_accumulator(self, base_object: BDFunction) -> FunctionTopologicalSortAccumulator:
+        return FunctionTopologicalSortAccumulator()
+
     def extract_attribute(self, base_object: BDFunction) -> Optional[Dict]:
         # Check if value already exists
         FunctionTopologicalSort_value = base_object.get_attribute_value('FunctionTopologicalSort')
@@ -23,54 +45,26 @@ class FunctionTopologicalSort(Attribute):
         if FunctionTopologicalSort_value:
             pass
         else:
-            # graph is a mapping between basic block names (the name is its index) to its children
-            graph: Dict[SupportsInt, List[SupportsInt]] = dict()
-
-            # sorted_mapping is a mapping between the index of a basic block and its position in the order.
-            sorted_mapping: Dict = dict()
-
-            for bb in base_object.underlying_obj.basic_blocks:
-                graph[bb.index] = []
-                for edge in bb.outgoing_edges:
-                    graph[bb.index].append(edge.target.index)
-
-            # sorted_order is a sorted list of the basic block indexes
-            sorted_order: List[Tuple[SupportsInt]] = TarjanSort.robust_topological_sort(graph)
-
-            # Each strongly connected tuple with 2 or more nodes counts as a natural loop
-            natural_loop_count = 0
-
-            order_index = 0
-            for index in range(len(sorted_order)):
-
-                # Check if this strongly connected component is a loop
-                if len(sorted_order[index]) > 1:
-                    natural_loop_count += 1
-                elif len(sorted_order[index]) == 1:
-                    # Check if the node has a self loop
-                    bb_index = sorted_order[index][0]
-                    for outgoing_edge in base_object.underlying_obj[bb_index].outgoing_edges:
-                        if outgoing_edge.back_edge:
-                            natural_loop_count += 1
-
-                # Create a sorted list of the bb indexes within a strongly connected component
-                sorted_order_set = sorted(sorted_order[index])
-                # For each bb index, update the mapping of it to its position in the order
-                for bb_index in sorted_order_set:
-                    sorted_mapping.update({bb_index: order_index})
-                    order_index += 1
-
-            # need to convert sorted_mapping to a list, as neo4j doesn't accept nested dicts as properties.
-            sorted_mapping_list = list()
-            for key, value in sorted_mapping.items():
-                sorted_mapping_list.insert(key, value)
-
-            FunctionTopologicalSort_value = {
-                'topological_sort': sorted_mapping_list,
-                'natural_loop_count': natural_loop_count
-            }
-            FunctionTopologicalSort_value.update({'uuid': self.create_attribute_uuid(FunctionTopologicalSort_value)})
+            FunctionTopologicalSort_value = FeatureWalker.extract_attribute(self, base_object)
 
             base_object.add_attribute_value('FunctionTopologicalSort', FunctionTopologicalSort_value)
 
         return FunctionTopologicalSort_value if FunctionTopologicalSort_value else None
+
+    @staticmethod
+    def compute_value(adjacency: List[List[int]]) -> Dict:
+        """
+        :param adjacency: adjacency[i] is the list of indexes of the children of the basic block whose index is i.
+        """
+        # topological_sort[i] is the position of the basic block whose index is i in the order (neo4j doesn't accept
+        # nested dicts as properties, so a list is used). Each strongly connected tuple with 2 or more nodes, or a
+        # self loop, counts as a natural loop.
+        topological_sort, natural_loop_count = TarjanSort.topological_order(*TarjanSort.to_csr(adjacency))
+
+        FunctionTopologicalSort_value = {
+            'topological_sort': topological_sort,
+            'natural_loop_count': natural_loop_count
+        }
+        FunctionTopologicalSort_value.update({'uuid': Attribute.create_attribute_uuid(FunctionTopologicalSort_value)})
+
+        return FunctionTopologicalSort_value
@@ -1,5 +1,6 @@
 from typing import List, Tuple, Dict, Optional, Set, AnyStr, SupportsInt
 from binaryninja import *
+from ....Utility import Log
 from ....Abstracts.Property import Property
 from ....Abstracts.Attribute import Attribute
 from ....Abstracts.BDObject import BDObject
@@ -100,5 +101,5 @@ class basic_block_in_out_degree(Property):
 
                 matched_basic_blocks.append((source_bd_basic_block_set, target_bd_basic_block_set))
 
-        log.log_debug(f'basic_block_in_out_degree Property matched basic blocks: \n{matched_basic_blocks}')
+        Log.log_debug('basic_block_in_out_degree Property matched basic blocks: \n%s', matched_basic_blocks)
         return matched_basic_blocks
@@ -1,5 +1,6 @@
 from typing import List, Tuple, Dict, Optional, Set
 from binaryninja import *
+from ....Utility import Log
 from ....Abstracts.Property import Property
 from ....Abstracts.Attribute import Attribute
 from ....Abstracts.BDObject import BDObject
@@ -29,24 +30,26 @@ class basic_block_instruction_count(Property):
 
         matched_basic_blocks: List[Tuple[BDBasicBlockSet, BDBasicBlockSet]] = list()
 
-        # Feature vectors are dicts of the examined object and a str representing the instruction count
-        source_feature_vector: Dict[str, Set[Optional[BDBasicBlock]]] = dict()
-        target_feature_vector: Dict[str, Set[Optional[BDBasicBlock]]] = dict()
+        # Feature vectors are dicts of the examined object and an int representing the instruction count
+        source_feature_vector: Dict[int, Set[Optional[BDBasicBlock]]] = dict()
+        target_feature_vector: Dict[int, Set[Optional[BDBasicBlock]]] = dict()
 
         # Populate the feature vectors with all the basic block information
         for source_bd_obj in source_set:
-            source_instr_count = self.loaded_attributes['BasicBlockInstructionCount'].extract_attribute(source_bd_obj)
+            source_count = self.loaded_attributes['BasicBlockInstructionCount'].extract_attribute(source_bd_obj)
 
-            if source_instr_count:
+            if source_count:
+                source_instr_count: int = source_count['bb_instr_count']
                 if source_feature_vector.get(source_instr_count):
                     source_feature_vector[source_instr_count].add(source_bd_obj)
                 else:
                     source_feature_vector.update({source_instr_count: {source_bd_obj}})
 
         for target_bd_obj in target_set:
-            target_instr_count = self.loaded_attributes['BasicBlockInstructionCount'].extract_attribute(target_bd_obj)
+            target_count = self.loaded_attributes['BasicBlockInstructionCount'].extract_attribute(target_bd_obj)
 
-            if target_instr_count:
+            if target_count:
+                target_instr_count: int = target_count['bb_instr_count']
                 if target_feature_vector.get(target_instr_count):
                     target_feature_vector[target_instr_count].add(target_bd_obj)
                 else:
@@ -57,12 +60,14 @@ class basic_block_instruction_count(Property):
             target_bd_object_set = target_feature_vector.get(source_instr_count)
             if target_bd_object_set:
                 source_bd_bb_set = BDBasicBlockSet()
-                source_bd_bb_set.union(source_bd_object_set)
+                for bd_obj in source_bd_object_set:
+                    source_bd_bb_set.add(bd_obj)
 
                 target_bd_bb_set = BDBasicBlockSet()
-                target_bd_bb_set.union(target_bd_object_set)
+                for bd_obj in target_bd_object_set:
+                    target_bd_bb_set.add(bd_obj)
 
                 matched_basic_blocks.append((source_bd_bb_set, target_bd_bb_set))
 
-        log.log_debug(f'basic_block_instruction_count Property matched basic blocks: \n{matched_basic_blocks}')
+        Log.log_debug('basic_block_instruction_count Property matched basic blocks: \n%s', matched_basic_blocks)
         return matched_basic_blocks
@@ -1,5 +1,6 @@
 from typing import List, Tuple, Dict, Optional, Set
 from binaryninja import *
+from ....Utility import Log
 from ....Abstracts.Property import Property
 from ....Abstracts.Attribute import Attribute
 from ....Abstracts.BDObject import BDObject
@@ -35,18 +36,20 @@ class basic_block_same_callees(Property):
 
         # Populate the feature vectors with all the basic block information
         for source_bd_obj in source_set:
-            source_callee_names_hash = self.loaded_attributes['BasicBlockCallees'].extract_attribute(source_bd_obj)
+            source_callees = self.loaded_attributes['BasicBlockCallees'].extract_attribute(source_bd_obj)
 
-            if source_callee_names_hash:
+            if source_callees:
+                source_callee_names_hash: int = source_callees['callee_names_hash']
                 if source_feature_vector.get(source_callee_names_hash):
                     source_feature_vector[source_callee_names_hash].add(source_bd_obj)
                 else:
                     source_feature_vector.update({source_callee_names_hash: {source_bd_obj}})
 
         for target_bd_obj in target_set:
-            target_callee_names_hash = self.loaded_attributes['BasicBlockCallees'].extract_attribute(target_bd_obj)
+            target_callees = self.loaded_attributes['BasicBlockCallees'].extract_attribute(target_bd_obj)
 
-            if target_callee_names_hash:
+            if target_callees:
+                target_callee_names_hash: int = target_callees['callee_names_hash']
                 if target_feature_vector.get(target_callee_names_hash):
                     target_feature_vector[target_callee_names_hash].add(target_bd_obj)
                 else:
@@ -57,12 +60,14 @@ class basic_block_same_callees(Property):
             target_bd_object_set = target_feature_vector.get(source_callee_names_hash)
             if target_bd_object_set:
                 source_bd_bb_set = BDBasicBlockSet()
-                source_bd_bb_set.union(source_bd_object_set)
+                for bd_obj in source_bd_object_set:
+                    source_bd_bb_set.add(bd_obj)
 
                 target_bd_bb_set = BDBasicBlockSet()
-                target_bd_bb_set.union(target_bd_object_set)
+                for bd_obj in target_bd_object_set:
+                    target_bd_bb_set.add(bd_obj)
 
                 matched_basic_blocks.append((source_bd_bb_set, target_bd_bb_set))
 
-        log.log_debug(f'basic_block_same_callees Property matched basic blocks: \n{matched_basic_blocks}')
+        Log.log_debug('basic_block_same_callees Property matched basic blocks: \n%s', matched_basic_blocks)
         return matched_basic_blocks
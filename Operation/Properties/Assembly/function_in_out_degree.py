@@ -1,5 +1,6 @@
 from typing import List, Tuple, Dict, Optional, Set, AnyStr, SupportsInt
 from binaryninja import *
+from ....Utility import Log
 from ....Abstracts.Property import Property
 from ....Abstracts.Attribute import Attribute
 from ....Abstracts.BDObject import BDObject
@@ -100,5 +101,5 @@ class function_in_out_degree(Property):
 
                 matched_functions.append((source_bd_function_set, target_bd_function_set))
 
-        log.log_debug(f'function_in_out_degree Property matched function: \n{matched_functions}')
+        Log.log_debug('function_in_out_degree Property matched function: \n%s', matched_functions)
         return matched_functions
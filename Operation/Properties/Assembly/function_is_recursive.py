@@ -33,18 +33,20 @@ class function_is_recursive(Property):
 
         # Populate the feature vectors with all the function information
         for source_bd_object in source_set:
-            source_is_recursive = self.loaded_attributes['FunctionRecursion'].extract_attribute(source_bd_object)
+            source_recursion = self.loaded_attributes['FunctionRecursion'].extract_attribute(source_bd_object)
 
-            if source_is_recursive is not None:
+            if source_recursion is not None:
+                source_is_recursive: bool = source_recursion['recursive']
                 if source_feature_vector.get(source_is_recursive):
                     source_feature_vector[source_is_recursive].add(source_bd_object)
                 else:
                     source_feature_vector.update({source_is_recursive: {source_bd_object}})
 
         for dest_bd_object in dest_set:
-            target_is_recursive = self.loaded_attributes['FunctionRecursion'].extract_attribute(dest_bd_object)
+            target_recursion = self.loaded_attributes['FunctionRecursion'].extract_attribute(dest_bd_object)
 
-            if target_is_recursive is not None:
+            if target_recursion is not None:
+                target_is_recursive: bool = target_recursion['recursive']
                 if target_feature_vector.get(target_is_recursive):
                     target_feature_vector[target_is_recursive].add(dest_bd_object)
                 else:
@@ -59,7 +61,8 @@ class function_is_recursive(Property):
                     source_bd_function_set.add(bd_obj)
 
                 target_bd_function_set = BDFunctionSet()
-                target_bd_function_set.union(target_bd_object_set)
+                for bd_obj in target_bd_object_set:
+                    target_bd_function_set.add(bd_obj)
 
                 matched_functions.append((source_bd_function_set, target_bd_function_set))
 
@@ -1,5 +1,6 @@
 from typing import List, Tuple, Dict, Optional, Set
 from binaryninja import *
+from ....Utility import Log
 from ....Abstracts.Property import Property
 from ....Abstracts.Attribute import Attribute
 from ....Abstracts.BDObject import BDObject
@@ -35,18 +36,20 @@ class function_name_hash(Property):
 
         # Populate the feature vectors with all the function information
         for source_bd_object in source_set:
-            source_name_hash = self.loaded_attributes['FunctionNameHash'].extract_attribute(source_bd_object)
+            source_name = self.loaded_attributes['FunctionNameHash'].extract_attribute(source_bd_object)
 
-            if source_name_hash:
+            if source_name:
+                source_name_hash: str = source_name['name_hash']
                 if source_feature_vector.get(source_name_hash):
                     source_feature_vector[source_name_hash].add(source_bd_object)
                 else:
                     source_feature_vector.update({source_name_hash: {source_bd_object}})
 
         for dest_bd_object in dest_set:
-            dest_name_hash = self.loaded_attributes['FunctionNameHash'].extract_attribute(dest_bd_object)
+            dest_name = self.loaded_attributes['FunctionNameHash'].extract_attribute(dest_bd_object)
 
-            if dest_name_hash:
+            if dest_name:
+                dest_name_hash: str = dest_name['name_hash']
                 if dest_feature_vector.get(dest_name_hash):
                     dest_feature_vector[dest_name_hash].add(dest_bd_object)
                 else:
@@ -61,9 +64,10 @@ class function_name_hash(Property):
                     source_bd_function_set.add(bd_obj)
 
                 dest_bd_function_set = BDFunctionSet()
-                dest_bd_function_set.union(dest_bd_object_set)
+                for bd_obj in dest_bd_object_set:
+                    dest_bd_function_set.add(bd_obj)
 
                 matched_functions.append((source_bd_function_set, dest_bd_function_set))
 
-        log.log_debug(f'name_hash Property matched function: \n{matched_functions}')
+        Log.log_debug('name_hash Property matched function: \n%s', matched_functions)
         return matched_functions
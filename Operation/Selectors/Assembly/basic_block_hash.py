@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Hashable, Optional
 from ....Abstracts.Selector import Selector
 from ....Abstracts.Attribute import Attribute
 from ....Enums import bd_enums
@@ -17,19 +17,22 @@ class basic_block_hash(Selector):
     target_bd_object: bd_enums.TargetType = bd_enums.TargetType.BasicBlock
     target_bd_IR: bd_enums.IRType = bd_enums.IRType.Assembly
     selector_comparison_result_type = bd_enums.SelectorComparisonResultType.Boolean
+    selector_has_comparison_key: bool = True
 
     def __init__(self, loaded_attributes: Dict[str, Attribute]):
         super().__init__(loaded_attributes)
 
     def exec_comparison_heuristic(self, source_bb: BDBasicBlock, target_bb: BDBasicBlock) \
             -> bool:
+        source_key = self.get_comparison_key(source_bb)
 
-        # Populate the attribute values
-        source_hash = self.loaded_attributes['BasicBlockHash'].extract_attribute(source_bb)
-
-        target_hash = self.loaded_attributes['BasicBlockHash'].extract_attribute(target_bb)
-
-        if source_hash == target_hash:
+        if source_key is not None and source_key == self.get_comparison_key(target_bb):
             return True
 
         return False
+
+    def get_comparison_key(self, bd_object: BDBasicBlock) -> Optional[Hashable]:
+        # Populate the attribute values
+        bb_hash = self.loaded_attributes['BasicBlockHash'].extract_attribute(bd_object)
+
+        return bb_hash['hash'] if bb_hash else None
@@ -1,8 +1,9 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from ....Abstracts.Selector import Selector
 from ....Abstracts.Attribute import Attribute
 from ....Enums import bd_enums
 from ....Operands.Assembly.BDFunction import BDFunction
+import math
 
 
 class function_bb_edge_callsite(Selector):
@@ -12,7 +13,7 @@ class function_bb_edge_callsite(Selector):
         2. Edge ("lines" between basic blocks) count within the function.
         3. Amount of function calls within the function.
     This information is treated as a vector is a 3D euclidean space - The Selector will try to find the closest
-    functions, assuming the distance between them is unique in the examined set. (This is done from
+    functions, assuming the distance between them is unique in the examined set.
     """
 
     needed_attributes: List[str] = ['FunctionBasicBlockCount', 'FunctionEdgeCount', 'FunctionCallsiteCount']
@@ -22,24 +23,28 @@ class function_bb_edge_callsite(Selector):
     target_bd_object: bd_enums.TargetType = bd_enums.TargetType.Function
     target_bd_IR: bd_enums.IRType = bd_enums.IRType.Assembly
     selector_comparison_result_type = bd_enums.SelectorComparisonResultType.IntDistance
+    selector_has_feature_vector: bool = True
 
     def __init__(self, loaded_attributes: Dict[str, Attribute]):
         super().__init__(loaded_attributes)
 
     def exec_comparison_heuristic(self, source_func: BDFunction, target_func: BDFunction) \
-            -> int:
+            -> float:
+        source_vector = self.get_feature_vector(source_func)
+        target_vector = self.get_feature_vector(target_func)
 
-        # Populate the attribute values
-        source_bb_count = self.loaded_attributes['FunctionBasicBlockCount'].extract_attribute(source_func)
-        source_edge_count = self.loaded_attributes['FunctionEdgeCount'].extract_attribute(source_func)
-        source_callsite_count = self.loaded_attributes['FunctionCallsiteCount'].extract_attribute(source_func)
+        if source_vector is None or target_vector is None:
+            return math.inf
+
+        return math.dist(source_vector, target_vector)
 
-        target_bb_count = self.loaded_attributes['FunctionBasicBlockCount'].extract_attribute(target_func)
-        target_edge_count = self.loaded_attributes['FunctionEdgeCount'].extract_attribute(target_func)
-        target_callsite_count = self.loaded_attributes['FunctionCallsiteCount'].extract_attribute(target_func)
+    def get_feature_vector(self, bd_object: BDFunction) -> Optional[Tuple[float, ...]]:
+        # Populate the attribute values
+        bb_count = self.loaded_attributes['FunctionBasicBlockCount'].extract_attribute(bd_object)
+        edge_count = self.loaded_attributes['FunctionEdgeCount'].extract_attribute(bd_object)
+        callsite_count = self.loaded_attributes['FunctionCallsiteCount'].extract_attribute(bd_object)
 
-        if source_bb_count == target_bb_count and source_edge_count == target_edge_count \
-                and source_callsite_count == target_callsite_count:
-            return True
+        if bb_count and edge_count and callsite_count:
+            return bb_count['bb_count'], edge_count['edge_count'], callsite_count['callsite_count']
 
-        return False
+        return None
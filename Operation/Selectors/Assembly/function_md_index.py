@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Hashable, Optional
 from ....Abstracts.Selector import Selector
 from ....Abstracts.Attribute import Attribute
 from ....Enums import bd_enums
@@ -17,22 +17,24 @@ class function_md_index(Selector):
     target_bd_object: bd_enums.TargetType = bd_enums.TargetType.Function
     target_bd_IR: bd_enums.IRType = bd_enums.IRType.Assembly
     selector_comparison_result_type = bd_enums.SelectorComparisonResultType.Boolean
+    selector_has_comparison_key: bool = True
 
     def __init__(self, loaded_attributes: Dict[str, Attribute]):
         super().__init__(loaded_attributes)
 
     def exec_comparison_heuristic(self, source_func: BDFunction, target_func: BDFunction) \
             -> bool:
-        # Populate the attribute values
-        self.loaded_attributes['FunctionTopologicalSort'].extract_attribute(source_func)
+        source_key = self.get_comparison_key(source_func)
 
-        source_md_index = self.loaded_attributes['FunctionMDIndex'].extract_attribute(source_func)['md_index']
+        if source_key is not None and source_key == self.get_comparison_key(target_func):
+            return True
 
-        self.loaded_attributes['FunctionTopologicalSort'].extract_attribute(target_func)
+        return False
 
-        target_md_index = self.loaded_attributes['FunctionMDIndex'].extract_attribute(target_func)['md_index']
+    def get_comparison_key(self, bd_object: BDFunction) -> Optional[Hashable]:
+        # Populate the attribute values
+        self.loaded_attributes['FunctionTopologicalSort'].extract_attribute(bd_object)
 
-        if source_md_index == target_md_index:
-            return True
+        md_index = self.loaded_attributes['FunctionMDIndex'].extract_attribute(bd_object)
 
-        return False
+        return md_index['md_index'] if md_index else None
@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Hashable, Optional
 from ....Abstracts.Selector import Selector
 from ....Abstracts.Attribute import Attribute
 from ....Enums import bd_enums
@@ -17,20 +17,22 @@ class function_natural_loop_count(Selector):
     target_bd_object: bd_enums.TargetType = bd_enums.TargetType.Function
     target_bd_IR: bd_enums.IRType = bd_enums.IRType.Assembly
     selector_comparison_result_type = bd_enums.SelectorComparisonResultType.Boolean
+    selector_has_comparison_key: bool = True
 
     def __init__(self, loaded_attributes: Dict[str, Attribute]):
         super().__init__(loaded_attributes)
 
     def exec_comparison_heuristic(self, source_func: BDFunction, target_func: BDFunction) \
             -> bool:
-        # Populate the attribute values
-        source_loop_count = \
-            self.loaded_attributes['FunctionTopologicalSort'].extract_attribute(source_func)['natural_loop_count']
-
-        target_loop_count = \
-            self.loaded_attributes['FunctionTopologicalSort'].extract_attribute(target_func)['natural_loop_count']
+        source_key = self.get_comparison_key(source_func)
 
-        if source_loop_count == target_loop_count:
+        if source_key is not None and source_key == self.get_comparison_key(target_func):
             return True
 
         return False
+
+    def get_comparison_key(self, bd_object: BDFunction) -> Optional[Hashable]:
+        # Populate the attribute values
+        topological_sort = self.loaded_attributes['FunctionTopologicalSort'].extract_attribute(bd_object)
+
+        return topological_sort['natural_loop_count'] if topological_sort else None
@@ -1,14 +1,17 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from ....Abstracts.Selector import Selector
 from ....Abstracts.Attribute import Attribute
 from ....Enums import bd_enums
 from ....Operands.Assembly.BDFunction import BDFunction
+import math
 
 
 class function_relaxed_md_index(Selector):
     """
     Compare the relaxed MD-INDEX of 2 functions.
     Relaxed MD-INDEX is calculated the same as the MD-INDEX, but without taking into account the topological order.
+    The Selector will try to find the function with the closest relaxed MD-INDEX, assuming the distance between them is
+    unique in the examined set.
     """
 
     needed_attributes: List[str] = ['FunctionMDIndex', 'FunctionTopologicalSort']
@@ -17,23 +20,26 @@ class function_relaxed_md_index(Selector):
     selector_algorithm_performance: bd_enums.SelectorAlgoPerf = bd_enums.SelectorAlgoPerf.Medium
     target_bd_object: bd_enums.TargetType = bd_enums.TargetType.Function
     target_bd_IR: bd_enums.IRType = bd_enums.IRType.Assembly
-    selector_comparison_result_type = bd_enums.SelectorComparisonResultType.Boolean
+    selector_comparison_result_type = bd_enums.SelectorComparisonResultType.IntDistance
+    selector_has_feature_vector: bool = True
 
     def __init__(self, loaded_attributes: Dict[str, Attribute]):
         super().__init__(loaded_attributes)
 
     def exec_comparison_heuristic(self, source_func: BDFunction, target_func: BDFunction) \
-            -> bool:
-        # Populate the attribute values
-        self.loaded_attributes['FunctionTopologicalSort'].extract_attribute(source_func)
+            -> float:
+        source_vector = self.get_feature_vector(source_func)
+        target_vector = self.get_feature_vector(target_func)
 
-        source_md_index = self.loaded_attributes['FunctionMDIndex'].extract_attribute(source_func)['relaxed_md_index']
+        if source_vector is None or target_vector is None:
+            return math.inf
 
-        self.loaded_attributes['FunctionTopologicalSort'].extract_attribute(target_func)
+        return abs(source_vector[0] - target_vector[0])
 
-        target_md_index = self.loaded_attributes['FunctionMDIndex'].extract_attribute(target_func)['relaxed_md_index']
+    def get_feature_vector(self, bd_object: BDFunction) -> Optional[Tuple[float, ...]]:
+        # Populate the attribute values
+        self.loaded_attributes['FunctionTopologicalSort'].extract_attribute(bd_object)
 
-        if source_md_index == target_md_index:
-            return True
+        md_index = self.loaded_attributes['FunctionMDIndex'].extract_attribute(bd_object)
 
-        return False
+        return (md_index['relaxed_md_index'],) if md_index else None
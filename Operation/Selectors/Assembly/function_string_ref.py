@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Hashable, Optional
 from ....Abstracts.Selector import Selector
 from ....Abstracts.Attribute import Attribute
 from ....Enums import bd_enums
@@ -17,19 +17,22 @@ class function_string_ref(Selector):
     target_bd_object: bd_enums.TargetType = bd_enums.TargetType.Function
     target_bd_IR: bd_enums.IRType = bd_enums.IRType.Assembly
     selector_comparison_result_type = bd_enums.SelectorComparisonResultType.Boolean
+    selector_has_comparison_key: bool = True
 
     def __init__(self, loaded_attributes: Dict[str, Attribute]):
         super().__init__(loaded_attributes)
 
     def exec_comparison_heuristic(self, source_func: BDFunction, target_func: BDFunction) \
             -> bool:
+        source_key = self.get_comparison_key(source_func)
 
-        # Populate the attribute values
-        source_strings_hash = self.loaded_attributes['FunctionStringReferences'].extract_attribute(source_func)
-
-        target_strings_hash = self.loaded_attributes['FunctionStringReferences'].extract_attribute(target_func)
-
-        if source_strings_hash == target_strings_hash:
+        if source_key is not None and source_key == self.get_comparison_key(target_func):
             return True
 
         return False
+
+    def get_comparison_key(self, bd_object: BDFunction) -> Optional[Hashable]:
+        # Populate the attribute values
+        strings_hash = self.loaded_attributes['FunctionStringReferences'].extract_attribute(bd_object)
+
+        return strings_hash['strings_hash'] if strings_hash else None
@@ -0,0 +1,39 @@
+"""
+
+   Hash of the contents of a binary, which identifies the binary regardless of its path - used as the uuid of its
+   FunctionCollection node (see DBManager) and as its key in the attribute cache (see DataManagement.AttributeCache).
+
+"""
+
+import mmap
+import os
+
+import xxhash
+from binaryninja import BinaryView
+
+from .. import Configuration
+
+
+def calc_bv_hash(bv: BinaryView) -> int:
+    """
+    Hash all the bytes in the file.
+    The bytes are hashed in chunks of Configuration.FILE_HASH_CHUNK_SIZE, so the whole file is never held in memory.
+    """
+    file_hash = xxhash.xxh64()
+    filename: str = bv.file.filename
+
+    if Configuration.FILE_HASH_FROM_DISK and os.path.isfile(filename) and not filename.endswith('.bndb'):
+        # Hash the raw file from disk, without going through the binary view.
+        with open(filename, 'rb') as raw_file:
+            if os.fstat(raw_file.fileno()).st_size:
+                with mmap.mmap(raw_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                    mapped_view = memoryview(mapped_file)
+                    for offset in range(0, len(mapped_view), Configuration.FILE_HASH_CHUNK_SIZE):
+                        file_hash.update(mapped_view[offset:offset + Configuration.FILE_HASH_CHUNK_SIZE])
+                    mapped_view.release()
+    else:
+        for offset in range(bv.start, bv.end, Configuration.FILE_HASH_CHUNK_SIZE):
+            file_hash.update(bv.read(offset, min(Configuration.FILE_HASH_CHUNK_SIZE, bv.end - offset)))
+
+    # Neo4j only supports JAVA long values
+    return file_hash.intdigest() & Configuration.MAX_INT
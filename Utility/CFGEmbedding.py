@@ -0,0 +1,108 @@
+"""
+
+   Whole-function CFG indexes (MD-index and structural index), calculated from per-edge feature tuples.
+
+   Every index is a sum of 1 / sqrt(embedding) over the CFG edges, where the embedding of an edge is a weighted sum of
+   its features. The calculation is vectorised with NumPy over the edges of a whole batch of functions when NumPy is
+   available, and falls back to pure python otherwise. Both paths calculate the same per-edge terms and sum them with
+   math.fsum, so they return bit-identical values.
+
+"""
+
+import math
+from itertools import chain
+from typing import List, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# sqrt(2) = 1.4142135623730951 , sqrt(3) = 1.7320508075688772 , sqrt(5) = 2.23606797749979
+# sqrt(7) = 2.6457513110645907
+MD_INDEX_WEIGHTS: Tuple[float, ...] = (1.4142135623730951, 1.7320508075688772, 2.23606797749979, 2.6457513110645907)
+STRUCTURAL_INDEX_WEIGHTS: Tuple[float, ...] = tuple(math.sqrt(prime) for prime in (2, 3, 5, 7, 11, 13, 17, 19))
+
+# (source topological position, source in-degree, source out-degree, destination in-degree, destination out-degree)
+MDIndexEdge = Tuple[int, int, int, int, int]
+# (1 if back edge else 1.5, source in-degree, source out-degree, destination in-degree, destination out-degree,
+#  source dominator count, destination dominator count, source post-dominator count,
+#  destination post-dominator count)
+StructuralIndexEdge = Tuple[float, int, int, int, int, int, int, int, int]
+
+
+def split_sums(terms: Sequence[float], edge_counts: List[int]) -> List[float]:
+    """
+    Sum consecutive runs of terms, one run per function.
+    """
+    sums: List[float] = list()
+    start = 0
+    for edge_count in edge_counts:
+        sums.append(math.fsum(terms[start:start + edge_count]))
+        start += edge_count
+    return sums
+
+
+def to_array(features_batch: Sequence[Sequence[Tuple]], column_count: int):
+    """
+    :return: The edge features of all the functions in the batch, as a single (edge count, column count) numpy array.
+    """
+    edge_count = sum(len(features) for features in features_batch)
+    return numpy.fromiter(chain.from_iterable(chain.from_iterable(features_batch)), dtype=numpy.float64,
+                          count=edge_count * column_count).reshape(edge_count, column_count)
+
+
+def md_indexes(features_batch: Sequence[Sequence[MDIndexEdge]]) -> List[Tuple[float, float]]:
+    """
+    see http://citeseerx.ist.psu.edu/viewdoc/download?doi=10.1.1.661.9484&rep=rep1&type=pdf , Section 5.
+    :param features_batch: The edge features of every function in the batch.
+    :return: (md_index, relaxed_md_index) of every function in the batch.
+    """
+    edge_counts = [len(features) for features in features_batch]
+
+    if numpy is not None and sum(edge_counts):
+        edges = to_array(features_batch, 5)
+        # The columns are summed in the same order as in the pure python path.
+        relaxed_embeddings = edges[:, 1] * MD_INDEX_WEIGHTS[0]
+        for column, weight in enumerate(MD_INDEX_WEIGHTS[1:], 2):
+            relaxed_embeddings = relaxed_embeddings + edges[:, column] * weight
+        embeddings = relaxed_embeddings + edges[:, 0]
+        relaxed_terms = (1 / numpy.sqrt(relaxed_embeddings)).tolist()
+        terms = (1 / numpy.sqrt(embeddings)).tolist()
+    else:
+        relaxed_terms: List[float] = list()
+        terms: List[float] = list()
+        for edge in chain.from_iterable(features_batch):
+            relaxed_embedding = edge[1] * MD_INDEX_WEIGHTS[0] + \
+                                edge[2] * MD_INDEX_WEIGHTS[1] + \
+                                edge[3] * MD_INDEX_WEIGHTS[2] + \
+                                edge[4] * MD_INDEX_WEIGHTS[3]
+            relaxed_terms.append(1 / math.sqrt(relaxed_embedding))
+            terms.append(1 / math.sqrt(relaxed_embedding + edge[0]))
+
+    return list(zip(split_sums(terms, edge_counts), split_sums(relaxed_terms, edge_counts)))
+
+
+def structural_indexes(features_batch: Sequence[Sequence[StructuralIndexEdge]]) -> List[float]:
+    """
+    :param features_batch: The edge features of every function in the batch.
+    :return: The structural index of every function in the batch.
+    """
+    edge_counts = [len(features) for features in features_batch]
+
+    if numpy is not None and sum(edge_counts):
+        edges = to_array(features_batch, 9)
+        # The columns are summed in the same order as in the pure python path.
+        embeddings = edges[:, 0]
+        for column, weight in enumerate(STRUCTURAL_INDEX_WEIGHTS, 1):
+            embeddings = embeddings + edges[:, column] * weight
+        terms = (1 / numpy.sqrt(embeddings)).tolist()
+    else:
+        terms: List[float] = list()
+        for edge in chain.from_iterable(features_batch):
+            embedding = edge[0]
+            for feature, weight in zip(edge[1:], STRUCTURAL_INDEX_WEIGHTS):
+                embedding = embedding + feature * weight
+            terms.append(1 / math.sqrt(embedding))
+
+    return split_sums(terms, edge_counts)
@@ -0,0 +1,37 @@
+from typing import *
+
+from ..Abstracts.Attribute import Attribute, AttributeAccumulator
+from ..Abstracts.BDObject import BDObject
+
+
+def walk_function(bd_func: BDObject, accumulators: Iterable[AttributeAccumulator]):
+    """
+    Feed the instructions and the CFG of the function to all the given accumulators, visiting every instruction and
+    every CFG edge only once.
+    """
+    instruction_accumulators = [accumulator for accumulator in accumulators if accumulator.visits_instructions]
+    edge_accumulators = [accumulator for accumulator in accumulators if accumulator.visits_edges]
+    function = bd_func.underlying_obj
+
+    if instruction_accumulators:
+        for tokens, address in function.instructions:
+            for accumulator in instruction_accumulators:
+                accumulator.visit_instruction(tokens, address)
+
+    if edge_accumulators:
+        for basic_block in function.basic_blocks:
+            outgoing_edges = basic_block.outgoing_edges
+            for accumulator in edge_accumulators:
+                accumulator.visit_basic_block(basic_block, outgoing_edges)
+            for edge in outgoing_edges:
+                for accumulator in edge_accumulators:
+                    accumulator.visit_edge(edge)
+
+
+def extract_attribute(attribute: Attribute, bd_func: BDObject) -> Optional[Dict]:
+    """
+    Calculate the value of a single attribute, using its accumulator.
+    """
+    accumulator = attribute.create_accumulator(bd_func)
+    walk_function(bd_func, [accumulator])
+    return accumulator.finish()
@@ -0,0 +1,169 @@
+"""
+
+   Structured instrumentation of the diffing flow.
+
+   Spans time a named operation (e.g a single Property or Selector run) in a category, and are aggregated into call
+   counts and total wall \ CPU time per (category, name). Counters aggregate values such as candidate set sizes and
+   match counts. The aggregated data can be exported as JSON, and the individual spans as a Chrome trace-event file
+   (load it in chrome://tracing or https://ui.perfetto.dev).
+
+   Instrumentation is disabled by default (see Configuration.INSTRUMENTATION_ENABLED), in which case spans and counters
+   are no-ops.
+
+"""
+
+import json
+import os
+import threading
+import time
+from typing import *
+
+from .. import Configuration
+
+
+class Span:
+    """
+    Context manager timing a single operation, created by Instrumentation.span.
+    """
+
+    __slots__ = ('instrumentation', 'category', 'name', 'args', 'wall_start', 'cpu_start')
+
+    def __init__(self, instrumentation: 'Instrumentation', category: str, name: str, args: Optional[Dict]):
+        self.instrumentation: Instrumentation = instrumentation
+        self.category: str = category
+        self.name: str = name
+        self.args: Optional[Dict] = args
+
+    def __enter__(self):
+        self.wall_start: float = time.perf_counter()
+        # The CPU time of the current thread, so spans running on extraction threads are not charged for each other.
+        self.cpu_start: float = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.instrumentation.add_span(self.category, self.name, self.wall_start, time.perf_counter() - self.wall_start,
+                                      time.thread_time() - self.cpu_start, self.args)
+        return False
+
+
+class NullSpan:
+    """
+    The span returned when instrumentation is disabled.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Instrumentation:
+
+    def __init__(self, enabled: bool = True, record_trace: bool = True):
+        """
+        :param enabled: Record spans and counters, all calls are no-ops otherwise.
+        :param record_trace: Keep every individual span for the Chrome trace export, and not just the aggregates.
+        """
+        self.enabled: bool = enabled
+        self.record_trace: bool = record_trace
+        self.lock: threading.Lock = threading.Lock()
+        self.start_time: float = time.perf_counter()
+        # timings: {(category, name): [call count, total wall time, total CPU time]}
+        self.timings: Dict[Tuple[str, str], List[float]] = dict()
+        # counters: {counter name: [observation count, total, minimum, maximum]}
+        self.counters: Dict[str, List[float]] = dict()
+        # trace_events: The individual spans, in the Chrome trace-event format.
+        self.trace_events: List[Dict] = list()
+
+    def span(self, category: str, name: str, args: Optional[Dict] = None) -> Union[Span, NullSpan]:
+        """
+        :return: A context manager timing the operation inside it.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, category, name, args)
+
+    def add_span(self, category: str, name: str, wall_start: float, wall_time: float, cpu_time: float,
+                 args: Optional[Dict] = None):
+        with self.lock:
+            timing = self.timings.get((category, name))
+            if timing is None:
+                timing = self.timings[(category, name)] = [0, 0.0, 0.0]
+            timing[0] += 1
+            timing[1] += wall_time
+            timing[2] += cpu_time
+
+            if self.record_trace:
+                trace_event = {'name': name, 'cat': category, 'ph': 'X',
+                               'ts': (wall_start - self.start_time) * 1e6, 'dur': wall_time * 1e6,
+                               'pid': os.getpid(), 'tid': threading.get_ident()}
+                if args:
+                    trace_event['args'] = args
+                self.trace_events.append(trace_event)
+
+    def count(self, name: str, value: float = 1):
+        """
+        Record an observation of a counter (e.g the size of a candidate set).
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            counter = self.counters.get(name)
+            if counter is None:
+                self.counters[name] = [1, value, value, value]
+            else:
+                counter[0] += 1
+                counter[1] += value
+                counter[2] = min(counter[2], value)
+                counter[3] = max(counter[3], value)
+
+    def reset(self):
+        with self.lock:
+            self.start_time = time.perf_counter()
+            self.timings.clear()
+            self.counters.clear()
+            self.trace_events.clear()
+
+    def to_dict(self) -> Dict:
+        """
+        :return: The aggregated timings (sorted by total wall time) and counters.
+        """
+        with self.lock:
+            timings = [{'category': category, 'name': name, 'calls': calls, 'wall_time': wall_time,
+                        'cpu_time': cpu_time}
+                       for (category, name), (calls, wall_time, cpu_time) in self.timings.items()]
+            counters = {name: {'count': count, 'total': total, 'min': minimum, 'max': maximum}
+                        for name, (count, total, minimum, maximum) in self.counters.items()}
+
+        timings.sort(key=lambda timing: timing['wall_time'], reverse=True)
+        return {'timings': timings, 'counters': counters}
+
+    def write_json(self, path: str):
+        with open(path, 'w') as output_file:
+            json.dump(self.to_dict(), output_file, indent=4)
+
+    def write_chrome_trace(self, path: str):
+        """
+        Write the recorded spans in the Chrome trace-event format, with the counters as the trace metadata.
+        """
+        with self.lock:
+            trace = {'traceEvents': list(self.trace_events), 'displayTimeUnit': 'ms'}
+        trace['otherData'] = self.to_dict()['counters']
+        with open(path, 'w') as output_file:
+            json.dump(trace, output_file)
+
+
+instrumentation: Instrumentation = Instrumentation(enabled=Configuration.INSTRUMENTATION_ENABLED)
+
+
+def get_instrumentation() -> Instrumentation:
+    """
+    :return: The instrumentation shared by the whole diffing flow.
+    """
+    return instrumentation
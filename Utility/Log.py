@@ -0,0 +1,174 @@
+"""
+
+   Lazy logging layer.
+
+   Messages are given as a %-style format string and its arguments, and are only formatted once the message level
+   passed the gating level (Configuration.LOG_LEVEL), so debug messages on hot paths cost a single comparison when
+   debug logging is off. Code that builds an expensive message (e.g the repr of a whole result set) should check
+   is_enabled first.
+
+   Messages logged per object (per match, per basic block etc) can be sampled (log every n-th message) or rate limited
+   (at most n messages per second) by a key.
+
+   Messages are sent to the Binary Ninja log when running inside Binary Ninja, and to the python "NinjDiff" logger
+   otherwise. log_to_file additionally writes them to a file, asynchronously, through a background thread.
+
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import *
+
+from .. import Configuration
+
+try:
+    import binaryninja
+except ImportError:
+    binaryninja = None
+
+# The log levels, with the values of the Binary Ninja LogLevel enum.
+DEBUG: int = 0
+INFO: int = 1
+WARNING: int = 2
+ERROR: int = 3
+
+# The python logging levels of the log levels, used when Binary Ninja isn't available and when logging to a file.
+PYTHON_LEVELS: Dict[int, int] = {DEBUG: logging.DEBUG, INFO: logging.INFO, WARNING: logging.WARNING,
+                                 ERROR: logging.ERROR}
+
+level: int = Configuration.LOG_LEVEL
+
+python_logger: logging.Logger = logging.getLogger('NinjDiff')
+# The listener writing the queued messages to the log file, see log_to_file.
+file_listener: Optional[logging.handlers.QueueListener] = None
+file_logger: Optional[logging.Logger] = None
+
+# State of the sampled and rate limited messages, by key.
+state_lock: threading.Lock = threading.Lock()
+sample_counts: Dict[Hashable, int] = dict()
+# {key: (start of the current one second window, amount of messages logged in it, amount of messages dropped)}
+rate_windows: Dict[Hashable, Tuple[float, int, int]] = dict()
+
+
+def set_level(new_level: int):
+    global level
+    level = new_level
+
+
+def is_enabled(message_level: int) -> bool:
+    return message_level >= level
+
+
+def emit(message_level: int, message: str, args: tuple):
+    if args:
+        message = message % args
+
+    if binaryninja is not None:
+        binaryninja.log.log(message_level, message)
+    else:
+        python_logger.log(PYTHON_LEVELS[message_level], message)
+
+    if file_logger is not None:
+        file_logger.log(PYTHON_LEVELS[message_level], message)
+
+
+def log(message_level: int, message: str, *args):
+    if message_level >= level:
+        emit(message_level, message, args)
+
+
+def log_debug(message: str, *args):
+    if DEBUG >= level:
+        emit(DEBUG, message, args)
+
+
+def log_info(message: str, *args):
+    if INFO >= level:
+        emit(INFO, message, args)
+
+
+def log_warn(message: str, *args):
+    if WARNING >= level:
+        emit(WARNING, message, args)
+
+
+def log_error(message: str, *args):
+    if ERROR >= level:
+        emit(ERROR, message, args)
+
+
+def log_sampled(message_level: int, key: Hashable, every: int, message: str, *args):
+    """
+    Log only the first of every `every` messages logged with the given key.
+    """
+    if message_level < level:
+        return
+    with state_lock:
+        sample_count = sample_counts.get(key, 0)
+        sample_counts[key] = sample_count + 1
+    if sample_count % every == 0:
+        emit(message_level, message, args)
+
+
+def log_rate_limited(message_level: int, key: Hashable, per_second: int, message: str, *args):
+    """
+    Log at most `per_second` messages with the given key per second. The amount of dropped messages is logged with the
+    first message of the next second.
+    """
+    if message_level < level:
+        return
+    now = time.monotonic()
+    with state_lock:
+        window_start, logged_count, dropped_count = rate_windows.get(key, (now, 0, 0))
+        if now - window_start >= 1:
+            window_start, logged_count = now, 0
+        if logged_count >= per_second:
+            rate_windows[key] = (window_start, logged_count, dropped_count + 1)
+            return
+        rate_windows[key] = (window_start, logged_count + 1, 0)
+
+    if dropped_count:
+        message = f'{message} ({dropped_count} similar messages were dropped)'
+    emit(message_level, message, args)
+
+
+def log_to_file(path: str, file_level: int = DEBUG):
+    """
+    Write the log messages to the given file as well. Messages are queued, and written by a background thread, so
+    logging never waits for the disk. Only messages that pass both the gating level and file_level are written.
+    """
+    global file_listener, file_logger
+    try:
+        file_handler = logging.FileHandler(path)
+    except OSError as e:
+        log_warn('log_to_file: Failed to open the log file %s - %s', path, e)
+        return
+
+    if file_listener is not None:
+        file_listener.stop()
+
+    file_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
+    message_queue: queue.Queue = queue.Queue()
+    file_listener = logging.handlers.QueueListener(message_queue, file_handler)
+    file_listener.start()
+
+    file_logger = logging.getLogger('NinjDiff.file')
+    file_logger.propagate = False
+    file_logger.setLevel(PYTHON_LEVELS[file_level])
+    file_logger.handlers = [logging.handlers.QueueHandler(message_queue)]
+
+
+@atexit.register
+def flush_file():
+    """
+    Write all the queued messages to the log file, and stop the background thread.
+    """
+    global file_listener, file_logger
+    if file_listener is not None:
+        file_listener.stop()
+        file_listener = None
+        file_logger = None
@@ -0,0 +1,92 @@
+"""
+
+   Nearest neighbour indexes used for matching objects by the distance between their feature vectors.
+
+   Both indexes answer a single question - given a query point, which are the two closest indexed points - which is
+   all that is needed in order to decide if the closest point is a unique match.
+
+"""
+
+import bisect
+from typing import Any, List, Sequence, Tuple
+
+# A (distance, item) pair, distance is the euclidean distance between the query point and the item feature vector.
+Neighbour = Tuple[float, Any]
+
+
+class SortedArrayIndex:
+    """
+    1-D index - the feature values are kept in a sorted array and queried with a binary search.
+    """
+
+    def __init__(self, points: Sequence[Tuple[Sequence[float], Any]]):
+        sorted_points = sorted(points, key=lambda point: point[0][0])
+        self.values: List[float] = [vector[0] for vector, _ in sorted_points]
+        self.items: List[Any] = [item for _, item in sorted_points]
+
+    def two_nearest(self, query: Sequence[float]) -> List[Neighbour]:
+        value = query[0]
+        position = bisect.bisect_left(self.values, value)
+
+        # The two nearest values are always among the two values on each side of the insertion point.
+        candidates: List[Neighbour] = [(abs(self.values[index] - value), self.items[index])
+                                       for index in range(max(position - 2, 0), min(position + 2, len(self.values)))]
+        candidates.sort(key=lambda candidate: candidate[0])
+        return candidates[:2]
+
+
+class KDTreeIndex:
+    """
+    n-D index - a KD-tree split on the median of each axis in turn.
+    Nodes are stored as (point, item, axis, left, right) tuples.
+    """
+
+    def __init__(self, points: Sequence[Tuple[Sequence[float], Any]]):
+        self.dimensions: int = len(points[0][0]) if points else 0
+        self.root = self._build(list(points), 0)
+
+    def _build(self, points: List[Tuple[Sequence[float], Any]], depth: int):
+        if not points:
+            return None
+
+        axis = depth % self.dimensions
+        points.sort(key=lambda point: point[0][axis])
+        median = len(points) // 2
+        return (points[median][0], points[median][1], axis,
+                self._build(points[:median], depth + 1),
+                self._build(points[median + 1:], depth + 1))
+
+    def two_nearest(self, query: Sequence[float]) -> List[Neighbour]:
+        # best holds up to two (squared distance, item) pairs, ordered by distance.
+        best: List[Tuple[float, Any]] = list()
+        # Each stack entry holds a node and a lower bound of the squared distance between the query and its sub-tree.
+        stack = [(self.root, 0.0)]
+        while stack:
+            node, lower_bound = stack.pop()
+            if node is None or (len(best) == 2 and lower_bound > best[-1][0]):
+                continue
+            point, item, axis, left, right = node
+
+            squared_distance = sum((a - b) * (a - b) for a, b in zip(point, query))
+            if len(best) < 2 or squared_distance < best[-1][0]:
+                best.append((squared_distance, item))
+                best.sort(key=lambda neighbour: neighbour[0])
+                del best[2:]
+
+            axis_distance = query[axis] - point[axis]
+            near, far = (left, right) if axis_distance < 0 else (right, left)
+            # The near side of the split is explored first, the far side only if it may still hold a closer point.
+            stack.append((far, axis_distance * axis_distance))
+            stack.append((near, lower_bound))
+
+        return [(squared_distance ** 0.5, item) for squared_distance, item in best]
+
+
+def build_neighbour_index(points: Sequence[Tuple[Sequence[float], Any]]):
+    """
+    :param points: a list of (feature vector, item) tuples. All feature vectors must have the same dimension.
+    :return: The index best suited for the dimension of the feature vectors.
+    """
+    if points and len(points[0][0]) == 1:
+        return SortedArrayIndex(points)
+    return KDTreeIndex(points)
@@ -0,0 +1,147 @@
+"""
+
+   Mnemonic to prime mapping used by the Small Prime Product (SPP) attributes.
+
+   Every mnemonic is mapped to the n-th prime, where n is a 24 bit hash of the mnemonic. Finding the n-th prime requires
+   running a sieve, so the mapping of every architecture is persisted to a JSON file, loaded lazily on first use, and a
+   sieve only runs the first time a mnemonic is ever seen.
+   New primes are only kept in memory until save_prime_tables is called (at the end of every extraction and diff, and
+   at exit), which merges them into the table files - so processes sharing a table directory don't drop each other's
+   primes.
+
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from typing import Dict, Optional, Set
+
+from .. import Configuration
+from . import Log
+
+
+class PrimeTable:
+    """
+    Persistent mnemonic -> prime mapping of a single architecture.
+    """
+
+    def __init__(self, arch_name: str, table_dir: Optional[str] = None):
+        """
+        :param table_dir: Directory of the table files, Configuration.prime_table_path if None.
+        """
+        self.path: str = os.path.join(table_dir or Configuration.prime_table_path, f'{arch_name}.json')
+        self.lock: threading.Lock = threading.Lock()
+        # Serializes saves, which are done outside of self.lock
+        self.save_lock: threading.Lock = threading.Lock()
+        self.mnemonic_to_prime: Dict[str, int] = self.load()
+        # Mnemonics whose primes were calculated since the table was last saved
+        self.unsaved_mnemonics: Set[str] = set()
+
+    def load(self) -> Dict[str, int]:
+        """
+        :return: The table file contents, empty if the file is missing or unreadable.
+        """
+        if not os.path.isfile(self.path):
+            return dict()
+        try:
+            with open(self.path, 'r') as table_file:
+                return json.load(table_file)
+        except (OSError, ValueError) as e:
+            Log.log_warn('PrimeTable: Failed to load %s: %r', self.path, e)
+            return dict()
+
+    @staticmethod
+    def calc_prime(mnemonic: str) -> int:
+        # The sieve is only needed for mnemonics missing from the table, so it is imported lazily.
+        import pyprimesieve
+
+        helper_hash = hashlib.blake2b(digest_size=3)
+        helper_hash.update(mnemonic.encode('utf8'))
+        return pyprimesieve.primes_nth(int(helper_hash.hexdigest(), 16))
+
+    def get_prime(self, mnemonic: str) -> int:
+        prime = self.mnemonic_to_prime.get(mnemonic)
+        if not prime:
+            with self.lock:
+                prime = self.mnemonic_to_prime.get(mnemonic)
+                if not prime:
+                    prime = self.calc_prime(mnemonic)
+                    self.mnemonic_to_prime[mnemonic] = prime
+                    self.unsaved_mnemonics.add(mnemonic)
+        return prime
+
+    def save(self):
+        """
+        Merge the unsaved primes into the table file. The file is re-read first, so primes saved by other processes
+        since the table was loaded are kept (and loaded).
+        """
+        with self.save_lock:
+            with self.lock:
+                if not self.unsaved_mnemonics:
+                    return
+                unsaved_primes = {mnemonic: self.mnemonic_to_prime[mnemonic] for mnemonic in self.unsaved_mnemonics}
+                self.unsaved_mnemonics = set()
+
+            mnemonic_to_prime = self.load()
+            mnemonic_to_prime.update(unsaved_primes)
+            try:
+                # Write to a temporary file first, so a crash never leaves a truncated table behind.
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                temp_path = f'{self.path}.{os.getpid()}.tmp'
+                with open(temp_path, 'w') as table_file:
+                    json.dump(mnemonic_to_prime, table_file)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                Log.log_warn('PrimeTable: Failed to save %s: %r', self.path, e)
+                with self.lock:
+                    self.unsaved_mnemonics.update(unsaved_primes)
+                return
+
+            with self.lock:
+                for mnemonic, prime in mnemonic_to_prime.items():
+                    self.mnemonic_to_prime.setdefault(mnemonic, prime)
+
+    def get_product(self, mnemonics: Counter, modulu: int = Configuration.MAX_INT) -> int:
+        """
+        :param mnemonics: The multiset of mnemonics, {mnemonic: occurrence count}.
+        :return: The product of the primes of all the mnemonics (with repetitions), modulo modulu.
+        """
+        product = 1
+        for mnemonic, count in mnemonics.items():
+            product = (product * pow(self.get_prime(mnemonic), count, modulu)) % modulu
+        return product
+
+
+# The prime tables of all the architectures that were used, {architecture name: PrimeTable}
+prime_tables: Dict[str, PrimeTable] = dict()
+prime_tables_lock: threading.Lock = threading.Lock()
+
+
+def get_prime_table(arch_name: str) -> PrimeTable:
+    """
+    :return: The prime table of the architecture, which is loaded on first use.
+    """
+    prime_table = prime_tables.get(arch_name)
+    if not prime_table:
+        with prime_tables_lock:
+            prime_table = prime_tables.get(arch_name)
+            if not prime_table:
+                prime_table = PrimeTable(arch_name)
+                prime_tables[arch_name] = prime_table
+    return prime_table
+
+
+def save_prime_tables():
+    """
+    Save the new primes of all the loaded prime tables.
+    """
+    with prime_tables_lock:
+        loaded_prime_tables = list(prime_tables.values())
+    for prime_table in loaded_prime_tables:
+        prime_table.save()
+
+
+atexit.register(save_prime_tables)
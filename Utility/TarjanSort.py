@@ -1,70 +1,105 @@
-# Downloaded from http://www.logarithmic.net/pfh-files/blog/01208083168/sort.py
-
 """
 
    Tarjan's algorithm and topological sorting implementation in Python
 
-   by Paul Harrison
+   Based on the recursive implementation by Paul Harrison (public domain,
+   http://www.logarithmic.net/pfh-files/blog/01208083168/sort.py).
 
-   Public domain, do with it as you will
+   The algorithms are iterative, so large graphs don't hit the recursion limit, and work on graphs in CSR form:
+   the nodes are the integers 0..n-1, and the successors of node i are targets[offsets[i]:offsets[i + 1]].
 
 """
 
-
-def strongly_connected_components(graph):
-    """ Find the strongly connected components in a graph using
-        Tarjan's algorithm.
-
-        graph should be a dictionary mapping node names to
-        lists of successor nodes.
-        """
-
-    result = []
-    stack = []
-    low = {}
-
-    def visit(node):
-        if node in low: return
-        if node not in graph: graph[node] = []
-
-        num = len(low)
-        low[node] = num
-        stack_pos = len(stack)
-        stack.append(node)
-
-        for successor in graph[node]:
-            visit(successor)
-            low[node] = min(low[node], low[successor])
-
-        if num == low[node]:
-            component = tuple(stack[stack_pos:])
-            del stack[stack_pos:]
-            result.append(component)
-            for item in component:
-                low[item] = len(graph)
-
-    for node in dict(graph):
-        visit(node)
+from array import array
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+
+def to_csr(adjacency: Sequence[Sequence[int]]) -> Tuple[array, array]:
+    """
+    :param adjacency: The successors of every node, adjacency[i] is the list of successors of node i.
+    :return: (offsets, targets) of the graph in CSR form.
+    """
+    offsets = array('i', [0])
+    targets = array('i')
+    for successors in adjacency:
+        targets.extend(successors)
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+def strongly_connected_components(offsets: array, targets: array) -> List[List[int]]:
+    """
+    Find the strongly connected components in a graph using Tarjan's algorithm.
+    :return: The components, in reverse topological order.
+    """
+    node_count = len(offsets) - 1
+    # low[node] is -1 for nodes that were not visited yet, and node_count for nodes already assigned to a component.
+    low = array('i', [-1]) * node_count
+    num = array('i', [0]) * node_count
+    visited_count = 0
+
+    result: List[List[int]] = []
+    stack: List[int] = []
+
+    for root in range(node_count):
+        if low[root] != -1:
+            continue
+
+        low[root] = num[root] = visited_count
+        visited_count += 1
+        # Each frame is [node, index of the next edge to follow, position of the node in the stack]
+        frames: List[List[int]] = [[root, offsets[root], len(stack)]]
+        stack.append(root)
+
+        while frames:
+            frame = frames[-1]
+            node, edge_index, stack_pos = frame
+
+            if edge_index < offsets[node + 1]:
+                frame[1] += 1
+                successor = targets[edge_index]
+                if low[successor] == -1:
+                    low[successor] = num[successor] = visited_count
+                    visited_count += 1
+                    frames.append([successor, offsets[successor], len(stack)])
+                    stack.append(successor)
+                elif low[successor] < low[node]:
+                    low[node] = low[successor]
+                continue
+
+            frames.pop()
+            if num[node] == low[node]:
+                component = stack[stack_pos:]
+                del stack[stack_pos:]
+                result.append(component)
+                for item in component:
+                    low[item] = node_count
+
+            if frames:
+                parent = frames[-1][0]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
 
     return result
 
 
-def topological_sort(graph):
-    count = {}
-    for node in graph:
-        count[node] = 0
-    for node in graph:
-        for successor in graph[node]:
-            count[successor] += 1
+def topological_sort(offsets: array, targets: array) -> List[int]:
+    """
+    Kahn's algorithm, the graph must be acyclic.
+    """
+    node_count = len(offsets) - 1
+    count = array('i', [0]) * node_count
+    for successor in targets:
+        count[successor] += 1
 
-    ready = [node for node in graph if count[node] == 0]
+    ready = [node for node in range(node_count) if count[node] == 0]
 
-    result = []
+    result: List[int] = []
     while ready:
         node = ready.pop(-1)
         result.append(node)
 
-        for successor in graph[node]:
+        for successor in targets[offsets[node]:offsets[node + 1]]:
             count[successor] -= 1
             if count[successor] == 0:
                 ready.append(successor)
@@ -72,43 +107,78 @@ def topological_sort(graph):
     return result
 
 
-def robust_topological_sort(graph):
-    """ First identify strongly connected components,
-        then perform a topological sort on these components. """
+def condensation_topological_sort(offsets: array, targets: array) -> Tuple[List[List[int]], array]:
+    """
+    First identify strongly connected components, then perform a topological sort on these components.
+    :return: (the components in topological order, the component index of every node)
+    """
+    node_count = len(offsets) - 1
+    components = strongly_connected_components(offsets, targets)
 
-    components = strongly_connected_components(graph)
-
-    node_component = {}
-    for component in components:
+    node_component = array('i', [0]) * node_count
+    for component_index, component in enumerate(components):
         for node in component:
-            node_component[node] = component
-
-    component_graph = {}
-    for component in components:
-        component_graph[component] = []
+            node_component[node] = component_index
 
-    for node in graph:
+    component_adjacency: List[List[int]] = [[] for _ in components]
+    for node in range(node_count):
         node_c = node_component[node]
-        for successor in graph[node]:
+        for successor in targets[offsets[node]:offsets[node + 1]]:
             successor_c = node_component[successor]
             if node_c != successor_c:
-                component_graph[node_c].append(successor_c)
-
-    return topological_sort(component_graph)
+                component_adjacency[node_c].append(successor_c)
+
+    component_order = topological_sort(*to_csr(component_adjacency))
+    return [components[component_index] for component_index in component_order], node_component
+
+
+def topological_order(offsets: array, targets: array) -> Tuple[List[int], int]:
+    """
+    Order the nodes of a (possibly cyclic) graph - the strongly connected components are sorted topologically, and the
+    nodes within each component are sorted by their value.
+    :return: (the position of every node in the order, the amount of natural loops in the graph)
+             A natural loop is either a strongly connected component of 2 or more nodes, or a self loop.
+    """
+    sorted_components, _ = condensation_topological_sort(offsets, targets)
+
+    positions: List[int] = [0] * (len(offsets) - 1)
+    natural_loop_count = 0
+    position = 0
+    for component in sorted_components:
+        if len(component) > 1:
+            natural_loop_count += 1
+        else:
+            node = component[0]
+            natural_loop_count += sum(1 for successor in targets[offsets[node]:offsets[node + 1]]
+                                      if successor == node)
+
+        for node in sorted(component):
+            positions[node] = position
+            position += 1
+
+    return positions, natural_loop_count
+
+
+def robust_topological_sort(graph: Dict[Hashable, List[Hashable]]) -> List[Tuple]:
+    """
+    Topologically sort the strongly connected components of a graph given as {node: [successor, ...]}.
+    :return: The components (as tuples of nodes) in topological order.
+    """
+    nodes: List[Hashable] = list(graph)
+    node_indexes: Dict[Hashable, int] = {node: index for index, node in enumerate(nodes)}
+    for successors in graph.values():
+        for successor in successors:
+            if successor not in node_indexes:
+                node_indexes[successor] = len(nodes)
+                nodes.append(successor)
+
+    offsets, targets = to_csr([[node_indexes[successor] for successor in graph.get(node, [])] for node in nodes])
+    sorted_components, _ = condensation_topological_sort(offsets, targets)
+    return [tuple(nodes[index] for index in component) for component in sorted_components]
 
 
 if __name__ == '__main__':
-    d = {
-        0: [1],
-        1: [2],
-        2: [1, 3],
-        3: [3],
-    }
-    # print d
-    # print robust_topological_sort(d)
-
     d = {0: [1], 1: [2], 2: [3, 4], 3: [2], 4: [1]}
     print(d)
-    print("scc", strongly_connected_components(d))
     print("rts", robust_topological_sort(d))
-
+    print("order", topological_order(*to_csr([d[node] for node in range(len(d))])))
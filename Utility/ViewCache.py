@@ -0,0 +1,53 @@
+"""
+
+   Memoisation of whole-binary indexes (e.g string references), so they are built once per binary view and then
+   shared by all the functions of the view.
+
+   The values are stored in the session data of the view, which is shared by all the BinaryView objects representing
+   the same view (Function.view returns a new BinaryView object on every access).
+   The values are not updated when the analysis of the view changes, so they are cleared (see clear_view_values) at
+   the start of every extraction or diff of the view.
+
+"""
+
+import threading
+from typing import Any, Callable, Set
+
+from binaryninja import BinaryView
+
+# Serializes building the values, so concurrent extraction threads don't build the same value twice.
+_build_lock = threading.Lock()
+# The keys of all the values memoised so far, of any view.
+_keys: Set[str] = set()
+
+
+def get_view_value(bv: BinaryView, key: str, build: Callable[[BinaryView], Any]) -> Any:
+    """
+    :param key: Name of the value in the view session data.
+    :param build: Called to build the value the first time it is requested for the view.
+    :return: The value memoised for the view.
+    """
+    value = bv.session_data.get(key)
+    if value is None:
+        with _build_lock:
+            value = bv.session_data.get(key)
+            if value is None:
+                value = build(bv)
+                bv.session_data[key] = value
+                _keys.add(key)
+    return value
+
+
+def clear_view_value(bv: BinaryView, key: str):
+    """
+    Drop the memoised value, it is rebuilt on the next request (e.g after the analysis of the view was updated).
+    """
+    bv.session_data.pop(key, None)
+
+
+def clear_view_values(bv: BinaryView):
+    """
+    Drop all the values memoised for the view.
+    """
+    for key in list(_keys):
+        clear_view_value(bv, key)
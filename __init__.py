@@ -3,11 +3,12 @@ import time
 from binaryninja import *
 
 from . import Configuration
+from .Utility import Log
 from .FlowManagement.DBManager import DBManager
 
 
 def run_diff(bv: BinaryView):
-    log.log_info(f'Starting Diffing Process.')
+    Log.log_info('Starting Diffing Process.')
     BinJdiff(bv).start()
 
 
@@ -28,8 +29,9 @@ class BinJdiff(BackgroundTaskThread):
         db_mgr.populate_assembly_function_collection()
 
         end_time = time.time()
-        log.log_info(f"Operation done in {end_time - start_time} seconds")
+        Log.log_info('Operation done in %s seconds', end_time - start_time)
 
 
-log.log_to_file(0, Configuration.debug_file_path)
+# The log file is written asynchronously, and only receives messages that pass Configuration.LOG_LEVEL.
+Log.log_to_file(Configuration.debug_file_path)
 PluginCommand.register("NinjDiff", "BinDiff implementation", run_diff)
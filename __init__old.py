@@ -3,6 +3,7 @@ from binaryninja import *
 from .FlowManagement.DiffManager import AssemblyFunctionDiffManager
 from .Operands.Assembly import BDFunction
 from . import Configuration
+from .Utility import Log
 from typing import Optional
 from .Operands.Assembly.BDFunction import BDFunction, BDFunctionSet
 
@@ -12,15 +13,15 @@ def load_bv(path: str, view_type: str) -> Optional[BinaryView]:
     target_bv.update_analysis_and_wait()
 
     if target_bv:
-        log.log_debug(f'Successfully loaded BinaryView {target_bv}')
+        Log.log_debug('Successfully loaded BinaryView %s', target_bv)
         return target_bv
     else:
-        log.log_debug(f'Failed to load BinaryView {path}')
+        Log.log_debug('Failed to load BinaryView %s', path)
         return None
 
 
 def run_diff(bv: BinaryView):
-    log.log_info(f'Starting Diffing Process.')
+    Log.log_info('Starting Diffing Process.')
     BinJdiff(bv).start()
 
 
@@ -40,21 +41,14 @@ class BinJdiff(BackgroundTaskThread):
         # TODO: Target bv should be an input from the user.
         target_bv = load_bv('C:\\Users\\' + Configuration.current_user + '\\Downloads\\7z1604-x64.exe', 'PE')
 
-        source = BDFunctionSet()
-        target = BDFunctionSet()
-        for source_func in self.bv.functions:
-            if len(list(source_func.instructions)) >= Configuration.MIN_FUNCTION_INSTRUCTION_LENGTH:
-                bd_func = BDFunction(source_func)
-                source.add(bd_func)
-        for target_func in target_bv.functions:
-            if len(list(target_func.instructions)) >= Configuration.MIN_FUNCTION_INSTRUCTION_LENGTH:
-                bd_func = BDFunction(target_func)
-                target.add(bd_func)
+        source = BDFunctionSet.from_binary_view(self.bv)
+        target = BDFunctionSet.from_binary_view(target_bv)
         diff_manager = AssemblyFunctionDiffManager(source, target)
         diff_manager.diff_functions()
         end_time = time.time()
-        log.log_info(f"Operation done in {end_time - start_time} seconds")
+        Log.log_info('Operation done in %s seconds', end_time - start_time)
 
 
-log.log_to_file(0, Configuration.debug_file_path)
+# The log file is written asynchronously, and only receives messages that pass Configuration.LOG_LEVEL.
+Log.log_to_file(Configuration.debug_file_path)
 PluginCommand.register("NinjDiff", "BinDiff implementation", run_diff)
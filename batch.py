@@ -0,0 +1,245 @@
+"""
+
+   Batch diff driver - diff many (old, new) binary pairs, each in a worker process.
+
+   usage: python -m NinjDiff.batch [-h] [-j PROCESSES] [--diffs-per-process N] [--max-memory BYTES]
+                                   [--loader MODULE:FUNCTION] [--attribute-cache PATH] [--no-attribute-cache]
+                                   manifest output_dir
+
+   The manifest is a CSV file with a row per pair: old path, new path and an optional pair name.
+   The results of every pair are written to <output_dir>/<pair name>.json once the pair is diffed, and the outcome of
+   every pair (done or failed, with the error) is appended to <output_dir>/batch_status.jsonl.
+   Pairs whose results file already exists are skipped, so re-running a crashed or interrupted batch only diffs the
+   pairs that haven't finished.
+   The worker processes are spawned (not forked from the batch process). A pair whose worker process dies (e.g a native
+   crash in Binary Ninja, or an allocation failure under --max-memory) is marked as failed, and the batch continues.
+
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import *
+
+import xxhash
+from binaryninja import *
+
+from . import Configuration
+from . import cli
+from .Utility import Log
+
+STATUS_FILE_NAME = 'batch_status.jsonl'
+
+
+class DiffPair(NamedTuple):
+    source: str
+    target: str
+    name: str
+
+
+def pair_name(source: str, target: str) -> str:
+    """
+    A name that is stable across runs of the same manifest, used as the name of the pair results file.
+    """
+    paths_hash = xxhash.xxh64(f'{source}\0{target}').hexdigest()
+    return f'{os.path.basename(source)}_{os.path.basename(target)}_{paths_hash}'
+
+
+def read_manifest(manifest_path: str) -> List[DiffPair]:
+    """
+    :return: The pairs in the manifest, rows that are empty or start with # are skipped.
+    """
+    pairs: List[DiffPair] = list()
+    with open(manifest_path, newline='') as manifest_file:
+        for row_number, row in enumerate(csv.reader(manifest_file), 1):
+            if not row or not row[0].strip() or row[0].lstrip().startswith('#'):
+                continue
+            if len(row) < 2:
+                raise ValueError(f'{manifest_path}:{row_number}: Expected old path, new path and an optional name')
+            source, target = row[0].strip(), row[1].strip()
+            name = row[2].strip() if len(row) > 2 and row[2].strip() else pair_name(source, target)
+            pairs.append(DiffPair(source, target, name))
+
+    names = [pair.name for pair in pairs]
+    if len(set(names)) != len(names):
+        raise ValueError(f'{manifest_path}: Pair names must be unique')
+    return pairs
+
+
+def results_path(output_dir: str, pair: DiffPair) -> str:
+    return os.path.join(output_dir, f'{pair.name}.json')
+
+
+def write_atomically(path: str, data: Dict):
+    """
+    Write the data as JSON to a temporary file and rename it, so a crash never leaves a partial results file (which
+    would be mistaken for a finished pair when resuming).
+    """
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'w') as output_file:
+        json.dump(data, output_file, indent=4)
+    os.replace(temporary_path, path)
+
+
+def init_worker(max_memory: int, attribute_cache_path: Optional[str] = None, attribute_cache_disabled: bool = False):
+    """
+    Worker process initializer - cap the address space of the process, so a diff that blows up fails with a
+    MemoryError instead of taking the whole machine down.
+    The attribute cache configuration is applied in the worker, as the workers don't inherit it on every platform.
+    """
+    cli.configure_attribute_cache(attribute_cache_path, attribute_cache_disabled)
+    if max_memory <= 0:
+        return
+    try:
+        import resource
+    except ImportError:
+        Log.log_warn('init_worker: Limiting the worker memory is not supported on this platform.')
+        return
+    resource.setrlimit(resource.RLIMIT_AS, (max_memory, max_memory))
+
+
+def diff_pair(pair: DiffPair, output_dir: str, loader_name: Optional[str]) -> Dict:
+    """
+    Worker process task - diff a single pair and write its results file.
+    :return: The status of the pair.
+    """
+    start_time = time.perf_counter()
+    try:
+        loader = cli.import_loader(loader_name) if loader_name else cli.load_binary_view
+        results = cli.diff_binaries(pair.source, pair.target, loader)
+        write_atomically(results_path(output_dir, pair), results)
+        status = {'status': 'done', 'matched_functions': len(results['matched_functions'])}
+    except Exception as e:
+        # MemoryError included, the worker process is replaced once its pool is done anyway.
+        status = {'status': 'failed', 'error': repr(e), 'traceback': traceback.format_exc()}
+
+    return pair_status(pair, status, start_time)
+
+
+def pair_status(pair: DiffPair, status: Dict, start_time: float) -> Dict:
+    status.update({'name': pair.name, 'source': pair.source, 'target': pair.target,
+                   'seconds': time.perf_counter() - start_time})
+    return status
+
+
+def create_pool(process_count: int, initargs: Tuple) -> ProcessPoolExecutor:
+    """
+    The worker processes are spawned rather than forked, so they don't inherit the Binary Ninja state of the batch
+    process.
+    """
+    return ProcessPoolExecutor(max_workers=process_count, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=init_worker, initargs=initargs)
+
+
+def diff_pair_isolated(pair: DiffPair, output_dir: str, loader_name: Optional[str], initargs: Tuple) -> Dict:
+    """
+    Diff a single pair in a pool of its own, so if its worker process dies only this pair fails.
+    """
+    start_time = time.perf_counter()
+    with create_pool(1, initargs) as pool:
+        try:
+            return pool.submit(diff_pair, pair, output_dir, loader_name).result()
+        except BrokenProcessPool:
+            return pair_status(pair, {'status': 'failed', 'error': 'The worker process died'}, start_time)
+
+
+def diff_pairs(pairs: List[DiffPair], output_dir: str, process_count: int, diffs_per_process: int,
+               loader_name: Optional[str], initargs: Tuple) -> Iterator[Dict]:
+    """
+    Diff the pairs on pools of process_count worker processes, and yield the status of every pair once it is diffed.
+    Each pool diffs diffs_per_process pairs per worker process, and is then replaced by a new pool.
+    When a worker process dies, its pool is broken and all the unfinished pairs of the pool fail with it - these pairs
+    are diffed again, each in a pool of its own, so only the pairs that kill their worker are marked as failed.
+    """
+    process_count = max(process_count, 1)
+    pool_pair_count = process_count * max(diffs_per_process, 1)
+    crashed_pairs: List[DiffPair] = list()
+
+    for pool_start in range(0, len(pairs), pool_pair_count):
+        with create_pool(process_count, initargs) as pool:
+            futures = {pool.submit(diff_pair, pair, output_dir, loader_name): pair
+                       for pair in pairs[pool_start:pool_start + pool_pair_count]}
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except BrokenProcessPool:
+                    crashed_pairs.append(futures[future])
+
+    if crashed_pairs:
+        Log.log_warn('run_batch: A worker process died, diffing %d unfinished pairs again one by one.',
+                     len(crashed_pairs))
+        with ThreadPoolExecutor(max_workers=process_count) as isolation_threads:
+            isolated_futures = [isolation_threads.submit(diff_pair_isolated, pair, output_dir, loader_name, initargs)
+                                for pair in crashed_pairs]
+            for future in as_completed(isolated_futures):
+                yield future.result()
+
+
+def run_batch(pairs: List[DiffPair], output_dir: str, process_count: int = Configuration.BATCH_PROCESS_COUNT,
+              diffs_per_process: int = Configuration.BATCH_DIFFS_PER_PROCESS,
+              max_process_memory: int = Configuration.BATCH_MAX_PROCESS_MEMORY,
+              loader_name: Optional[str] = None, attribute_cache_path: Optional[str] = None,
+              attribute_cache_disabled: bool = False) -> List[Dict]:
+    """
+    Diff all the pairs that don't have a results file in output_dir yet, on a pool of worker processes.
+    :param attribute_cache_path: Path of the attribute cache file shared by the workers, the configured path if None.
+    :return: The status of every pair that was diffed.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    pending_pairs = [pair for pair in pairs if not os.path.exists(results_path(output_dir, pair))]
+    Log.log_info('run_batch: %d pairs already finished, diffing %d pairs.', len(pairs) - len(pending_pairs),
+                 len(pending_pairs))
+    if not pending_pairs:
+        return []
+
+    statuses: List[Dict] = list()
+    initargs = (max_process_memory, attribute_cache_path, attribute_cache_disabled)
+    with open(os.path.join(output_dir, STATUS_FILE_NAME), 'a') as status_file:
+        for status in diff_pairs(pending_pairs, output_dir, process_count, diffs_per_process, loader_name, initargs):
+            status_file.write(json.dumps(status) + '\n')
+            status_file.flush()
+            statuses.append(status)
+            Log.log_info('run_batch: %s %s in %.1f seconds (%d/%d).', status['name'], status['status'],
+                         status['seconds'], len(statuses), len(pending_pairs))
+
+    return statuses
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='NinjDiff batch', description='Diff many pairs of binaries.')
+    parser.add_argument('manifest', help='CSV file with a row of old path, new path and an optional name per pair')
+    parser.add_argument('output_dir', help='Directory to write the results of every pair to')
+    parser.add_argument('-j', '--processes', type=int, default=Configuration.BATCH_PROCESS_COUNT,
+                        help='Amount of pairs diffed in parallel')
+    parser.add_argument('--diffs-per-process', type=int, default=Configuration.BATCH_DIFFS_PER_PROCESS,
+                        help='Amount of pairs each worker process diffs before the worker processes are replaced')
+    parser.add_argument('--max-memory', type=int, default=Configuration.BATCH_MAX_PROCESS_MEMORY,
+                        help='Maximum address space of a worker process in bytes, 0 for no limit')
+    parser.add_argument('--loader', help='Custom BinaryView loader, in the form of module:function')
+    parser.add_argument('--attribute-cache', help='Path of the attribute cache file')
+    parser.add_argument('--no-attribute-cache', action='store_true', help='Disable the attribute cache')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arguments = parse_arguments(argv)
+    statuses = run_batch(read_manifest(arguments.manifest), arguments.output_dir, arguments.processes,
+                         arguments.diffs_per_process, arguments.max_memory, arguments.loader,
+                         arguments.attribute_cache, arguments.no_attribute_cache)
+
+    failed_statuses = [status for status in statuses if status['status'] != 'done']
+    print(f'Diffed {len(statuses) - len(failed_statuses)} pairs, {len(failed_statuses)} failed.')
+    for status in failed_statuses:
+        print(f'{status["name"]}: {status["error"]}')
+    return 1 if failed_statuses else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
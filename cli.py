@@ -0,0 +1,183 @@
+"""
+
+   Headless diff driver - diff two binaries (or .bndb files) without the Binary Ninja UI.
+
+   usage: python -m NinjDiff.cli [-h] [-o OUTPUT] [--loader MODULE:FUNCTION] [--min-instructions N]
+                                 [--instrumentation JSON] [--trace JSON] [--attribute-cache PATH]
+                                 [--no-attribute-cache] [-v] source target
+
+   The binaries are loaded with headless Binary Ninja, unless a custom loader is given. A loader is any callable that
+   receives a path and returns an analyzed BinaryView (e.g a loader that opens cached .bndb files for each binary).
+   The results, including the time spent in every phase, are written as JSON to the output file.
+   --instrumentation and --trace enable the instrumentation of every Property, Selector, attribute extraction and
+   propagation round (see Utility.Instrumentation), and write its aggregates \ Chrome trace-events to the given files.
+   The attribute values extracted by the diff are stored in the attribute cache (see DataManagement.AttributeCache),
+   and loaded instead of being extracted again by later diffs of the same binaries. --attribute-cache and
+   --no-attribute-cache override the location of the cache \ disable it.
+
+"""
+
+import argparse
+import importlib
+import json
+import sys
+import time
+from typing import *
+
+from binaryninja import *
+
+from . import Configuration
+from .DataManagement.AttributeCache import AttributeCache, BinaryAttributeCache
+from .Enums import bd_enums
+from .FlowManagement import PluginManager
+from .FlowManagement.DiffManager import AssemblyFunctionDiffManager
+from .Operands.Assembly.BDFunction import BDFunctionSet
+from .Utility.Instrumentation import get_instrumentation
+from .Utility import BinaryHash, Log, PrimeTable, ViewCache
+
+Loader = Callable[[str], BinaryView]
+
+
+def load_binary_view(path: str) -> BinaryView:
+    """
+    The default loader - open the binary (or .bndb) with headless Binary Ninja, and wait for the analysis to finish.
+    """
+    bv: Optional[BinaryView] = BinaryViewType.get_view_of_file(path)
+    if not bv:
+        raise ValueError(f'Failed to load BinaryView {path}')
+    bv.update_analysis_and_wait()
+    Log.log_debug('Successfully loaded BinaryView %s', bv)
+    return bv
+
+
+def configure_attribute_cache(path: Optional[str], disabled: bool = False):
+    """
+    Override the attribute cache configuration of this process.
+    :param path: Path of the attribute cache file, the configured path is kept if None.
+    """
+    if path:
+        Configuration.attribute_cache_path = path
+    if disabled:
+        Configuration.ATTRIBUTE_CACHE_ENABLED = False
+
+
+def import_loader(loader_name: str) -> Loader:
+    """
+    :param loader_name: The loader to import, in the form of module:function.
+    """
+    module_name, separator, function_name = loader_name.partition(':')
+    if not separator or not function_name:
+        raise ValueError(f'Invalid loader {loader_name}, expected module:function')
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def load_attribute_versions() -> Dict[str, int]:
+    """
+    :return: The version of every loaded attribute, {attribute name: version}.
+    """
+    return {attribute.name: attribute.version
+            for ir in bd_enums.IRType for attribute in PluginManager.import_attributes(ir).values()}
+
+
+def diff_binaries(source_path: str, target_path: str, loader: Loader = load_binary_view,
+                  min_instruction_length: int = Configuration.MIN_FUNCTION_INSTRUCTION_LENGTH) -> Dict:
+    """
+    Load both binaries, diff their functions (with at least min_instruction_length instructions) and basic blocks.
+    The cached attribute values of both binaries are used if Configuration.ATTRIBUTE_CACHE_ENABLED.
+    :return: The diff results (see AssemblyFunctionDiffManager.get_results), including the timings of the loading
+             phases.
+    """
+    phase_timings: Dict[str, float] = dict()
+
+    phase_start = time.perf_counter()
+    source_bv = loader(source_path)
+    phase_timings['load_source'] = time.perf_counter() - phase_start
+
+    phase_start = time.perf_counter()
+    target_bv = loader(target_path)
+    phase_timings['load_target'] = time.perf_counter() - phase_start
+
+    # A loader may return views that were already diffed, whose memoised indexes are stale if they were re-analyzed.
+    for bv in (source_bv, target_bv):
+        ViewCache.clear_view_values(bv)
+
+    phase_start = time.perf_counter()
+    source = BDFunctionSet.from_binary_view(source_bv, min_instruction_length)
+    target = BDFunctionSet.from_binary_view(target_bv, min_instruction_length)
+    phase_timings['build_function_sets'] = time.perf_counter() - phase_start
+
+    attribute_cache: Optional[AttributeCache] = None
+    binary_caches: List[Optional[BinaryAttributeCache]] = [None, None]
+    if Configuration.ATTRIBUTE_CACHE_ENABLED:
+        phase_start = time.perf_counter()
+        attribute_cache = AttributeCache()
+        attribute_versions = load_attribute_versions()
+        binary_caches = [BinaryAttributeCache(attribute_cache, BinaryHash.calc_bv_hash(bv), attribute_versions)
+                         for bv in (source_bv, target_bv)]
+        phase_timings['hash_binaries'] = time.perf_counter() - phase_start
+
+    try:
+        diff_manager = AssemblyFunctionDiffManager(source, target, *binary_caches)
+        diff_manager.diff_functions()
+    finally:
+        if attribute_cache:
+            attribute_cache.close()
+        PrimeTable.save_prime_tables()
+    phase_timings.update(diff_manager.phase_timings)
+
+    results = diff_manager.get_results()
+    results.update({
+        'source': source_path,
+        'target': target_path,
+        'phase_timings': phase_timings
+    })
+    return results
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='NinjDiff', description='Diff the functions of two binaries.')
+    parser.add_argument('source', help='Path of the source binary or .bndb file')
+    parser.add_argument('target', help='Path of the target binary or .bndb file')
+    parser.add_argument('-o', '--output', default='ninjdiff_results.json', help='Path of the JSON results file')
+    parser.add_argument('--loader', help='Custom BinaryView loader, in the form of module:function')
+    parser.add_argument('--min-instructions', type=int, default=Configuration.MIN_FUNCTION_INSTRUCTION_LENGTH,
+                        help='Minimum amount of instructions in a function for it to be diffed')
+    parser.add_argument('--instrumentation', help='Path of the JSON file to write the aggregated instrumentation to')
+    parser.add_argument('--trace', help='Path of the JSON file to write the Chrome trace-events to')
+    parser.add_argument('--attribute-cache', help='Path of the attribute cache file')
+    parser.add_argument('--no-attribute-cache', action='store_true', help='Disable the attribute cache')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Print the Binary Ninja log to stdout')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arguments = parse_arguments(argv)
+    if arguments.verbose:
+        log.log_to_stdout(LogLevel.InfoLog)
+
+    configure_attribute_cache(arguments.attribute_cache, arguments.no_attribute_cache)
+    loader: Loader = import_loader(arguments.loader) if arguments.loader else load_binary_view
+    instrumentation = get_instrumentation()
+    if arguments.instrumentation or arguments.trace:
+        instrumentation.enabled = True
+        instrumentation.reset()
+
+    start_time = time.perf_counter()
+    results = diff_binaries(arguments.source, arguments.target, loader, arguments.min_instructions)
+    results['phase_timings']['total'] = time.perf_counter() - start_time
+
+    with open(arguments.output, 'w') as output_file:
+        json.dump(results, output_file, indent=4)
+    if arguments.instrumentation:
+        instrumentation.write_json(arguments.instrumentation)
+    if arguments.trace:
+        instrumentation.write_chrome_trace(arguments.trace)
+
+    for phase_name, phase_time in results['phase_timings'].items():
+        print(f'{phase_name}: {phase_time:.3f} seconds')
+    print(f'Matched {len(results["matched_functions"])} functions, results written to {arguments.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
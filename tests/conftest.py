@@ -0,0 +1,15 @@
+"""
+The repository root is the NinjDiff plugin package. It is registered under that name (without running its __init__,
+which registers the plugin with Binary Ninja) so the tests can import its modules.
+"""
+
+import os
+import sys
+import types
+
+PACKAGE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if 'NinjDiff' not in sys.modules:
+    package = types.ModuleType('NinjDiff')
+    package.__path__ = [PACKAGE_PATH]
+    sys.modules['NinjDiff'] = package
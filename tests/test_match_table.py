@@ -0,0 +1,64 @@
+from NinjDiff.FlowManagement.MatchTable import PotentialMatchTable
+
+
+class StandIn:
+    def __init__(self, uuid: int):
+        self.uuid = uuid
+
+
+def accepted_pairs(table: PotentialMatchTable, threshold: int = 20):
+    accepted, rejected = table.partition(threshold)
+    assert len(accepted) + len(rejected) == len(table)
+    return sorted(entry[0] for entry in accepted)
+
+
+def test_threshold():
+    table = PotentialMatchTable()
+    table.upsert(StandIn(1), StandIn(11), 30)
+    table.upsert(StandIn(2), StandIn(12), 10)
+    assert accepted_pairs(table) == [(1, 11)]
+
+
+def test_target_claimed_by_two_sources():
+    source_1, source_2, target = StandIn(1), StandIn(2), StandIn(11)
+    table = PotentialMatchTable()
+    table.upsert(source_1, target, 40)
+    table.upsert(source_2, target, 30)
+    assert accepted_pairs(table) == [(1, 11)]
+
+
+def test_source_claimed_by_two_targets():
+    table = PotentialMatchTable()
+    source = StandIn(1)
+    table.upsert(source, StandIn(11), 25)
+    table.upsert(source, StandIn(12), 50)
+    assert accepted_pairs(table) == [(1, 12)]
+
+
+def test_losing_entry_frees_its_other_object():
+    # (2, 11) loses to (1, 11), so it doesn't block (2, 12).
+    source_1, source_2 = StandIn(1), StandIn(2)
+    target_1, target_2 = StandIn(11), StandIn(12)
+    table = PotentialMatchTable()
+    table.upsert(source_1, target_1, 40)
+    table.upsert(source_2, target_1, 30)
+    table.upsert(source_2, target_2, 25)
+    assert accepted_pairs(table) == [(1, 11), (2, 12)]
+
+
+def test_tie_is_ambiguous():
+    source = StandIn(1)
+    table = PotentialMatchTable()
+    table.upsert(source, StandIn(11), 30)
+    table.upsert(source, StandIn(12), 30)
+    table.upsert(source, StandIn(13), 25)
+    assert accepted_pairs(table) == []
+
+
+def test_averaged_confidence():
+    source, target = StandIn(1), StandIn(11)
+    table = PotentialMatchTable()
+    assert table.upsert(source, target, 10)
+    assert not table.upsert(source, target, 40)
+    assert table.get((1, 11))[1] == 25
+    assert table.get_by_source(source) == table.get_by_target(target) == [table.get((1, 11))]
@@ -0,0 +1,76 @@
+import csv
+import os
+
+from NinjDiff.DataManagement.Neo4j.Neo4jCsvExporter import Neo4jCsvExporter
+
+
+class StandIn:
+    def __init__(self, uuid: int, attributes: dict, bd_basic_blocks: dict = None):
+        self.uuid = uuid
+        self.attributes = attributes
+        self.bd_basic_blocks = bd_basic_blocks or dict()
+
+    def get_all_attribute_values(self):
+        return self.attributes
+
+
+def read_csv(output_dir, file_name):
+    with open(os.path.join(output_dir, file_name), newline='', encoding='utf8') as csv_file:
+        return list(csv.reader(csv_file))
+
+
+def export(output_dir, functions):
+    with Neo4jCsvExporter(str(output_dir)) as exporter:
+        exporter.add_function_collection(1, 'binary', 'x86')
+        for function in functions:
+            exporter.add_function(function)
+    return exporter
+
+
+def test_headers(tmp_path):
+    basic_block = StandIn(20, {'BasicBlockDegree': {'in_degree': 1, 'out_degree': 2}})
+    function = StandIn(10, {'FunctionName': {'name': 'main', 'exported': True, 'sizes': [1, 2]}},
+                       {basic_block.uuid: basic_block})
+    exporter = export(tmp_path, [function])
+
+    assert read_csv(tmp_path, 'FunctionCollection.csv') == [
+        [':ID(FunctionCollection)', 'uuid:long', 'filename', 'arch', ':LABEL'],
+        ['1', '1', 'binary', 'x86', 'FunctionCollection']]
+    assert read_csv(tmp_path, 'Function.csv') == [[':ID(Function)', 'uuid:long', ':LABEL'], ['10', '10', 'Function']]
+    assert read_csv(tmp_path, 'BasicBlock.csv') == [[':ID(BasicBlock)', 'uuid:long', ':LABEL'],
+                                                    ['20', '20', 'BasicBlock']]
+
+    function_name_rows = read_csv(tmp_path, 'FunctionName_0.csv')
+    assert function_name_rows[0] == [':ID(Attribute)', 'exported:boolean', 'name:string', 'sizes:long[]', ':LABEL']
+    assert function_name_rows[1][1:] == ['true', 'main', '1;2', 'FunctionName']
+    assert read_csv(tmp_path, 'Function_Attribute.csv') == [
+        [':START_ID(Function)', ':END_ID(Attribute)', ':TYPE'],
+        ['10', function_name_rows[1][0], 'Attribute']]
+
+    assert f'--nodes={os.path.join(str(tmp_path), "Function.csv")}' in exporter.import_arguments()
+    assert f'--relationships={os.path.join(str(tmp_path), "BasicBlock_Attribute.csv")}' in \
+        exporter.import_arguments()
+
+
+def test_attribute_deduplication(tmp_path):
+    # Identical attribute values are exported once and linked to both functions, attributes with a uuid are identified
+    # by it alone.
+    export(tmp_path, [StandIn(10, {'FunctionHash': {'hash': 5}, 'FunctionSPP': {'uuid': 'a', 'spp': 7}}),
+                      StandIn(11, {'FunctionHash': {'hash': 5}, 'FunctionSPP': {'uuid': 'a', 'spp': 8}}),
+                      StandIn(12, {'FunctionHash': {'hash': 6}})])
+
+    assert [row[1] for row in read_csv(tmp_path, 'FunctionHash_0.csv')[1:]] == ['5', '6']
+    spp_rows = read_csv(tmp_path, 'FunctionSPP_1.csv')
+    assert [row[0] for row in spp_rows[1:]] == ['FunctionSPP:a']
+    assert len(read_csv(tmp_path, 'Function_Attribute.csv')) == 1 + 5
+
+
+def test_node_deduplication(tmp_path):
+    # A uuid collision is written as a single node, which is linked to the attributes of both objects.
+    basic_block = StandIn(20, {})
+    export(tmp_path, [StandIn(10, {'FunctionHash': {'hash': 5}}, {basic_block.uuid: basic_block}),
+                      StandIn(10, {'FunctionHash': {'hash': 6}}, {basic_block.uuid: basic_block})])
+
+    assert read_csv(tmp_path, 'Function.csv')[1:] == [['10', '10', 'Function']]
+    assert read_csv(tmp_path, 'BasicBlock.csv')[1:] == [['20', '20', 'BasicBlock']]
+    assert [row[0] for row in read_csv(tmp_path, 'Function_Attribute.csv')[1:]] == ['10', '10']
@@ -0,0 +1,38 @@
+import json
+import os
+
+from NinjDiff.Utility.PrimeTable import PrimeTable
+
+
+def fake_calc_prime(mnemonic):
+    return len(mnemonic) * 1000 + sum(mnemonic.encode('utf8'))
+
+
+def read_table(table_dir, arch_name):
+    with open(os.path.join(str(table_dir), f'{arch_name}.json')) as table_file:
+        return json.load(table_file)
+
+
+def test_saves_are_batched(tmp_path, monkeypatch):
+    monkeypatch.setattr(PrimeTable, 'calc_prime', staticmethod(fake_calc_prime))
+    prime_table = PrimeTable('x86', str(tmp_path))
+    prime_table.get_prime('mov')
+    prime_table.get_prime('push')
+    assert not os.path.exists(os.path.join(str(tmp_path), 'x86.json'))
+
+    prime_table.save()
+    assert read_table(tmp_path, 'x86') == {'mov': fake_calc_prime('mov'), 'push': fake_calc_prime('push')}
+
+
+def test_save_merges_with_other_processes(tmp_path, monkeypatch):
+    # Two tables standing in for two processes which loaded the same (empty) table file.
+    monkeypatch.setattr(PrimeTable, 'calc_prime', staticmethod(fake_calc_prime))
+    first_table = PrimeTable('x86', str(tmp_path))
+    second_table = PrimeTable('x86', str(tmp_path))
+    first_table.get_prime('mov')
+    second_table.get_prime('push')
+
+    first_table.save()
+    second_table.save()
+    assert read_table(tmp_path, 'x86') == {'mov': fake_calc_prime('mov'), 'push': fake_calc_prime('push')}
+    assert second_table.mnemonic_to_prime == read_table(tmp_path, 'x86')
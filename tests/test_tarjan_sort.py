@@ -0,0 +1,147 @@
+import random
+import sys
+
+from NinjDiff.Utility import TarjanSort
+
+
+# The previous, recursive implementation (by Paul Harrison, public domain), which the iterative CSR implementation must
+# match exactly.
+def reference_strongly_connected_components(graph):
+    result = []
+    stack = []
+    low = {}
+
+    def visit(node):
+        if node in low: return
+        if node not in graph: graph[node] = []
+
+        num = len(low)
+        low[node] = num
+        stack_pos = len(stack)
+        stack.append(node)
+
+        for successor in graph[node]:
+            visit(successor)
+            low[node] = min(low[node], low[successor])
+
+        if num == low[node]:
+            component = tuple(stack[stack_pos:])
+            del stack[stack_pos:]
+            result.append(component)
+            for item in component:
+                low[item] = len(graph)
+
+    for node in dict(graph):
+        visit(node)
+
+    return result
+
+
+def reference_topological_sort(graph):
+    count = {}
+    for node in graph:
+        count[node] = 0
+    for node in graph:
+        for successor in graph[node]:
+            count[successor] += 1
+
+    ready = [node for node in graph if count[node] == 0]
+
+    result = []
+    while ready:
+        node = ready.pop(-1)
+        result.append(node)
+
+        for successor in graph[node]:
+            count[successor] -= 1
+            if count[successor] == 0:
+                ready.append(successor)
+
+    return result
+
+
+def reference_robust_topological_sort(graph):
+    components = reference_strongly_connected_components(graph)
+
+    node_component = {}
+    for component in components:
+        for node in component:
+            node_component[node] = component
+
+    component_graph = {}
+    for component in components:
+        component_graph[component] = []
+
+    for node in graph:
+        node_c = node_component[node]
+        for successor in graph[node]:
+            successor_c = node_component[successor]
+            if node_c != successor_c:
+                component_graph[node_c].append(successor_c)
+
+    return reference_topological_sort(component_graph)
+
+
+def reference_topological_order(graph):
+    """
+    The positions and natural loop count topological_order is expected to return, from the reference components.
+    """
+    positions = [0] * len(graph)
+    natural_loop_count = 0
+    position = 0
+    for component in reference_robust_topological_sort({node: list(graph[node]) for node in graph}):
+        if len(component) > 1:
+            natural_loop_count += 1
+        else:
+            natural_loop_count += graph[component[0]].count(component[0])
+        for node in sorted(component):
+            positions[node] = position
+            position += 1
+    return positions, natural_loop_count
+
+
+def random_graphs(count: int, max_node_count: int, max_degree: int):
+    rng = random.Random(17)
+    for _ in range(count):
+        node_count = rng.randint(1, max_node_count)
+        yield {node: [rng.randrange(node_count) for _ in range(rng.randint(0, max_degree))]
+               for node in range(node_count)}
+
+
+def test_robust_topological_sort_matches_reference():
+    for graph in random_graphs(1000, 40, 3):
+        expected = reference_robust_topological_sort({node: list(successors) for node, successors in graph.items()})
+        assert TarjanSort.robust_topological_sort(graph) == expected, graph
+
+
+def test_topological_order_matches_reference():
+    for graph in random_graphs(1000, 40, 3):
+        offsets, targets = TarjanSort.to_csr([graph[node] for node in range(len(graph))])
+        assert TarjanSort.topological_order(offsets, targets) == reference_topological_order(graph), graph
+
+
+def test_deep_chain_matches_reference():
+    # A chain closed into a loop, deep enough for the reference to need a raised recursion limit.
+    node_count = 3000
+    graph = {node: [(node + 1) % node_count] for node in range(node_count)}
+    recursion_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(node_count * 4)
+    try:
+        expected_components = reference_robust_topological_sort({node: list(graph[node]) for node in graph})
+        expected_order = reference_topological_order(graph)
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+
+    assert TarjanSort.robust_topological_sort(graph) == expected_components
+    assert TarjanSort.topological_order(*TarjanSort.to_csr([graph[node] for node in range(node_count)])) == \
+        expected_order
+
+
+def test_very_deep_chain():
+    # Far deeper than any recursion limit.
+    node_count = 200000
+    chain = [[node + 1] for node in range(node_count - 1)] + [[]]
+    assert TarjanSort.topological_order(*TarjanSort.to_csr(chain)) == (list(range(node_count)), 0)
+
+    chain[-1] = [0]
+    assert TarjanSort.topological_order(*TarjanSort.to_csr(chain)) == (list(range(node_count)), 1)